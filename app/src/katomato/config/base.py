@@ -2,10 +2,13 @@ import inspect
 import logging
 import sys
 from dataclasses import dataclass
+from functools import cache
+from types import MappingProxyType
 from typing import get_type_hints, get_args
 
 import katomato.config.hardware as items
 from katomato.config.hardware import Hardware
+from katomato.config.params import Params, build_params
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
@@ -18,35 +21,161 @@ class BaseConfig:
     DEBUG = False
     SERIAL_PORT = "/dev/ttyACM0"
     BAUD_RATE = 9600
+    SERIAL_MAX_LINE_LENGTH = 1024  # bytes, longer lines are discarded
+    TELEMETRY_PROTOCOL = "binary"  # binary | json, binary falls back to json if the firmware doesn't support it
+    TELEMETRY_HANDSHAKE_TIMEOUT = 5.0  # s
+    SERIAL_WRITE_BUDGET = 64  # bytes per write, the size of the Arduino's serial receive buffer
+    SERIAL_WRITE_INTERVAL = 0.1  # s, commands are paced to SERIAL_WRITE_BUDGET bytes per interval
+    SERIAL_ACK_WINDOW = 4  # commands waiting for an ACK at the same time
+    SERIAL_ACK_TIMEOUT = 1.0  # s
+    SERIAL_ACK_RETRIES = 3
+
+    # boards, id -> transport options. serial: port, baudrate | tcp: host, port | loopback: name. None is a
+    # single board "main" on SERIAL_PORT at BAUD_RATE
+    BOARDS = None
+    RECONNECT_BACKOFF_INITIAL = 1.0  # s, doubled after every failed attempt
+    RECONNECT_BACKOFF_MAX = 60.0  # s
+
+    # controllers
+    TIMER_WHEEL_TICK = 0.1  # s, resolution of timed device actions such as pump runs
+    TIMER_WHEEL_SLOTS = 512
+
+    # threshold rules, compiled at startup into one rule set per sensor id. Sensors without a controller class
+    # are controlled by their rules alone. sensor | condition: > >= < <= any | setpoint, hysteresis: a number
+    # or Params names and numbers joined by + and -, the hysteresis widens the threshold away from the
+    # setpoint | action: up | down | device: only controls of this device, default all | priority: higher first
+    CONTROL_RULES = (
+        {"sensor": "dt", "condition": ">", "setpoint": "temp_mid", "hysteresis": "temp_tolerance", "action": "down"},
+        {"sensor": "dt", "condition": "<", "setpoint": "temp_mid", "hysteresis": "temp_tolerance", "action": "up"},
+        {"sensor": "dh", "condition": ">", "setpoint": "HUM_CEIL - hum_tolerance", "action": "down"},
+        {"sensor": "dh", "condition": "<=", "setpoint": "hum_mid", "hysteresis": "hum_tolerance", "action": "up"},
+        {"sensor": "smoke", "condition": "any", "action": "down"},
+    )
+    RULE_INTERVALS = MappingProxyType({"dt": 60.0})  # s, minimum time between decisions per sensor id
+
+    # exhaust fan on the temperature: step | pid. step moves the fan one speed step per "dt" decision, pid sets
+    # any duty on every reading to hold temp_mid
+    EXHAUST_FAN_MODE = "step"
+    # gains per C of error, the output is the share of the duty range above the fan's RPM threshold, kd=0 is PI
+    EXHAUST_FAN_PID = MappingProxyType({"kp": 0.5, "ki": 0.001, "kd": 0.0})
+    EXHAUST_FAN_MIN_STEP = 16  # duty counts of 255, smaller changes are not sent
+
+    # device calibrations such as the exhaust fan RPM threshold, reused after a restart
+    CALIBRATION_FILE = ".katomato/calibration.json"
+    CALIBRATION_REVALIDATE_INTERVAL = 7 * 24 * 3600.0  # s, a calibration is checked again when older
+
+    # device outputs, controller decision times and a manual growth phase, journaled on every change, restored
+    # and re-sent to the boards after a restart
+    STATE_JOURNAL_DIR = ".katomato/state"  # None keeps the state in memory only
+    STATE_JOURNAL_FSYNC_INTERVAL = 1.0  # s, records are flushed at once, a power loss loses at most this
+    STATE_JOURNAL_SNAPSHOT_RECORDS = 1000  # journaled records compacted into a snapshot
+
+    # latency histograms per pipeline stage, dumped by the `stats` CLI command
+    INSTRUMENTATION = True
+    INSTRUMENTATION_SAMPLE_INTERVAL = 1.0  # s, queue depths
+
+    # event loop watchdog
+    WATCHDOG_INTERVAL = 0.05  # s, heartbeat of the loop
+    WATCHDOG_THRESHOLD = 0.25  # s, a longer stall is recorded with a stack sample
+    WATCHDOG_ALARM_LAG = 5.0  # s, a longer stall raises the safety alarm
+    # devices switched by the alarm, e.g. {"pin": 4, "type": "digital", "device": "alarm_light", "board": "main"}
+    WATCHDOG_ALARM_CONTROLS = ()
+
+    # reading filters per sensor id, sensors without an entry reach the controllers unfiltered
+    # reject: outlier threshold in standard deviations of the window, 0 is off | tolerance: deviation that is
+    # never rejected, in the sensor's unit | median: N | ema: alpha
+    SENSOR_FILTERS = MappingProxyType({
+        "dt": {"reject": 4.0, "tolerance": 1.0, "median": 3, "ema": 0.3},
+        "dh": {"reject": 4.0, "tolerance": 3.0, "median": 3},  # no EMA, its lag overshoots the humidifier
+        "sm": {"reject": 4.0, "tolerance": 20.0, "median": 5},  # raw ADC value
+        "ef": {},  # statistics only, the RPM threshold search needs the raw speed
+    })
+    FILTER_WINDOW = 32  # readings in the rolling statistics
+
+    # outbound commands
+    # queued commands per lane, 0 is unbounded
+    COMMAND_LANE_LIMITS = MappingProxyType({"safety": 0, "actuation": 256, "housekeeping": 64})
+    COMMAND_STARVATION_LIMIT = 16  # a lower lane is served after being passed over this many times
+
+    # growth phase schedule, disabled while PLANTED_AT is None
+    PLANTED_AT = None  # ISO date, e.g. "2025-04-01"
+    PHASE_SCHEDULE = MappingProxyType({})  # phase name -> duration in days, in growth order
+    PHASE_TRANSITION_DAYS = 2.0  # setpoints ramp towards the next phase over the last days of a phase
+    PHASE_SCHEDULE_STEP = 3600.0  # s, resolution of the precomputed setpoint table
+
+    # metrics sinks, fed from one queue: influxdb | file | prometheus
+    METRICS_SINKS = ("influxdb",)
+    METRICS_QUEUE_SIZE = 10_000  # readings waiting for the sinks, the oldest is dropped when full
+    METRICS_FILE_DIR = ".katomato/metrics"  # compressed column files of the file sink
+    METRICS_FILE_ROWS = 50_000  # readings per file
+    METRICS_FILE_INTERVAL = 300.0  # s, a file is written at least this often
+    METRICS_HTTP_HOST = "127.0.0.1"  # pull endpoint of the prometheus sink
+    METRICS_HTTP_PORT = 9464
 
     # influx db
     INFLUX_URL = "http://localhost:8086"
     INFLUX_TOKEN = "generate-your-token"
     INFLUX_ORG = "arduino"
     INFLUX_BUCKET = "sensor_data"
+    INFLUX_BATCH_SIZE = 500  # records per write request
+    INFLUX_FLUSH_INTERVAL = 1.0  # s
+    INFLUX_BUFFER_SIZE = 10_000  # records kept in memory while the server is slow
+    INFLUX_OVERFLOW_POLICY = "drop_oldest"  # drop_oldest | drop_newest | spill
+    METRICS_WINDOW = 60.0  # s, readings are exported as per-window min/max/mean/count, 0 exports every reading
+    METRICS_RAW = False  # export every reading as well
+    METRICS_MAX_SERIES = 256  # (board, sensor) series aggregated at the same time
+
+    # local spool for metrics while InfluxDB is unavailable
+    SPOOL_DIR = ".katomato/spool"
+    SPOOL_SEGMENT_BYTES = 4 * 1024 * 1024
+    SPOOL_MAX_BYTES = 256 * 1024 * 1024  # disk budget
+    SPOOL_COMPACTION = "drop_oldest"  # drop_oldest | drop_newest, applied when over the disk budget
+    SPOOL_FSYNC_BATCH = 1000  # records
+    SPOOL_FSYNC_INTERVAL = 1.0  # s
+    SPOOL_REPLAY_RATE = 1000.0  # records/s
+    SPOOL_REPLAY_RETRY_INTERVAL = 5.0  # s
 
     # active growth circle phase
     growth_phase: object = None
+    # snapshot of the phase and hardware parameters, rebuilt on every phase switch
+    params: Params = None
 
-    def get_growth_phases(self):
-        current_module = sys.modules[self.__class__.__module__]
-        type_hints = get_type_hints(self.__class__)
-        phase_union = type_hints.get("growth_phase")
+    def __post_init__(self):
+        if self.growth_phase is not None:
+            self.params = build_params(self.growth_phase, get_hardware_config())
 
-        if not phase_union:
-            return {}
+    def get_boards(self) -> dict[str, dict]:
+        if self.BOARDS is not None:
+            return self.BOARDS
+        return {"main": {"transport": "serial", "port": self.SERIAL_PORT, "baudrate": self.BAUD_RATE}}
 
-        valid_types = get_args(phase_union)
-        return {
-            cls.__name__: cls
-            for _, cls in inspect.getmembers(current_module, inspect.isclass)
-            if cls in valid_types
-        }
+    def get_growth_phases(self):
+        return _growth_phases(self.__class__)
 
     def switch_growth_phase(self, phase_cls):
-        self.growth_phase = phase_cls()
+        phase = phase_cls()
+        params = build_params(phase, get_hardware_config())
+        self.growth_phase, self.params = phase, params
+
+
+@cache
+def _growth_phases(config_cls) -> dict:
+    current_module = sys.modules[config_cls.__module__]
+    type_hints = get_type_hints(config_cls)
+    phase_union = type_hints.get("growth_phase")
+
+    if not phase_union:
+        return {}
+
+    valid_types = get_args(phase_union)
+    return {
+        cls.__name__: cls
+        for _, cls in inspect.getmembers(current_module, inspect.isclass)
+        if cls in valid_types
+    }
 
 
+@cache
 def get_hardware_config():
     return {
         cls.__name__: cls
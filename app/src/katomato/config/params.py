@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Params:
+    """Immutable snapshot of the active growth phase and hardware parameters.
+
+    Built once per phase switch with every derived value precomputed, controllers and devices read plain
+    attributes on the per-frame path. A switch replaces the whole snapshot with a single assignment, so a
+    reader never sees values from two different phases.
+    """
+
+    phase: str
+
+    TEMP_FLOOR: float
+    TEMP_CEIL: float
+    HUM_FLOOR: float
+    HUM_CEIL: float
+    SOIL_MOISTURE_FLOOR: float
+    SOIL_MOISTURE_CEIL: float
+    SOIL_PH_FLOOR: float
+    SOIL_PH_CEIL: float
+
+    temp_mid: float
+    temp_tolerance: float  # 15% of the permissible temperature range
+    hum_mid: float
+    hum_tolerance: float  # 20% of the permissible humidity range
+    soil_moisture_tolerance: float  # 20% of the permissible soil moisture range
+
+    exhaust_fan_speed_floor: float  # rpm
+    soil_moisture_one_percent: float  # raw sensor value of 1% moisture
+    water_pump_flow_rate: float  # l/s
+    pot_volume: float  # l
+
+
+SETPOINTS = (
+    "TEMP_FLOOR", "TEMP_CEIL", "HUM_FLOOR", "HUM_CEIL",
+    "SOIL_MOISTURE_FLOOR", "SOIL_MOISTURE_CEIL", "SOIL_PH_FLOOR", "SOIL_PH_CEIL",
+)
+
+
+def build_params(phase, hardware: dict) -> Params:
+    return _params(
+        type(phase).__name__,
+        {name: getattr(phase, name) for name in SETPOINTS},
+        exhaust_fan_speed_floor=hardware["ExhaustFan"].FAN_SPEED_FLOOR,
+        soil_moisture_one_percent=hardware["SoilMoistureSensor"].UPPER_VALUE / 100,
+        water_pump_flow_rate=hardware["WaterPump"].FLOW_RATE,
+        pot_volume=hardware["WaterPump"].POT_VOLUME,
+    )
+
+
+def interpolate(start: Params, end: Params, t: float) -> Params:
+    """Setpoints `t` of the way from `start` to `end`, 0 <= t <= 1."""
+    setpoints = {name: getattr(start, name) + (getattr(end, name) - getattr(start, name)) * t for name in SETPOINTS}
+    return _params(
+        f"{start.phase}->{end.phase}",
+        setpoints,
+        exhaust_fan_speed_floor=end.exhaust_fan_speed_floor,
+        soil_moisture_one_percent=end.soil_moisture_one_percent,
+        water_pump_flow_rate=end.water_pump_flow_rate,
+        pot_volume=end.pot_volume,
+    )
+
+
+def _params(phase: str, setpoints: dict, **hardware) -> Params:
+    temp_range = setpoints["TEMP_CEIL"] - setpoints["TEMP_FLOOR"]
+    hum_range = setpoints["HUM_CEIL"] - setpoints["HUM_FLOOR"]
+    soil_moisture_range = setpoints["SOIL_MOISTURE_CEIL"] - setpoints["SOIL_MOISTURE_FLOOR"]
+    return Params(
+        phase=phase,
+        **setpoints,
+        temp_mid=setpoints["TEMP_FLOOR"] + temp_range / 2,
+        temp_tolerance=temp_range / 100 * 15,
+        hum_mid=setpoints["HUM_FLOOR"] + hum_range / 2,
+        hum_tolerance=hum_range / 100 * 20,
+        soil_moisture_tolerance=soil_moisture_range / 100 * 20,
+        **hardware,
+    )
@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Union
 
 from katomato.config.base import BaseConfig
@@ -84,4 +85,8 @@ GrowCircleConfigType = Union[Germination, Seedling, Vegetative, Flowering, LateG
 
 @dataclass
 class Zucchini(BaseConfig):
+    PHASE_SCHEDULE = MappingProxyType(
+        {"Germination": 7, "Seedling": 14, "Vegetative": 21, "Flowering": 30, "LateGrowth": 30}
+    )
+
     growth_phase: GrowCircleConfigType = field(default_factory=Germination)
@@ -1,6 +1,13 @@
 import importlib
 import pkgutil
+from functools import partial
+
+from katomato.core.registry import CONTROLLER_REGISTRY
+from katomato.core.rules import RuleController, rule_table
 
 def load_all_processors():
     for _, modname, _ in pkgutil.iter_modules(__path__):
         importlib.import_module(f"{__name__}.{modname}")
+    # Sensors with rules but no controller class of their own
+    for sensor, rule_set in rule_table.items():
+        CONTROLLER_REGISTRY.setdefault(sensor, partial(RuleController, rule_set))
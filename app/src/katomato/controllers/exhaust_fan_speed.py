@@ -1,7 +1,7 @@
 import logging
 from asyncio import Queue
 
-from katomato.core.registry import DEVICE_REGISTRY, controller_registry
+from katomato.core.registry import controller_registry, get_device
 from katomato.core.sensor_data import SensorData, State
 
 log = logging.getLogger(__name__)
@@ -13,7 +13,7 @@ class ExhaustFanSpeedController:
         try:
             val = sensor_data.value
             ctrl = sensor_data.controls[0]
-            device = DEVICE_REGISTRY.get(ctrl.device)
+            device = get_device(ctrl)
             await device(State(val), ctrl, command_queue)
             log.debug(f"ExhaustFanSpeedController: {sensor_data}")
         except Exception as e:
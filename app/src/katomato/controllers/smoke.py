@@ -1,20 +1,9 @@
-import logging
-from asyncio import Queue
-
-from katomato.core.registry import controller_registry, DEVICE_REGISTRY, Action
-from katomato.core.sensor_data import SensorData
-
-log = logging.getLogger(__name__)
+from katomato.core.registry import controller_registry
+from katomato.core.rules import RuleController
 
 
 @controller_registry("smoke")
-class SmokeDetectionController:
-    async def __call__(self, sensor_data: SensorData, command_queue: Queue) -> None:
-        try:
-            ctrls = sensor_data.controls
-            for ctrl in ctrls:
-                device = DEVICE_REGISTRY.get(ctrl.device)
-                await device(Action.DOWN, ctrl, command_queue)
-            log.debug(f"SmokeDetectionController: {sensor_data}")
-        except Exception as e:
-            log.exception(f"Error: {e}")
+class SmokeDetectionController(RuleController):
+    """The "smoke" rules of CONTROL_RULES: every reading switches the alarm devices."""
+
+    sensor = "smoke"
@@ -1,60 +1,108 @@
 import asyncio
 import logging
-import time
 
 from asyncio import Queue
+from dataclasses import dataclass
 
 from katomato.config import config
-from katomato.config.base import get_hardware_config
-from katomato.core.registry import controller_registry, DEVICE_REGISTRY, Action
-from katomato.core.sensor_data import SensorData
+from katomato.core.clock import get_clock
+from katomato.core.registry import controller_registry, get_device, Action
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.state_journal import controller_key, journal, monotonic_at
+from katomato.core.timer_wheel import TimerEntry, timers
 
 log = logging.getLogger(__name__)
 
 
+@dataclass
+class PumpRun:
+    ctrl: Control
+    command_queue: Queue
+    started: float
+    planned_stop: float
+    target: float  # %, the run is stopped early once a reading reaches it
+    timer: TimerEntry | None = None
+
+
 @controller_registry("sm")
 class SoilMoistureController:
-    def __init__(self):
-        self.last_decision_time = time.monotonic()
+    def __init__(self, clock=None, timer_wheel=None):
+        self.clock = clock or get_clock()
+        self.timers = timer_wheel if timer_wheel is not None else timers
+        self.last_decision_time = self.clock.monotonic()
+        self.runs: dict[tuple, PumpRun] = {}  # (board, pin) -> running pump
         self._lock = asyncio.Lock()
 
     async def __call__(self, sensor_data: SensorData, command_queue: Queue) -> None:
         try:
             async with self._lock:
+                params = config.params
+                val = sensor_data.value / params.soil_moisture_one_percent
+                ctrls = sensor_data.controls
+
+                for ctrl in ctrls:
+                    run = self.runs.get((ctrl.board, ctrl.pin))
+                    if run and val >= run.target:
+                        log.info(f"Soil moisture {val:.1f}% reached the target, pump stopped early: {ctrl}")
+                        await self._stop(run)
+
                 # Preventing frequent switching of the device operating modes. A physical model is adopted in which
                 # the soil moisture does not change abruptly
-                if time.monotonic() - self.last_decision_time < self.decision_interval:
+                if self.clock.monotonic() - self.last_decision_time < self.decision_interval:
                     return
 
-                val = sensor_data.value / self.one_percent
-                ctrls = sensor_data.controls
-
                 for ctrl in ctrls:
-                    device = DEVICE_REGISTRY.get(ctrl.device)
-                    if val <= config.growth_phase.SOIL_MOISTURE_FLOOR + self.soil_moisture_tolerance:
+                    if (ctrl.board, ctrl.pin) in self.runs:
+                        continue
+                    device = get_device(ctrl)
+                    if val <= params.SOIL_MOISTURE_FLOOR + params.soil_moisture_tolerance:
                         duration = None
                         if hasattr(device, "estimate_runtime"):
-                            duration = await device.estimate_runtime(sensor_data)
+                            # The sensor reports the raw ADC value, the estimate works in %
+                            duration = await device.estimate_runtime(sensor_data._replace(value=val))
 
                         await device(Action.UP, ctrl, command_queue)
 
                         if duration:
-                            await asyncio.sleep(duration)
-                            await device(Action.DOWN, ctrl, command_queue)
+                            self._start(ctrl, command_queue, duration, params.SOIL_MOISTURE_CEIL)
+                    elif val >= params.SOIL_MOISTURE_CEIL:
+                        # Wet enough, e.g. a pump left running by a restart. No command if it is already off
+                        await device(Action.DOWN, ctrl, command_queue)
 
-                self.last_decision_time = time.monotonic()
+                self.last_decision_time = self.clock.monotonic()
+                journal.record(controller_key(sensor_data), {"at": self.clock.time()})
                 log.debug(f"SoilMoistureController: {sensor_data}")
         except Exception as e:
             log.exception(f"Error: {e}")
 
+    def restore(self, entry: dict) -> None:
+        # Pump runs are not restored, see WaterPump.restore
+        self.last_decision_time = monotonic_at(self.clock, entry["at"])
+
+    def _start(self, ctrl: Control, command_queue: Queue, duration: float, target: float) -> None:
+        now = self.clock.monotonic()
+        run = PumpRun(ctrl, command_queue, now, now + duration, target)
+        run.timer = self.timers.schedule(duration, lambda: self._planned_stop(run))
+        self.runs[(ctrl.board, ctrl.pin)] = run
+
+    async def _planned_stop(self, run: PumpRun) -> None:
+        async with self._lock:
+            if self.runs.get((run.ctrl.board, run.ctrl.pin)) is run:
+                await self._stop(run)
+
+    async def _stop(self, run: PumpRun) -> None:
+        run.timer.cancel()
+        del self.runs[(run.ctrl.board, run.ctrl.pin)]
+        device = get_device(run.ctrl)
+        await device(Action.DOWN, run.ctrl, run.command_queue)
+
     @property
     def one_percent(self):
-        return get_hardware_config().get("SoilMoistureSensor").UPPER_VALUE / 100
+        return config.params.soil_moisture_one_percent
 
     @property
     def soil_moisture_tolerance(self):
-        # 20% of the permissible soil moisture range
-        return (config.growth_phase.SOIL_MOISTURE_CEIL - config.growth_phase.SOIL_MOISTURE_FLOOR) / 100 * 20
+        return config.params.soil_moisture_tolerance
 
     @property
     def decision_interval(self):
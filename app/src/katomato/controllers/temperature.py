@@ -1,55 +1,59 @@
-import asyncio
 import logging
-import time
-
 from asyncio import Queue
 
 from katomato.config import config
-from katomato.core.registry import controller_registry, DEVICE_REGISTRY, Action
-from katomato.core.sensor_data import SensorData
+from katomato.core.pid import PID
+from katomato.core.registry import controller_registry, get_device
+from katomato.core.rules import RuleController
+from katomato.core.sensor_data import Duty, SensorData
 
 log = logging.getLogger(__name__)
 
 
 @controller_registry("dt")
-class TemperatureController:
-    def __init__(self):
-        self.last_decision_time = time.monotonic()
-        self._lock = asyncio.Lock()
+class TemperatureController(RuleController):
+    """The "dt" rules of CONTROL_RULES: devices are switched to keep the average temperature.
 
-    async def __call__(self, sensor_data: SensorData, command_queue: Queue) -> None:
-        try:
-            async with self._lock:
-                # Preventing frequent switching of the device operating modes. A physical model is adopted in which
-                # the temperature does not change abruptly
-                if time.monotonic() - self.last_decision_time < self.decision_interval:
-                    return
-
-                current_temperature = sensor_data.value
-                ctrls = sensor_data.controls
-
-                for ctrl in ctrls:
-                    # Finding the optimal operation of devices to maintain the average temperature
-                    device = DEVICE_REGISTRY.get(ctrl.device)
-                    if current_temperature > self.temp_mid + self.temp_tolerance:
-                        await device(Action.DOWN, ctrl, command_queue)
-                    elif current_temperature < self.temp_mid - self.temp_tolerance:
-                        await device(Action.UP, ctrl, command_queue)
-                self.last_decision_time = time.monotonic()
-                log.debug(f"TemperatureController: {sensor_data}")
-
-        except Exception as e:
-            log.exception(f"Error: {e}")
+    A physical model is adopted in which the temperature does not change abruptly, decisions are taken
+    at most every RULE_INTERVALS["dt"] seconds. With EXHAUST_FAN_MODE "pid" continuous devices such as the
+    exhaust fan are left out of the rules and get a duty from a PID on every reading instead.
+    """
 
-    @property
-    def decision_interval(self):
-        return 60
+    sensor = "dt"
+
+    def __init__(self, rule_set=None, clock=None):
+        super().__init__(rule_set, clock)
+        self.mode = config.EXHAUST_FAN_MODE
+        self.pids: dict[tuple, PID] = {}  # (board, pin) -> PID of a continuous device
+
+    async def __call__(self, sensor_data: SensorData, command_queue: Queue) -> None:
+        if self.mode == "pid":
+            stepped = []
+            for ctrl in sensor_data.controls:
+                device = get_device(ctrl)
+                if not getattr(device, "continuous", False):
+                    stepped.append(ctrl)
+                    continue
+                try:
+                    await device(Duty(self._regulate(ctrl, sensor_data.value)), ctrl, command_queue)
+                except Exception as e:
+                    log.exception(f"Error: {e}")
+            if not stepped:
+                return
+            if len(stepped) < len(sensor_data.controls):
+                sensor_data = sensor_data._replace(controls=tuple(stepped))
+        await super().__call__(sensor_data, command_queue)
+
+    def _regulate(self, ctrl, temperature: float) -> float:
+        pid = self.pids.get((ctrl.board, ctrl.pin))
+        if pid is None:
+            pid = self.pids[ctrl.board, ctrl.pin] = PID(**config.EXHAUST_FAN_PID)
+        return pid.update(self.temp_mid, temperature, self.clock.monotonic())
 
     @property
     def temp_mid(self):
-        return config.growth_phase.TEMP_FLOOR + (config.growth_phase.TEMP_CEIL - config.growth_phase.TEMP_FLOOR) / 2
+        return config.params.temp_mid
 
     @property
     def temp_tolerance(self):
-        # 15% of the permissible temperature range
-        return (config.growth_phase.TEMP_CEIL - config.growth_phase.TEMP_FLOOR) / 100 * 15
+        return config.params.temp_tolerance
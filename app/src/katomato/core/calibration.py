@@ -0,0 +1,56 @@
+import asyncio
+import json
+import logging
+import os
+
+from katomato.config import config
+
+log = logging.getLogger(__name__)
+
+
+class CalibrationStore:
+    """Device calibration results by key, kept in a small JSON file across restarts.
+
+    The file is read on first use and rewritten atomically on every change in a worker thread, calibrations
+    change rarely.
+    Without a `path` the store lives in memory only. A missing or unreadable file is an empty store, the
+    devices calibrate again.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.entries: dict[str, dict] | None = None  # loaded on first use
+        self._write_lock = asyncio.Lock()  # one writer of the temporary file at a time
+
+    def get(self, key: str) -> dict | None:
+        return self._load().get(key)
+
+    async def put(self, key: str, entry: dict) -> None:
+        self._load()[key] = entry
+        if self.path is None:
+            return
+        async with self._write_lock:
+            await asyncio.to_thread(self._write, key, dict(self.entries))
+
+    def _write(self, key: str, entries: dict[str, dict]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(entries, f, indent=1, sort_keys=True)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            log.exception(f"Calibration write failed, {key} will be calibrated again after a restart: {e}")
+
+    def _load(self) -> dict[str, dict]:
+        if self.entries is None:
+            self.entries = {}
+            if self.path is not None and os.path.exists(self.path):
+                try:
+                    with open(self.path) as f:
+                        self.entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    log.warning(f"Calibration file {self.path} unreadable, devices calibrate again: {e}")
+        return self.entries
+
+
+calibrations = CalibrationStore(config.CALIBRATION_FILE)
@@ -1,25 +1,38 @@
 import asyncio
 import json
 import logging
-from asyncio import Queue
 
+from katomato.core.command_queue import Lane, PriorityCommandQueue
 from katomato.core.dispatcher import controller_dispatcher
+from katomato.core.instrumentation import probes
 from katomato.core.utils.command_util import build_arduino_command, get_sensor_data
+from katomato.core.watchdog import watchdog
 
 log = logging.getLogger(__name__)
 
 
-async def handle_cli(command_queue: Queue) -> None:
+async def handle_cli(command_queue: PriorityCommandQueue) -> None:
     while True:
         raw_input = await asyncio.to_thread(input, ">>> ")  # Example: digital 4 1
 
         # Setting growth phases
         if raw_input.startswith("phase"):
             _, mode_name = raw_input.strip().split(maxsplit=1)
-            await command_queue.put(json.dumps({"command": "phase", "name": mode_name}))
+            await command_queue.put(json.dumps({"command": "phase", "name": mode_name}), Lane.HOUSEKEEPING)
+            continue
+        # Latency histograms: stats | stats reset
+        elif raw_input.startswith("stats"):
+            if raw_input.strip() == "stats reset":
+                probes.reset()
+            else:
+                log.info(f"Pipeline latency:\n{probes.dump()}")
+            continue
+        # Event loop stalls with their stack samples
+        elif raw_input.strip() == "stalls":
+            log.info(f"Event loop stalls:\n{watchdog.dump()}")
             continue
         elif raw_input.strip() == "exit":
-            await command_queue.put(json.dumps({"command": "exit"}))
+            await command_queue.put(json.dumps({"command": "exit"}), Lane.HOUSEKEEPING)
             return
         # Sensor simulation
         # example:
@@ -42,7 +55,7 @@ async def handle_cli(command_queue: Queue) -> None:
             value = float(parts[2]) if "." in parts[2] else int(parts[2])
 
             command_json = build_arduino_command(command_type, pin, value)
-            await command_queue.put(command_json)
+            await command_queue.put(command_json, Lane.HOUSEKEEPING)
 
         except Exception as e:
             log.exception(f"Error parsing command: {e}")
@@ -0,0 +1,86 @@
+import asyncio
+import selectors
+import time
+from collections.abc import Callable
+
+
+class RealClock:
+    """Time of the running event loop.
+
+    Follows the virtual time of a VirtualClockLoop as well, so simulations and tests need no clock of their
+    own.
+    """
+
+    def monotonic(self) -> float:
+        try:
+            return asyncio.get_running_loop().time()
+        except RuntimeError:
+            return time.monotonic()
+
+    def time(self) -> float:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return time.time()
+        if isinstance(loop, VirtualClockLoop):
+            return loop.epoch + loop.time()
+        return time.time()
+
+    async def sleep(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+
+    def call_later(self, delay: float, callback: Callable, *args) -> asyncio.TimerHandle:
+        return asyncio.get_running_loop().call_later(delay, callback, *args)
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Never waits for a timer: the loop's clock jumps to the deadline and the selector is only polled."""
+
+    def __init__(self):
+        super().__init__()
+        self.clock = None
+
+    def select(self, timeout=None):
+        if timeout is None:
+            # Nothing is scheduled, only another thread can wake the loop up
+            return super().select(None)
+        if timeout > 0:
+            self.clock.advance(timeout)
+        return super().select(0)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop on a virtual clock that skips the idle time between timers.
+
+    `loop.time()`, `asyncio.sleep` and `call_later` follow the virtual clock, so a sleep of a day returns as
+    soon as everything scheduled before it has run. Callbacks run in the same order as on a real loop, a run
+    is deterministic as long as nothing waits on real I/O or threads. Thousands of throttled decisions or
+    pump runs take as long as the code they execute.
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float | None = None):
+        selector = _VirtualSelector()
+        super().__init__(selector)
+        selector.clock = self
+        self.epoch = time.time() if epoch is None else epoch  # UNIX time of time() == 0
+        self._now = start
+
+    def time(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        self._now += seconds
+
+
+_clock = RealClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock) -> object:
+    """Sets the clock of controllers and devices created from now on, returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import OrderedDict
+from enum import IntEnum
+
+from katomato.core.instrumentation import probes
+
+log = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Priority of an outbound command, lower values are sent first."""
+
+    SAFETY = 0  # alarm light, power cut
+    ACTUATION = 1  # routine device control
+    HOUSEKEEPING = 2  # CLI, phase switches
+
+
+class PriorityCommandQueue:
+    """Outbound command queue with one FIFO lane per priority.
+
+    A drop-in for the asyncio.Queue consumed by `command_dispatcher`: `put` takes an optional lane and
+    `get` returns the oldest command of the most urgent non-empty lane. A command to a pin that already
+    has a command waiting in the same lane replaces it in place, the queued value is stale by then, and
+    drops the commands to that pin waiting in less urgent lanes, which would otherwise be sent after it.
+    A lane that was passed over `starvation_limit` times in a row while non-empty is served next, unless
+    a safety command is waiting.
+    """
+
+    def __init__(self, limits: dict[Lane, int] | None = None, starvation_limit: int = 16):
+        self.limits = {lane: 0 for lane in Lane} | (limits or {})  # 0 is unbounded
+        self.starvation_limit = starvation_limit
+        self.collapsed = 0
+
+        self._lanes = {lane: OrderedDict() for lane in Lane}
+        self._passed_over = {lane: 0 for lane in Lane}
+        self._size = 0
+        self._unique_keys = itertools.count()
+        self._not_empty = asyncio.Event()
+        self._not_full = {lane: asyncio.Event() for lane in Lane}
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def depth(self, lane: Lane) -> int:
+        return len(self._lanes[lane])
+
+    def full(self, lane: Lane = Lane.ACTUATION) -> bool:
+        return 0 < self.limits[lane] <= len(self._lanes[lane])
+
+    async def put(self, command: str, lane: Lane = Lane.ACTUATION) -> None:
+        key = self._key(command)
+        while key not in self._lanes[lane] and self.full(lane):
+            self._not_full[lane].clear()
+            await self._not_full[lane].wait()
+        self._put(key, command, lane)
+
+    def put_nowait(self, command: str, lane: Lane = Lane.ACTUATION) -> None:
+        key = self._key(command)
+        if key not in self._lanes[lane] and self.full(lane):
+            raise asyncio.QueueFull
+        self._put(key, command, lane)
+
+    async def get(self) -> str:
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> str:
+        if not self._size:
+            raise asyncio.QueueEmpty
+
+        waiting = [lane for lane in Lane if self._lanes[lane]]
+        lane = waiting[0]
+        if lane != Lane.SAFETY:
+            lane = next((lane for lane in waiting if self._passed_over[lane] >= self.starvation_limit), lane)
+        for other in waiting:
+            self._passed_over[other] = 0 if other == lane else self._passed_over[other] + 1
+
+        _, (command, queued) = self._lanes[lane].popitem(last=False)
+        probes.since("queue", lane.name.lower(), queued)
+        self._size -= 1
+        self._not_full[lane].set()
+        return command
+
+    def _put(self, key, command: str, lane: Lane) -> None:
+        queue = self._lanes[lane]
+        if key in queue:
+            log.debug(f"Superseded queued command: {queue[key][0]}")
+            self.collapsed += 1
+        else:
+            self._size += 1
+        queue[key] = command, time.perf_counter_ns()  # a superseding command waits from its own put
+        for other in Lane:
+            if other > lane and key in self._lanes[other]:
+                # e.g. a fan speed still queued would undo the power cut sent before it
+                log.debug(f"Superseded queued {other.name.lower()} command: {self._lanes[other].pop(key)[0]}")
+                self.collapsed += 1
+                self._size -= 1
+                self._not_full[other].set()
+        self._not_empty.set()
+
+    def _key(self, command: str):
+        # Commands to the same pin supersede each other, anything else is queued as is
+        try:
+            data = json.loads(command)
+            return data.get("board"), data["command"], data["pin"]
+        except (ValueError, TypeError, KeyError):
+            return next(self._unique_keys)
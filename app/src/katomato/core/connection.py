@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import random
+from asyncio import Queue
+
+from katomato.core.serial import ArduinoProtocol
+from katomato.core.transport import open_transport
+
+log = logging.getLogger(__name__)
+
+
+class BoardConnection:
+    """Stable handle of one board.
+
+    The same ArduinoProtocol is reused for every connection attempt, so anything holding the handle or the
+    protocol keeps working across reconnects. A lost connection is retried with exponential backoff.
+    """
+
+    def __init__(self, board: str, options: dict, command_queue: Queue, backoff_initial: float = 1.0,
+                 backoff_max: float = 60.0):
+        self.board = board
+        self.options = options
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.protocol = ArduinoProtocol(command_queue, on_connection_lost=self._connection_lost, board=board)
+        self.connected = asyncio.Event()
+        self.reconnects = 0
+
+        self._delay = backoff_initial
+        self._task = None
+        self._closing = False
+
+    def start(self) -> None:
+        if self._task is None and not self._closing:
+            self._task = asyncio.create_task(self._connect())
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while not self._closing:
+                try:
+                    await open_transport(loop, lambda: self.protocol, **self.options)
+                except (TimeoutError, OSError) as e:
+                    # Jitter keeps boards behind the same USB hub or bridge from retrying in lockstep
+                    delay = self._delay * random.uniform(0.8, 1.2)
+                    log.warning(f"Board {self.board} unavailable ({e}), retrying in {delay:.1f} s")
+                    await asyncio.sleep(delay)
+                    self._delay = min(self._delay * 2, self.backoff_max)
+                    continue
+                self._delay = self.backoff_initial
+                self.connected.set()
+                log.info(f"Board {self.board} connected")
+                return
+        finally:
+            self._task = None
+
+    async def _connection_lost(self) -> None:
+        self.connected.clear()
+        if not self._closing:
+            self.reconnects += 1
+            self.start()
+
+    async def send_command(self, command: str) -> None:
+        await self.protocol.send_command(command)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.protocol.transport:
+            self.protocol.transport.close()
+            log.info(f"Board {self.board} connection closed")
+
+
+class ConnectionManager:
+    """Owns the connections to all boards on the running event loop and routes commands by board id."""
+
+    def __init__(self, boards: dict[str, dict], command_queue: Queue, backoff_initial: float = 1.0,
+                 backoff_max: float = 60.0):
+        if not boards:
+            raise ValueError("At least one board must be configured")
+        self.connections = {
+            board: BoardConnection(board, options, command_queue, backoff_initial, backoff_max)
+            for board, options in boards.items()
+        }
+        self.default_board = next(iter(boards))
+
+    def __getitem__(self, board: str) -> BoardConnection:
+        return self.connections[board]
+
+    def start(self) -> None:
+        """Connects all boards in the background, an unavailable board doesn't hold up the others."""
+        for connection in self.connections.values():
+            connection.start()
+
+    async def wait_connected(self, timeout: float | None = None) -> None:
+        await asyncio.wait_for(
+            asyncio.gather(*(connection.connected.wait() for connection in self.connections.values())), timeout
+        )
+
+    async def send_command(self, command: str, board: str | None = None) -> None:
+        connection = self.connections.get(board or self.default_board)
+        if connection is None:
+            log.warning(f"Command for unknown board {board} ignored: {command}")
+            return
+        await connection.send_command(command)
+
+    async def close(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self.connections.values()))
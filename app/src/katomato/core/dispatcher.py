@@ -1,19 +1,23 @@
-import asyncio
 import json
 import logging
+import time
 from asyncio import Queue
 
 from katomato.config import config
-from katomato.core.metrics.influxdb_publisher import influx_ingestion
-from katomato.core.registry import CONTROLLER_REGISTRY
+from katomato.core.filters import filters
+from katomato.core.instrumentation import probes
+from katomato.core.metrics.fanout import metrics_ingestion
+from katomato.core.registry import get_controller
+from katomato.core.scheduler import scheduler
 from katomato.core.sensor_data import SensorData
+from katomato.core.state_journal import MANUAL_PHASE, journal
 
 log = logging.getLogger(__name__)
 
 
 async def command_dispatcher(
         command_queue,
-        arduino_protocol,
+        connections,
         shutdown_handler,
 ) -> None:
     while True:
@@ -30,6 +34,7 @@ async def command_dispatcher(
             phase_cls = config.get_growth_phases().get(phase_name)
             if phase_cls:
                 config.switch_growth_phase(phase_cls)
+                journal.record(MANUAL_PHASE, {"name": phase_name})
                 log.info(f"Switched to phase: {phase_name}")
             else:
                 log.warning(f"Unknown phase: {phase_name}")
@@ -39,17 +44,27 @@ async def command_dispatcher(
             return
 
         """Commands to Arduino."""
-        log.info(f"Executing command: {cmd_str}")
-        await arduino_protocol.send_command(
-            cmd_str
-        )  # Send the command to Arduino via serial
+        board = cmd.pop("board", None)
+        if board is not None:
+            cmd_str = json.dumps(cmd)
+        log.debug(f"Executing command: {cmd_str}")
+        start = time.perf_counter_ns()
+        await connections.send_command(
+            cmd_str, board
+        )  # Send the command to the board it is addressed to
+        probes.since("send", board, start)
 
 
-@influx_ingestion
+@metrics_ingestion
 def controller_dispatcher(sensor_data: SensorData, command_queue: Queue) -> None:
     sensor_name = sensor_data.sensor
-    controller = CONTROLLER_REGISTRY.get(sensor_name)
+    controller = get_controller(sensor_data)
     if controller:
-        asyncio.create_task(controller(sensor_data, command_queue))
+        start = time.perf_counter_ns()
+        sensor_data = filters.apply(sensor_data)
+        if sensor_data is None:
+            return  # outlier or a failed read
+        scheduler.submit(sensor_name, controller, sensor_data, command_queue)
+        probes.since("dispatch", sensor_name, start)
     else:
         log.warning(f"No controller found for: {sensor_name}")
@@ -0,0 +1,211 @@
+import bisect
+import logging
+import math
+from collections import deque
+from collections.abc import Mapping
+from typing import NamedTuple
+
+from katomato.config import config
+from katomato.core.sensor_data import SensorData
+
+log = logging.getLogger(__name__)
+
+
+class RollingStats:
+    """Min, max, mean and variance over the last `size` values, O(1) per update.
+
+    Values live in a fixed-size ring buffer, running sums give the mean and variance and monotonic deques
+    of ring positions give the min and max.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0  # values seen, the window holds min(count, size)
+        self._ring = [0.0] * size
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._min = deque()  # positions of increasing values
+        self._max = deque()  # positions of decreasing values
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    def update(self, value: float) -> None:
+        pos = self.count
+        if pos >= self.size:
+            old = self._ring[pos % self.size]
+            self._sum -= old
+            self._sum_sq -= old * old
+        self._ring[pos % self.size] = value
+        self._sum += value
+        self._sum_sq += value * value
+        self.count += 1
+        if self.count % (self.size * 1024) == 0:
+            # drop the rounding error the running sums pick up over a long grow
+            self._sum = sum(self._ring)
+            self._sum_sq = sum(v * v for v in self._ring)
+
+        ring, size, oldest = self._ring, self.size, self.count - self.size
+        while self._min and ring[self._min[-1] % size] >= value:
+            self._min.pop()
+        while self._max and ring[self._max[-1] % size] <= value:
+            self._max.pop()
+        self._min.append(pos)
+        self._max.append(pos)
+        # one position leaves the window per update
+        if self._min[0] < oldest:
+            self._min.popleft()
+        if self._max[0] < oldest:
+            self._max.popleft()
+
+    @property
+    def min(self) -> float:
+        return self._ring[self._min[0] % self.size]
+
+    @property
+    def max(self) -> float:
+        return self._ring[self._max[0] % self.size]
+
+    @property
+    def mean(self) -> float:
+        return self._sum / len(self)
+
+    @property
+    def variance(self) -> float:
+        n = len(self)
+        return max(0.0, (self._sum_sq - self._sum * self._sum / n) / n)
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class Median:
+    """Median of the last `size` values, a sorted copy of the ring buffer is updated in O(size)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._ring = deque(maxlen=size)
+        self._sorted = []
+
+    def update(self, value: float) -> float:
+        if len(self._ring) == self.size:
+            del self._sorted[bisect.bisect_left(self._sorted, self._ring[0])]
+        self._ring.append(value)
+        bisect.insort(self._sorted, value)
+        n = len(self._sorted)
+        return self._sorted[n // 2] if n % 2 else (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+
+
+class Ema:
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value: float) -> float:
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class FilterState(NamedTuple):
+    raw: float
+    filtered: float | None  # None when the reading was rejected as an outlier
+    min: float
+    max: float
+    mean: float
+    stddev: float
+    rejected: int
+
+
+class SensorFilter:
+    """Filter chain of one sensor: outlier rejection, then median-of-N, then EMA, each optional.
+
+    A reading further than `reject` standard deviations, and more than `tolerance`, from the rolling mean is
+    dropped once the window is full. `tolerance` keeps a steady sensor from rejecting its next small change.
+    A level shift is accepted after `max_rejects` consecutive rejections. The rolling statistics are taken
+    over the accepted readings.
+    """
+
+    def __init__(self, window: int = 32, reject: float = 0.0, tolerance: float = 0.0, max_rejects: int = 3,
+                 median: int = 0, ema: float = 0.0):
+        self.reject = reject
+        self.tolerance = tolerance
+        self.max_rejects = max_rejects
+        self.stats = RollingStats(window)
+        self.median = Median(median) if median > 1 else None
+        self.ema = Ema(ema) if 0 < ema < 1 else None
+        self.rejected = 0
+        self.state = None
+
+        self._consecutive_rejects = 0
+
+    def update(self, value: float) -> float | None:
+        stats = self.stats
+        if (
+                self.reject
+                and len(stats) == stats.size
+                and self._consecutive_rejects < self.max_rejects
+                and abs(value - stats.mean) > max(self.reject * stats.stddev, self.tolerance)
+        ):
+            self._consecutive_rejects += 1
+            self.rejected += 1
+            self.state = FilterState(value, None, stats.min, stats.max, stats.mean, stats.stddev, self.rejected)
+            return None
+
+        self._consecutive_rejects = 0
+        stats.update(value)
+        filtered = value
+        if self.median:
+            filtered = self.median.update(filtered)
+        if self.ema:
+            filtered = self.ema.update(filtered)
+        self.state = FilterState(value, filtered, stats.min, stats.max, stats.mean, stats.stddev, self.rejected)
+        return filtered
+
+
+class FilterStage:
+    """Per-sensor filters between the decoded readings and the controllers, one per board, zone and sensor.
+
+    `settings` maps a sensor id to the SensorFilter options, sensors without settings pass unchanged.
+    """
+
+    def __init__(self, settings: Mapping[str, dict], window: int = 32):
+        self.settings = settings
+        self.window = window
+        self._filters: dict[tuple, SensorFilter | None] = {}
+
+    def apply(self, sensor_data: SensorData) -> SensorData | None:
+        """The reading with its filtered value, None if it was rejected or is a failed read."""
+        value = sensor_data.value
+        if value is None or (isinstance(value, float) and not math.isfinite(value)):
+            # A failed read, null or NaN. The controllers compare numbers, and a NaN would stay in a filter's
+            # window and EMA for good. Sensors without filter settings are no exception
+            log.debug(f"Failed read dropped: {sensor_data}")
+            return None
+        key = sensor_data.board, sensor_data.zone, sensor_data.sensor
+        sensor_filter = self._filters.get(key)
+        if sensor_filter is None:
+            if key in self._filters or sensor_data.sensor not in self.settings:
+                self._filters[key] = None
+                return sensor_data
+            options = {"window": self.window} | self.settings[sensor_data.sensor]
+            sensor_filter = self._filters[key] = SensorFilter(**options)
+
+        if not isinstance(value, (int, float)):
+            return sensor_data
+        filtered = sensor_filter.update(float(value))
+        if filtered is None:
+            log.debug(f"Outlier rejected: {sensor_data}")
+            return None
+        return sensor_data._replace(value=filtered)
+
+    def reset(self) -> None:
+        self._filters.clear()
+
+    def state(self, sensor_data: SensorData) -> FilterState | None:
+        """State after the sensor's latest reading."""
+        sensor_filter = self._filters.get((sensor_data.board, sensor_data.zone, sensor_data.sensor))
+        return sensor_filter.state if sensor_filter else None
+
+
+filters = FilterStage(config.SENSOR_FILTERS, window=config.FILTER_WINDOW)
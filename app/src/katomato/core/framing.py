@@ -0,0 +1,70 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+DELIMITER = b"\n"
+
+
+class LineFramer:
+    """Incremental line framer over a single bytearray.
+
+    Each `feed` scans only the newly received bytes for the delimiter, so a line arriving in many small
+    chunks costs O(n) in total, and complete lines are cut out with a single split. Lines longer than
+    `max_line_length` are discarded up to the next delimiter, which keeps memory bounded on a garbage stream.
+    """
+
+    def __init__(self, max_line_length: int = 1024):
+        self.max_line_length = max_line_length
+        self.overflows = 0
+
+        self._buffer = bytearray()
+        self._discarding = False  # inside the tail of an oversized line
+
+    @property
+    def pending(self) -> bytes:
+        return bytes(self._buffer)
+
+    def feed(self, data: bytes) -> list[bytes]:
+        buffer = self._buffer
+        # Only the new bytes are scanned, the buffered partial line is known not to contain a delimiter
+        last = data.rfind(DELIMITER)
+        if last == -1:
+            buffer += data
+            if len(buffer) > self.max_line_length:
+                self._discard()
+            return []
+
+        end = len(buffer) + last
+        buffer += data
+        # A single copy of the complete lines, the view is released before the buffer is resized
+        view = memoryview(buffer)
+        lines = view[:end].tobytes().split(DELIMITER)
+        view.release()
+        del buffer[:end + 1]
+
+        if self._discarding:
+            del lines[0]
+            self._discarding = False
+        if lines and end > self.max_line_length and max(map(len, lines)) > self.max_line_length:
+            kept = [line for line in lines if len(line) <= self.max_line_length]
+            for _ in range(len(lines) - len(kept)):
+                self._overflow()
+            lines = kept
+
+        if len(buffer) > self.max_line_length:
+            self._discard()
+        return lines
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._discarding = False
+
+    def _discard(self) -> None:
+        self._buffer.clear()
+        if not self._discarding:
+            self._overflow()
+            self._discarding = True
+
+    def _overflow(self) -> None:
+        self.overflows += 1
+        log.warning(f"Line exceeds {self.max_line_length} bytes, discarded")
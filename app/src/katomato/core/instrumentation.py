@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from functools import wraps
+
+from katomato.config import config
+
+log = logging.getLogger(__name__)
+
+SUB_BITS = 3  # 8 buckets per power of two, a bucket spans at most 12.5% of its values
+
+
+class Histogram:
+    """Fixed log-linear buckets over nanoseconds, HDR style, O(1) per record.
+
+    Values up to 2**SUB_BITS ns have a bucket each, above that every power of two is split into
+    2**SUB_BITS equal buckets. Values above `max_ns` land in the last bucket, the exact max is kept.
+    """
+
+    __slots__ = ("count", "counts", "max", "min", "total")
+
+    def __init__(self, max_ns: int = 1 << 37):  # ~137 s
+        self.counts = [0] * (self._index(max_ns) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < 1 << SUB_BITS:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        return (shift << SUB_BITS) + (value >> shift)
+
+    @staticmethod
+    def _upper(index: int) -> int:
+        if index < 1 << SUB_BITS:
+            return index
+        shift = (index >> SUB_BITS) - 1
+        return (((index & ((1 << SUB_BITS) - 1)) + (1 << SUB_BITS) + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        value = max(0, value)
+        self.counts[min(self._index(value), len(self.counts) - 1)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p: float) -> int:
+        """Upper bound of the bucket holding the p-th percentile, clamped to the recorded range."""
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts[:-1]):
+            seen += n
+            if seen >= rank:
+                return max(self.min, min(self._upper(index), self.max))
+        return self.max  # the last bucket is open-ended
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class Gauge:
+    __slots__ = ("max", "read", "value")
+
+    def __init__(self, read: Callable[[], int]):
+        self.read = read
+        self.value = 0
+        self.max = 0
+
+
+class Instrumentation:
+    """Latency histograms per pipeline stage and key, queue depth gauges and event loop lag.
+
+    Stages of a reading: `receive` (data_received per board), `dispatch` (filter and mailbox submit),
+    `mailbox` (wait for the controller), `controller` and `reading` (arrival to controller done) per sensor,
+    `device` per device. Stages of a command: `queue` (wait in the command queue) per lane and `send` per
+    board. `run` samples the watched queue depths, the loop lag is recorded by the watchdog.
+    """
+
+    def __init__(self, enabled: bool = True, sample_interval: float = 1.0):
+        self.enabled = enabled
+        self.sample_interval = sample_interval
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.gauges: dict[str, Gauge] = {}
+
+    def record(self, stage: str, key, ns: int) -> None:
+        if not self.enabled:
+            return
+        histogram = self.histograms.get((stage, key))
+        if histogram is None:
+            histogram = self.histograms[stage, key] = Histogram()
+        histogram.record(ns)
+
+    def since(self, stage: str, key, start_ns: int) -> None:
+        if start_ns:
+            self.record(stage, key, time.perf_counter_ns() - start_ns)
+
+    def watch(self, name: str, read: Callable[[], int]) -> None:
+        """Samples `read()` as the depth of the queue `name` in `run`."""
+        self.gauges[name] = Gauge(read)
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        for gauge in self.gauges.values():
+            gauge.max = gauge.value
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            for name, gauge in self.gauges.items():
+                try:
+                    gauge.value = gauge.read()
+                except Exception as e:
+                    log.debug(f"Gauge {name} failed: {e}", exc_info=True)
+                    continue
+                gauge.max = max(gauge.max, gauge.value)
+
+    def dump(self) -> str:
+        lines = [f"{'stage':<12} {'key':<16} {'count':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for (stage, key), h in sorted(self.histograms.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            lines.append(
+                f"{stage:<12} {key!s:<16} {h.count:>9} {h.percentile(50) / 1e6:>9.3f} "
+                f"{h.percentile(99) / 1e6:>9.3f} {h.max / 1e6:>9.3f}"
+            )
+        for name, gauge in sorted(self.gauges.items()):
+            lines.append(f"{'depth':<12} {name:<16} {gauge.value:>9} {'':>9} {'':>9} {gauge.max:>9}")
+        return "\n".join(lines)
+
+
+probes = Instrumentation(enabled=config.INSTRUMENTATION, sample_interval=config.INSTRUMENTATION_SAMPLE_INTERVAL)
+
+
+def timed_device(func):
+    """Times a device call under the `device` stage, keyed by the control's device name."""
+
+    @wraps(func)
+    async def wrapper(self, arg, ctrl, command_queue):
+        start = time.perf_counter_ns()
+        try:
+            return await func(self, arg, ctrl, command_queue)
+        finally:
+            probes.record("device", ctrl.device, time.perf_counter_ns() - start)
+
+    return wrapper
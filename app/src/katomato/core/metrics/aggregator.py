@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+
+from katomato.core.sensor_data import SensorData
+
+log = logging.getLogger(__name__)
+
+
+class Window:
+    """Min, max, sum and count of one sensor's readings in one time window, constant size."""
+
+    __slots__ = ("board", "count", "label", "max", "min", "sensor", "start_ns", "sum", "unit", "zone")
+
+    def __init__(self, data: SensorData, start_ns: int, value: float):
+        self.sensor = data.sensor
+        self.board = data.board
+        self.zone = data.zone
+        self.label = data.label
+        self.unit = data.unit
+        self.start_ns = start_ns
+        self.min = self.max = self.sum = value
+        self.count = 1
+
+    def add(self, value: float) -> None:
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.sum += value
+        self.count += 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count
+
+
+class Aggregator:
+    """Downsamples readings into per-sensor windows of `window` seconds aligned to the wall clock.
+
+    A (board, zone, sensor) series holds only its open window, a window is handed to `emit` once a reading
+    of the next window arrives or `run` finds it ended. At most `max_series` series are tracked, readings
+    of further series are dropped.
+    """
+
+    def __init__(self, emit: Callable[[Window], None], window: float = 60.0, max_series: int = 256):
+        self.emit = emit
+        self.window_ns = int(window * 1e9)
+        self.max_series = max_series
+        self.emitted = 0
+        self.dropped = 0
+
+        self._open: dict[tuple, Window] = {}
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def add(self, data: SensorData, timestamp_ns: int) -> None:
+        # NaN would take over min, max and sum for the rest of the window
+        if not isinstance(data.value, (int, float)) or not math.isfinite(data.value):
+            return
+        value = float(data.value)
+        start_ns = timestamp_ns - timestamp_ns % self.window_ns
+        key = data.board, data.zone, data.sensor
+        window = self._open.get(key)
+        if window is not None and window.start_ns == start_ns:
+            window.add(value)
+            return
+
+        if window is not None:
+            self._emit(window)
+        elif len(self._open) >= self.max_series:
+            if not self.dropped:
+                log.warning(f"More than {self.max_series} metric series, dropping readings of {key}")
+            self.dropped += 1
+            return
+        self._open[key] = Window(data, start_ns, value)
+
+    def flush(self, now_ns: int | None = None) -> None:
+        """Emits the windows that ended by `now_ns`, every open window without it."""
+        for key, window in list(self._open.items()):
+            if now_ns is None or window.start_ns + self.window_ns <= now_ns:
+                del self._open[key]
+                self._emit(window)
+
+    def _emit(self, window: Window) -> None:
+        self.emitted += 1
+        try:
+            self.emit(window)
+        except Exception as e:
+            log.exception(f"Metrics window emit failed: {e}")
+
+    async def run(self) -> None:
+        """Closes the windows of sensors that went quiet, at every window boundary."""
+        try:
+            while True:
+                now_ns = time.time_ns()
+                await asyncio.sleep((self.window_ns - now_ns % self.window_ns) / 1e9)
+                self.flush(time.time_ns())
+        finally:
+            self.flush()
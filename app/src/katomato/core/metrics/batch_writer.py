@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Callable
+from enum import Enum
+
+from katomato.core.metrics.spool import RejectedBatch
+
+log = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """What happens to a record when the in-memory buffer is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    SPILL = "spill"
+
+
+class BatchWriter:
+    """Bounded in-memory buffer of line-protocol records flushed to a sink by a background task.
+
+    The hot path (`enqueue`) is an O(1) append. The blocking sink call runs in a worker thread,
+    so a slow or unreachable sink never stalls the event loop.
+    """
+
+    def __init__(
+            self,
+            sink: Callable[[list[str]], None],
+            batch_size: int = 500,
+            flush_interval: float = 1.0,
+            max_buffer: int = 10_000,
+            overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+            spill: Callable[[list[str]], None] | None = None,
+    ):
+        self.sink = sink
+        self.spill = spill
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.overflow_policy = overflow_policy
+
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+
+        self._buffer = deque()
+        self._overflow = None  # a detached batch waiting to be spilled
+        self._flush_requested = asyncio.Event()
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def enqueue(self, record: str) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self._handle_overflow()
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_requested.set()
+
+    def _handle_overflow(self) -> None:
+        if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            self._buffer.popleft()
+            self.dropped += 1
+        elif self.overflow_policy == OverflowPolicy.SPILL and self.spill and self._overflow is None:
+            # Detach the whole buffer, it is handed to the spill in the flush task
+            self._overflow = list(self._buffer)
+            self._buffer.clear()
+            self._flush_requested.set()
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+        await self.flush()
+
+    def stop(self) -> None:
+        """Asks `run` to flush whatever is buffered and return."""
+        self._stopping = True
+        self._flush_requested.set()
+
+    async def flush(self) -> None:
+        if self._overflow is not None:
+            overflow, self._overflow = self._overflow, None
+            await self._spill(overflow)
+
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            await self._write(batch)
+
+    async def _write(self, batch: list[str]) -> None:
+        try:
+            await asyncio.to_thread(self.sink, batch)
+            self.written += len(batch)
+        except RejectedBatch as e:
+            # Not spilled, a replay would be rejected as well
+            log.warning(f"Metrics sink rejected {len(batch)} records, dropped: {e}. First: {batch[0]}")
+            self.dropped += len(batch)
+        except Exception as e:
+            # Any sink error is spilled, a bug in the sink as well, its traceback shows which it is
+            log.warning(f"Metrics sink write failed ({len(batch)} records): {e}", exc_info=True)
+            await self._spill(batch)
+
+    async def _spill(self, batch: list[str]) -> None:
+        if not self.spill:
+            self.dropped += len(batch)
+            return
+        try:
+            await asyncio.to_thread(self.spill, batch)
+            self.spilled += len(batch)
+        except Exception as e:
+            log.exception(f"Metrics spill failed ({len(batch)} records): {e}")
+            self.dropped += len(batch)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import zlib
+from array import array
+
+from katomato.config import config
+from katomato.core.metrics.fanout import MetricsSink, Reading
+from katomato.core.registry import sink_registry
+
+log = logging.getLogger(__name__)
+
+FILE_SUFFIX = ".kcol"
+COLUMNS = ("timestamp_ns", "value", "filtered")
+
+
+class _Series:
+    __slots__ = ("filtered", "label", "timestamps", "unit", "values")
+
+    def __init__(self, label: str, unit: str):
+        self.label = label
+        self.unit = unit
+        self.timestamps = array("q")
+        self.values = array("d")
+        self.filtered = array("d")  # NaN where the sensor is unfiltered or the reading was rejected
+
+
+@sink_registry("file")
+class ColumnarFileSink(MetricsSink):
+    """Readings in compressed column files, a file per `rows` readings or `interval` seconds.
+
+    A file is a JSON header line listing the series followed by each series' columns: timestamps as
+    int64 deltas to the previous reading, raw and filtered values as float64, all zlib-compressed.
+    Slowly changing sensors give runs of near-identical bytes, which is what the compression feeds on.
+    """
+
+    def __init__(
+            self,
+            directory: str = config.METRICS_FILE_DIR,
+            rows: int = config.METRICS_FILE_ROWS,
+            interval: float = config.METRICS_FILE_INTERVAL,
+    ):
+        self.directory = directory
+        self.rows = rows
+        self.interval = interval
+        self.written = 0  # readings
+        self.dropped = 0  # readings of a buffer that could not be written
+
+        self._series: dict[tuple, _Series] = {}
+        self._count = 0
+        self._full = asyncio.Event()
+
+    def handle(self, reading: Reading) -> None:
+        data = reading.data
+        if not isinstance(data.value, (int, float)):
+            return
+        key = data.board, data.zone, data.sensor
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(data.label, data.unit)
+        series.timestamps.append(reading.timestamp_ns)
+        series.values.append(data.value)
+        state = reading.state
+        series.filtered.append(math.nan if state is None or state.filtered is None else state.filtered)
+        self._count += 1
+        if self._count >= self.rows:
+            self._full.set()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except TimeoutError:
+                    pass
+                self._full.clear()
+                series, count = self._take()
+                if count:
+                    await asyncio.to_thread(self._write, series, count)
+        finally:
+            series, count = self._take()
+            if count:
+                self._write(series, count)
+
+    def _take(self) -> tuple[dict, int]:
+        # The next readings go to a fresh buffer while the taken one is written
+        series, count = self._series, self._count
+        self._series, self._count = {}, 0
+        return series, count
+
+    def _write(self, series: dict[tuple, _Series], count: int) -> None:
+        header = {"series": [
+            {
+                "board": board, "zone": zone, "sensor": sensor, "label": s.label, "unit": s.unit,
+                "rows": len(s.timestamps),
+            }
+            for (board, zone, sensor), s in series.items()
+        ]}
+        blocks = [json.dumps(header).encode() + b"\n"]
+        for s in series.values():
+            deltas = array("q", (b - a for a, b in zip([0, *s.timestamps], s.timestamps)))
+            blocks += [deltas.tobytes(), s.values.tobytes(), s.filtered.tobytes()]
+
+        path = os.path.join(self.directory, f"{time.time_ns()}{FILE_SUFFIX}")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(zlib.compress(b"".join(blocks)))
+            os.replace(path + ".tmp", path)
+            self.written += count
+        except OSError as e:
+            log.exception(f"Metrics file write failed ({count} readings): {e}")
+            self.dropped += count
+
+
+def read_columns(path: str) -> dict[tuple, dict]:
+    """Columns of a metrics file by (board, zone, sensor), with the series' label and unit."""
+    with open(path, "rb") as f:
+        payload = zlib.decompress(f.read())
+    header_end = payload.index(b"\n") + 1
+    header = json.loads(payload[:header_end])
+
+    result = {}
+    offset = header_end
+    for meta in header["series"]:
+        columns = []
+        for typecode in ("q", "d", "d"):
+            column = array(typecode)
+            size = meta["rows"] * column.itemsize
+            column.frombytes(payload[offset:offset + size])
+            offset += size
+            columns.append(column)
+        timestamps, total = [], 0
+        for delta in columns[0]:
+            total += delta
+            timestamps.append(total)
+        result[meta["board"], meta.get("zone"), meta["sensor"]] = {
+            "label": meta["label"],
+            "unit": meta["unit"],
+            **dict(zip(COLUMNS, (timestamps, list(columns[1]), list(columns[2])))),
+        }
+    return result
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from functools import wraps
+from typing import NamedTuple
+
+from katomato.config import config
+from katomato.core.filters import FilterState, filters
+from katomato.core.registry import SINK_REGISTRY
+from katomato.core.sensor_data import SensorData
+
+log = logging.getLogger(__name__)
+
+
+class Reading(NamedTuple):
+    data: SensorData
+    timestamp_ns: int
+    state: FilterState | None  # the filter's view of the reading, None for unfiltered sensors
+
+
+class MetricsSink:
+    """A metrics exporter registered with `sink_registry` and enabled by name in METRICS_SINKS.
+
+    `handle` is called for every reading from the fan-out task and must not block, slow work such as
+    network or disk writes belongs in `run`, which runs for the sink's whole lifetime.
+    """
+
+    def handle(self, reading: Reading) -> None:
+        raise NotImplementedError
+
+    async def run(self) -> None:
+        pass
+
+
+class MetricsFanout:
+    """One bounded queue between the serial path and every enabled sink.
+
+    `publish` is an O(1) append, the oldest reading is dropped when the queue is full. A single task hands
+    the readings to the sinks, so a sink never adds latency to the serial path.
+    """
+
+    def __init__(self, max_queue: int = 10_000, batch: int = 256):
+        self.max_queue = max_queue
+        self.batch = batch  # readings handed out before yielding to the loop
+        self.published = 0
+        self.dropped = 0
+
+        self._queue = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def publish(self, reading: Reading) -> None:
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(reading)
+        self.published += 1
+        self._ready.set()
+
+    async def run(self, names: list[str] | None = None) -> None:
+        names = config.METRICS_SINKS if names is None else names
+        unknown = [name for name in names if name not in SINK_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown metrics sinks: {', '.join(unknown)}")
+        sinks = [SINK_REGISTRY[name] for name in names]
+        log.info(f"Metrics sinks: {', '.join(names) or 'none'}")
+        await asyncio.gather(self._deliver(sinks), *(sink.run() for sink in sinks))
+
+    async def _deliver(self, sinks: list[MetricsSink]) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._queue:
+                for _ in range(min(self.batch, len(self._queue))):
+                    reading = self._queue.popleft()
+                    for sink in sinks:
+                        try:
+                            sink.handle(reading)
+                        except Exception as e:
+                            log.exception(f"Metrics sink {type(sink).__name__} failed: {e}")
+                await asyncio.sleep(0)
+
+
+fanout = MetricsFanout(max_queue=config.METRICS_QUEUE_SIZE)
+
+
+def metrics_ingestion(func):
+    @wraps(func)
+    def wrapper(*args):
+        result = func(*args)  # filters the reading first, its statistics go with the raw value
+        try:
+            arg = args[0]
+            if isinstance(arg, str):
+                arg = json.loads(arg)
+
+            if isinstance(arg, dict):
+                data = SensorData(**arg)
+            else:
+                data = arg
+
+            fanout.publish(Reading(data, time.time_ns(), filters.state(data)))
+
+        except Exception as ex:
+            log.exception(f"Unexpected error: {ex}")
+
+        return result
+
+    return wrapper
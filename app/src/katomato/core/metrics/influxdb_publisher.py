@@ -1,54 +1,151 @@
-import json
+import asyncio
 import logging
-from datetime import datetime, timezone
-from functools import wraps
+import math
 
-from influxdb_client import InfluxDBClient, Point
+from influxdb_client import InfluxDBClient
 from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.rest import ApiException
 
 from katomato.config import config
+from katomato.core.filters import FilterState
+from katomato.core.metrics.aggregator import Aggregator, Window
+from katomato.core.metrics.batch_writer import BatchWriter, OverflowPolicy
+from katomato.core.metrics.fanout import MetricsSink, Reading
+from katomato.core.metrics.spool import Compaction, RejectedBatch, Spool, keep_synced, replay
+from katomato.core.registry import sink_registry
 from katomato.core.sensor_data import SensorData
 
 log = logging.getLogger(__name__)
-try:
-    client = InfluxDBClient(
-        url=config.INFLUX_URL, token=config.INFLUX_TOKEN, org=config.INFLUX_ORG
+
+MEASUREMENT = "sensor_data"
+WINDOW_MEASUREMENT = "sensor_window"
+# Responses to a write that no retry changes: malformed line protocol, a request too large, points outside the
+# retention period. Auth errors, a missing bucket and rate limits are fixed on the server, the batch is kept
+REJECTED_STATUSES = (400, 413, 422)
+
+write_api = None  # connected on the first write
+
+
+def connect() -> None:
+    global write_api
+    try:
+        client = InfluxDBClient(
+            url=config.INFLUX_URL, token=config.INFLUX_TOKEN, org=config.INFLUX_ORG
+        )
+        write_api = client.write_api(write_options=SYNCHRONOUS)
+    except Exception as e:
+        log.exception(f"Error: {e}")
+
+
+def _escape_tag(value: str) -> str:
+    return value.replace(",", r"\,").replace("=", r"\=").replace(" ", r"\ ")
+
+
+def _escape_field(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _float_fields(**fields) -> str:
+    # InfluxDB rejects NaN and inf, and with them the whole batch. A non-finite or missing value is left out
+    return "".join(
+        f"{key}={float(value)!r},"
+        for key, value in fields.items()
+        if isinstance(value, (int, float)) and math.isfinite(value)
+    )
+
+
+def to_line_protocol(data: SensorData, timestamp_ns: int, state: FilterState | None = None) -> str:
+    stats = ""
+    if state is not None:
+        # What the controllers saw, no filtered value for a rejected reading
+        stats = _float_fields(
+            filtered=state.filtered, mean=state.mean, stddev=state.stddev, min=state.min, max=state.max
+        )
+    return (
+        f"{MEASUREMENT},sensor={_escape_tag(data.sensor)} "
+        f"{_float_fields(value=data.value)}"
+        f"{stats}"
+        f'label="{_escape_field(data.label)}",'  # metadata, no aggregation
+        f'unit="{_escape_field(data.unit)}" '  # metadata, no aggregation
+        f"{timestamp_ns}"
     )
-    write_api = client.write_api(write_options=SYNCHRONOUS)
-except Exception as e:
-    log.exception(f"Error: {e}")
-
-
-def influx_ingestion(func):
-    @wraps(func)
-    def wrapper(*args):
-        try:
-            arg = args[0]
-            if isinstance(arg, str):
-                arg = json.loads(arg)
-
-            if isinstance(arg, dict):
-                data = SensorData(**arg)
-            else:
-                data = arg
-
-            # Send to InfluxDB
-            if write_api:
-                point = (
-                    Point("sensor_data")
-                    .tag("sensor", data.sensor)
-                    .field("value", float(data.value))
-                    .field("label", data.label)  # metadata, no aggregation
-                    .field("unit", data.unit)  # metadata, no aggregation
-                    .time(datetime.now(timezone.utc))
-                )
-                write_api.write(
-                    bucket=config.INFLUX_BUCKET, org=config.INFLUX_ORG, record=point
-                )
-
-        except Exception as ex:
-            log.exception(f"Unexpected error: {ex}")
-
-        return func(*args)
-
-    return wrapper
+
+
+def window_to_line_protocol(window: Window) -> str:
+    # The metadata is constant per series, as tags it is stored once per series instead of per point
+    tags = {
+        "board": window.board, "label": window.label, "sensor": window.sensor, "unit": window.unit, "zone": window.zone,
+    }
+    tag_set = "".join(f",{key}={_escape_tag(value)}" for key, value in tags.items() if value)
+    return (
+        f"{WINDOW_MEASUREMENT}{tag_set} "
+        f"{_float_fields(min=window.min, max=window.max, mean=window.mean)}count={window.count}i "
+        f"{window.start_ns}"
+    )
+
+
+def write_batch(records: list[str]) -> None:
+    """Blocking write of a batch of line-protocol records. Runs in the writer's worker thread."""
+    if write_api is None:
+        connect()
+    if write_api is None:
+        raise ConnectionError("InfluxDB client is not available")
+    try:
+        write_api.write(bucket=config.INFLUX_BUCKET, org=config.INFLUX_ORG, record=records)
+    except ApiException as e:
+        if e.status in REJECTED_STATUSES:
+            raise RejectedBatch(f"HTTP {e.status} {e.reason}") from e
+        raise
+
+
+# Takes the batches InfluxDB could not accept, they are replayed by `spool.replay`
+spool = Spool(
+    config.SPOOL_DIR,
+    segment_bytes=config.SPOOL_SEGMENT_BYTES,
+    max_bytes=config.SPOOL_MAX_BYTES,
+    fsync_batch=config.SPOOL_FSYNC_BATCH,
+    fsync_interval=config.SPOOL_FSYNC_INTERVAL,
+    compaction=Compaction(config.SPOOL_COMPACTION),
+)
+
+writer = BatchWriter(
+    write_batch,
+    batch_size=config.INFLUX_BATCH_SIZE,
+    flush_interval=config.INFLUX_FLUSH_INTERVAL,
+    max_buffer=config.INFLUX_BUFFER_SIZE,
+    overflow_policy=OverflowPolicy(config.INFLUX_OVERFLOW_POLICY),
+    spill=spool.append,
+)
+
+# Per-sensor windows, one record per sensor and window instead of one per reading
+aggregator = Aggregator(
+    lambda window: writer.enqueue(window_to_line_protocol(window)),
+    window=config.METRICS_WINDOW or 60.0,
+    max_series=config.METRICS_MAX_SERIES,
+)
+
+
+@sink_registry("influxdb")
+class InfluxDBSink(MetricsSink):
+    """Batched InfluxDB export: per-sensor windows, optionally every reading, spooled while InfluxDB is down."""
+
+    def handle(self, reading: Reading) -> None:
+        # Buffered, the batch is sent to InfluxDB by the writer task
+        if config.METRICS_RAW or not config.METRICS_WINDOW:
+            writer.enqueue(to_line_protocol(reading.data, reading.timestamp_ns, reading.state))
+        if config.METRICS_WINDOW:
+            aggregator.add(reading.data, reading.timestamp_ns)
+
+    async def run(self) -> None:
+        await asyncio.gather(
+            writer.run(),
+            aggregator.run(),
+            replay(
+                spool,
+                write_batch,
+                batch_size=config.INFLUX_BATCH_SIZE,
+                rate=config.SPOOL_REPLAY_RATE,
+                retry_interval=config.SPOOL_REPLAY_RETRY_INTERVAL,
+            ),
+            keep_synced(spool, config.SPOOL_FSYNC_INTERVAL),
+        )
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import math
+
+from katomato.config import config
+from katomato.core.instrumentation import probes
+from katomato.core.metrics.fanout import MetricsSink, Reading, fanout
+from katomato.core.registry import sink_registry
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    # The text format spells them NaN, +Inf and -Inf, repr gives nan and inf
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+@sink_registry("prometheus")
+class PrometheusSink(MetricsSink):
+    """Latest reading per sensor as gauges, served in the Prometheus text format on GET /metrics.
+
+    Memory is one reading per (board, zone, sensor), the page is rendered when it is scraped.
+    """
+
+    def __init__(self, host: str = config.METRICS_HTTP_HOST, port: int = config.METRICS_HTTP_PORT):
+        self.host = host
+        self.port = port
+        self._latest: dict[tuple, Reading] = {}
+
+    def handle(self, reading: Reading) -> None:
+        if isinstance(reading.data.value, (int, float)):
+            self._latest[reading.data.board, reading.data.zone, reading.data.sensor] = reading
+
+    def render(self) -> str:
+        values, filtered, updated = [], [], []
+        for reading in self._latest.values():
+            data = reading.data
+            labels = (
+                f'board="{_escape_label(data.board or "")}",sensor="{_escape_label(data.sensor)}",'
+                f'label="{_escape_label(data.label)}",unit="{_escape_label(data.unit)}"'
+            )
+            if data.zone is not None:
+                labels += f',zone="{_escape_label(data.zone)}"'
+            values.append(f"katomato_sensor_value{{{labels}}} {_format_value(data.value)}")
+            if reading.state is not None and reading.state.filtered is not None:
+                filtered.append(f"katomato_sensor_filtered{{{labels}}} {_format_value(reading.state.filtered)}")
+            updated.append(f"katomato_sensor_updated_seconds{{{labels}}} {_format_value(reading.timestamp_ns / 1e9)}")
+
+        lines = [
+            "# HELP katomato_sensor_value Latest raw reading.",
+            "# TYPE katomato_sensor_value gauge",
+            *values,
+            "# HELP katomato_sensor_filtered Latest reading as the controllers saw it.",
+            "# TYPE katomato_sensor_filtered gauge",
+            *filtered,
+            "# HELP katomato_sensor_updated_seconds Time of the latest reading.",
+            "# TYPE katomato_sensor_updated_seconds gauge",
+            *updated,
+            "# HELP katomato_metrics_dropped_total Readings dropped by the full metrics queue.",
+            "# TYPE katomato_metrics_dropped_total counter",
+            f"katomato_metrics_dropped_total {fanout.dropped}",
+            *self._render_probes(),
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_probes() -> list[str]:
+        lines = [
+            "# HELP katomato_stage_latency_seconds Latency per pipeline stage, see `stats` in the CLI.",
+            "# TYPE katomato_stage_latency_seconds summary",
+        ]
+        for (stage, key), h in list(probes.histograms.items()):
+            labels = f'stage="{_escape_label(stage)}",key="{_escape_label(key or "")}"'
+            for quantile in (0.5, 0.9, 0.99):
+                lines.append(
+                    f'katomato_stage_latency_seconds{{{labels},quantile="{quantile}"}} '
+                    f"{_format_value(h.percentile(quantile * 100) / 1e9)}"
+                )
+            lines.append(f"katomato_stage_latency_seconds_sum{{{labels}}} {_format_value(h.total / 1e9)}")
+            lines.append(f"katomato_stage_latency_seconds_count{{{labels}}} {h.count}")
+        lines += ["# HELP katomato_queue_depth Sampled queue depth.", "# TYPE katomato_queue_depth gauge"]
+        lines += [f'katomato_queue_depth{{queue="{name}"}} {g.value}' for name, g in list(probes.gauges.items())]
+        return lines
+
+    async def run(self) -> None:
+        server = await asyncio.start_server(self._serve, self.host, self.port)
+        log.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        async with server:
+            await server.serve_forever()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while await reader.readline() not in (b"\r\n", b"\n", b""):
+                pass  # headers
+            parts = request.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            log.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from enum import Enum
+
+log = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+CURSOR_FILE = "cursor"
+
+
+class RejectedBatch(Exception):
+    """The sink will never accept the batch, e.g. it holds a malformed record. Retrying it is pointless."""
+
+
+class Compaction(Enum):
+    """What is reclaimed when the spool exceeds its disk budget."""
+
+    DROP_OLDEST = "drop_oldest"  # delete the oldest segments, keep the most recent history
+    DROP_NEWEST = "drop_newest"  # reject new records, keep the oldest history
+
+
+class Spool:
+    """Append-only, segment-rotated on-disk spool of line-protocol records.
+
+    Records are appended as text lines to the active segment through a buffered file and fsynced in
+    batches. Replay progress is kept in a cursor file; segments behind the cursor are deleted on commit.
+    All methods are blocking and meant to be called from a worker thread.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            segment_bytes: int = 4 * 1024 * 1024,
+            max_bytes: int = 256 * 1024 * 1024,
+            fsync_batch: int = 1000,
+            fsync_interval: float = 1.0,
+            compaction: Compaction = Compaction.DROP_OLDEST,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.compaction = compaction
+
+        self.dropped = 0  # records rejected by DROP_NEWEST
+        self.rejected = 0  # replayed records the sink refused for good
+        self.dropped_bytes = 0  # bytes deleted by DROP_OLDEST
+
+        self._lock = threading.Lock()
+        self._opened = False
+        self._segments = {}  # segment id -> size in bytes, in id order
+        self._active = None
+        self._active_id = 0
+        self._cursor = (0, 0)  # segment id and byte offset of the next record to replay
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._segments.values())
+
+    def append(self, records: list[str]) -> None:
+        if not records:
+            return
+        payload = ("\n".join(records) + "\n").encode()
+
+        with self._lock:
+            self._ensure_open()
+            if self.compaction == Compaction.DROP_NEWEST and self.size_bytes + len(payload) > self.max_bytes:
+                self.dropped += len(records)
+                return
+
+            if self._active is None:
+                self._active = open(self._path(self._active_id), "ab")
+                self._segments[self._active_id] = 0
+
+            self._active.write(payload)
+            self._segments[self._active_id] += len(payload)
+            self._unsynced += len(records)
+
+            if self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            if self._segments[self._active_id] >= self.segment_bytes:
+                self._rotate()
+            self._enforce_limit()
+
+    def read(self, max_records: int) -> tuple[list[str], tuple[int, int]]:
+        """Returns up to `max_records` records from the cursor and the position to `commit` after replaying them."""
+        with self._lock:
+            self._ensure_open()
+            if self._active:
+                self._active.flush()
+
+            records = []
+            position = self._cursor
+            for segment_id in [sid for sid in self._segments if sid >= self._cursor[0]]:
+                offset = self._cursor[1] if segment_id == self._cursor[0] else 0
+                with open(self._path(segment_id), "rb") as f:
+                    f.seek(offset)
+                    while len(records) < max_records:
+                        line = f.readline()
+                        if not line.endswith(b"\n"):
+                            break  # end of segment or a torn record
+                        records.append(line[:-1].decode("utf-8", errors="ignore"))
+                        offset += len(line)
+                position = (segment_id, offset)
+                if len(records) >= max_records:
+                    break
+            return records, position
+
+    def commit(self, position: tuple[int, int]) -> None:
+        """Moves the cursor past replayed records and deletes fully replayed segments."""
+        with self._lock:
+            self._cursor = position
+            for segment_id in [sid for sid in self._segments if sid < position[0]]:
+                self._delete(segment_id)
+            self._write_cursor()
+
+    def sync(self) -> None:
+        """fsyncs the records appended since the last fsync, appends alone only sync once they are due."""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._active:
+                self._sync()
+                self._active.close()
+                self._active = None
+
+    def _ensure_open(self) -> None:
+        if self._opened:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        ids = sorted(
+            int(name.removesuffix(SEGMENT_SUFFIX))
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        self._segments = {sid: os.path.getsize(self._path(sid)) for sid in ids}
+        # Never append to a segment left by a previous run, it may end with a torn record
+        self._active_id = (ids[-1] + 1) if ids else 1
+        self._cursor = self._read_cursor()
+        self._opened = True
+
+    def _path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:08d}{SEGMENT_SUFFIX}")
+
+    def _sync(self) -> None:
+        if self._active:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._active.close()
+        self._active = None
+        self._active_id += 1
+
+    def _enforce_limit(self) -> None:
+        while self.size_bytes > self.max_bytes and len(self._segments) > 1:
+            oldest = next(iter(self._segments))
+            if oldest == self._active_id:
+                break
+            self.dropped_bytes += self._segments[oldest]
+            log.warning(f"Metrics spool is over {self.max_bytes} bytes, dropping segment {oldest}")
+            self._delete(oldest)
+            if self._cursor[0] <= oldest:
+                self._cursor = (oldest + 1, 0)
+
+    def _delete(self, segment_id: int) -> None:
+        self._segments.pop(segment_id, None)
+        try:
+            os.remove(self._path(segment_id))
+        except FileNotFoundError:
+            pass
+
+    def _read_cursor(self) -> tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                segment_id, offset = f.read().split()
+                return int(segment_id), int(offset)
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+
+    def _write_cursor(self) -> None:
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write(f"{self._cursor[0]} {self._cursor[1]}")
+        os.replace(path + ".tmp", path)
+
+
+async def replay(
+        spool: Spool,
+        sink: Callable[[list[str]], None],
+        batch_size: int = 500,
+        rate: float = 1000.0,
+        retry_interval: float = 5.0,
+) -> None:
+    """Drains the spool into the sink once it is reachable again, at most `rate` records per second."""
+    while True:
+        records, position = await asyncio.to_thread(spool.read, batch_size)
+        if not records:
+            await asyncio.sleep(retry_interval)
+            continue
+
+        try:
+            await asyncio.to_thread(sink, records)
+        except RejectedBatch as e:
+            # Committed like a replayed batch, it would block the spool for good
+            spool.rejected += len(records)
+            log.warning(f"Metrics sink rejected {len(records)} spooled records, dropped: {e}. First: {records[0]}")
+        except Exception as e:
+            log.debug(f"Metrics sink is still unavailable: {e}", exc_info=True)
+            await asyncio.sleep(retry_interval)
+            continue
+
+        await asyncio.to_thread(spool.commit, position)
+        log.debug(f"Replayed {len(records)} spooled records")
+        await asyncio.sleep(len(records) / rate)
+
+
+async def keep_synced(spool: Spool, interval: float = 1.0) -> None:
+    """fsyncs pending records every `interval` seconds, a spill followed by silence is not left unsynced.
+    The spool is closed when the task ends."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(spool.sync)
+    finally:
+        spool.close()
@@ -0,0 +1,102 @@
+import logging
+from datetime import datetime
+
+from katomato.config import config
+from katomato.config.base import get_hardware_config
+from katomato.config.params import Params, build_params, interpolate
+from katomato.core.clock import get_clock
+from katomato.core.state_journal import MANUAL_PHASE, journal
+
+log = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60  # s
+
+
+class PhaseSchedule:
+    """Growth phase timeline precomputed into a table of parameter snapshots, one per `step` seconds.
+
+    `phases` is a list of (phase class, duration in days) in growth order. Over the last `transition` days of
+    each phase the setpoints ramp linearly towards the next phase, so they reach it at the phase boundary.
+    Steps outside a ramp share the phase's snapshot. Looking up the snapshot for a plant age is an index into
+    the table, the last snapshot holds once the timeline has ended.
+    """
+
+    def __init__(self, phases: list[tuple[type, float]], transition: float = 2.0, step: float = 3600.0):
+        if not phases:
+            raise ValueError("Phase schedule is empty")
+        self.step = step
+        self.duration = sum(days for _, days in phases) * DAY
+
+        hardware = get_hardware_config()
+        snapshots = [(phase_cls, build_params(phase_cls(), hardware)) for phase_cls, _ in phases]
+
+        self.table: list[tuple[type, Params]] = []
+        phase_end = 0.0
+        for i, (_, days) in enumerate(phases):
+            phase_end += days * DAY
+            phase_cls, params = snapshots[i]
+            next_params = snapshots[i + 1][1] if i + 1 < len(snapshots) else None
+            ramp = min(transition, days) * DAY
+            while len(self.table) * self.step < phase_end:
+                left = phase_end - len(self.table) * self.step
+                if next_params and left <= ramp:
+                    # the snapshot at the end of the step, the last one of a ramp is the next phase itself
+                    t = min(1.0, (ramp - left + self.step) / ramp)
+                    self.table.append((phase_cls, interpolate(params, next_params, t)))
+                else:
+                    self.table.append((phase_cls, params))
+
+    def index(self, age: float) -> int:
+        return min(len(self.table) - 1, max(0, int(age // self.step)))
+
+    def at(self, age: float) -> tuple[type, Params]:
+        """Phase and parameter snapshot for a plant `age` in seconds."""
+        return self.table[self.index(age)]
+
+
+def load_schedule() -> PhaseSchedule | None:
+    if not config.PLANTED_AT or not config.PHASE_SCHEDULE:
+        return None
+    if journal.get(MANUAL_PHASE):
+        log.info(f"Phase {journal.get(MANUAL_PHASE)['name']} was set manually, the phase schedule stays stopped")
+        return None
+    phases = config.get_growth_phases()
+    unknown = [name for name in config.PHASE_SCHEDULE if name not in phases]
+    if unknown:
+        raise ValueError(f"Unknown phases in PHASE_SCHEDULE: {', '.join(unknown)}")
+    return PhaseSchedule(
+        [(phases[name], days) for name, days in config.PHASE_SCHEDULE.items()],
+        transition=config.PHASE_TRANSITION_DAYS,
+        step=config.PHASE_SCHEDULE_STEP,
+    )
+
+
+async def run_schedule(schedule: PhaseSchedule | None, planted_at: str | None = None, clock=None) -> None:
+    """Applies the schedule's snapshot for the current plant age at every table step.
+
+    Controllers keep reading `config.params`, the schedule swaps it like a phase switch. A manual `phase`
+    command takes over: the schedule stops once it finds a snapshot it did not apply. The plant age and the
+    waits between steps follow `clock`, the active clock by default.
+    """
+    if schedule is None:
+        return
+    planted = datetime.fromisoformat(planted_at or config.PLANTED_AT).timestamp()
+    clock = clock or get_clock()
+
+    applied = None
+    while True:
+        if applied is not None and config.params is not applied:
+            log.info(f"Phase switched manually to {config.params.phase}, the phase schedule is stopped")
+            return
+
+        age = clock.time() - planted
+        idx = schedule.index(age)
+        phase_cls, params = schedule.table[idx]
+        if params is not applied:
+            config.growth_phase, config.params = phase_cls(), params
+            applied = params
+            log.info(f"Phase schedule: {params.phase}, day {age / DAY:.1f}")
+
+        if idx == len(schedule.table) - 1 and age >= 0:
+            return
+        await clock.sleep(max(0.0, (idx + 1) * schedule.step - age))
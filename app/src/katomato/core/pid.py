@@ -0,0 +1,42 @@
+class PID:
+    """PID controller with the output clamped to [out_min, out_max] and anti-windup.
+
+    The error is `measurement - setpoint` scaled by `direction`, 1 for a cooling actuator such as a fan that
+    works harder the hotter it gets. The integral only grows while the output is not saturated in the
+    error's direction and never leaves the output range, so a long saturation doesn't leave an integral
+    that overshoots once the measurement comes back. The derivative acts on the measurement,
+    a setpoint step from a phase switch gives no kick. With kd=0 it is a PI controller.
+    """
+
+    def __init__(self, kp: float, ki: float, kd: float = 0.0, out_min: float = 0.0, out_max: float = 1.0,
+                 direction: int = 1):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.out_min = out_min
+        self.out_max = out_max
+        self.direction = direction
+
+        self.integral = 0.0
+        self.output = out_min
+        self._last_measurement = None
+        self._last_time = None
+
+    def update(self, setpoint: float, measurement: float, now: float) -> float:
+        error = self.direction * (measurement - setpoint)
+        dt = now - self._last_time if self._last_time is not None else 0.0
+        derivative = 0.0
+        if dt > 0:
+            derivative = self.direction * (measurement - self._last_measurement) / dt
+            saturated = (self.output >= self.out_max and error > 0) or (self.output <= self.out_min and error < 0)
+            if not saturated:
+                self.integral = min(max(self.integral + self.ki * error * dt, self.out_min), self.out_max)
+        self._last_measurement, self._last_time = measurement, now
+
+        self.output = min(max(self.kp * error + self.integral + self.kd * derivative, self.out_min), self.out_max)
+        return self.output
+
+    def reset(self) -> None:
+        self.integral = 0.0
+        self.output = self.out_min
+        self._last_measurement = self._last_time = None
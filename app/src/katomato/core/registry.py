@@ -1,12 +1,16 @@
 from enum import Enum
 
+from katomato.core.sensor_data import Control, SensorData
+
+# name -> factory, instances are created per board, zone and pin by the instance tables below
 DEVICE_REGISTRY = {}
 CONTROLLER_REGISTRY = {}
+SINK_REGISTRY = {}
 
 
 def device_registry(name):
     def decorator(cls):
-        DEVICE_REGISTRY[name] = cls()
+        DEVICE_REGISTRY[name] = cls
         return cls
 
     return decorator
@@ -14,12 +18,60 @@ def device_registry(name):
 
 def controller_registry(name):
     def decorator(cls):
-        CONTROLLER_REGISTRY[name] = cls()
+        CONTROLLER_REGISTRY[name] = cls
         return cls
 
     return decorator
 
 
+def sink_registry(name):
+    def decorator(cls):
+        SINK_REGISTRY[name] = cls()
+        return cls
+
+    return decorator
+
+
+class InstanceTable:
+    """Instances created on first use from the factories of a registry, one per key.
+
+    The first item of a key is the registered name, the rest tells the instances apart. A lookup is a
+    single dict access whatever the number of instances.
+    """
+
+    def __init__(self, registry: dict):
+        self.registry = registry
+        self.instances: dict[tuple, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def get(self, key: tuple):
+        instance = self.instances.get(key)
+        if instance is None:
+            factory = self.registry.get(key[0])
+            if factory is None:
+                return None
+            instance = self.instances[key] = factory()
+        return instance
+
+    def clear(self) -> None:
+        self.instances.clear()
+
+
+DEVICES = InstanceTable(DEVICE_REGISTRY)
+CONTROLLERS = InstanceTable(CONTROLLER_REGISTRY)
+
+
+def get_device(ctrl: Control):
+    # A pin drives one device, whichever zone's controller switches it
+    return DEVICES.get((ctrl.device, ctrl.board, ctrl.pin))
+
+
+def get_controller(sensor_data: SensorData):
+    return CONTROLLERS.get((sensor_data.sensor, sensor_data.board, sensor_data.zone))
+
+
 class Action(Enum):
     """Action defines the response to a sensor measurement.
     For example, if the temperature is too high, the appropriate action would be Action.DOWN.
@@ -0,0 +1,186 @@
+import logging
+import operator
+import re
+from asyncio import Queue
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, fields
+
+from katomato.config import config
+from katomato.config.params import Params
+from katomato.core.clock import get_clock
+from katomato.core.registry import Action, get_device
+from katomato.core.sensor_data import SensorData
+from katomato.core.state_journal import controller_key, journal, monotonic_at
+
+log = logging.getLogger(__name__)
+
+CONDITIONS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "any": None}
+PARAMS = frozenset(f.name for f in fields(Params) if f.name != "phase")
+TERM = re.compile(r"\s*([+-])?\s*([A-Za-z_]\w*|\d+(?:\.\d*)?)\s*")
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    sensor: str
+    condition: str  # > | >= | < | <= | any
+    action: Action
+    setpoint: tuple = ()  # (sign, params name or number) terms
+    hysteresis: tuple = ()  # moves the threshold away from the setpoint in the condition's direction
+    device: str | None = None  # None switches every control of the reading
+    priority: int = 0
+
+
+def _expression(value) -> tuple:
+    """Parses "HUM_CEIL - hum_tolerance" into ((1, "HUM_CEIL"), (-1, "hum_tolerance")), numbers become floats."""
+    if isinstance(value, (int, float)):
+        return (1, float(value)),
+    terms, pos = [], 0
+    while pos < len(value):
+        match = TERM.match(value, pos)
+        if match is None or (terms and match.group(1) is None):
+            raise ValueError(f"Invalid rule expression: {value!r}")
+        sign, term = -1 if match.group(1) == "-" else 1, match.group(2)
+        if term[0].isdigit():
+            term = float(term)
+        elif term not in PARAMS:
+            raise ValueError(f"Unknown parameter in rule expression {value!r}: {term}")
+        terms.append((sign, term))
+        pos = match.end()
+    if not terms:
+        raise ValueError(f"Empty rule expression: {value!r}")
+    return tuple(terms)
+
+
+def _evaluate(terms: tuple, params: Params) -> float:
+    total = 0.0
+    for sign, term in terms:
+        total += sign * (term if isinstance(term, float) else getattr(params, term))
+    return total
+
+
+def parse_rule(options: dict) -> Rule:
+    options = dict(options)
+    condition = options.pop("condition")
+    if condition not in CONDITIONS:
+        raise ValueError(f"Unknown rule condition: {condition}")
+    setpoint = options.pop("setpoint", None)
+    if setpoint is None and condition != "any":
+        raise ValueError(f"Rule for {options.get('sensor')} has no setpoint")
+    return Rule(
+        condition=condition,
+        action=Action[options.pop("action").upper()],
+        setpoint=_expression(setpoint) if setpoint is not None else (),
+        hysteresis=_expression(options.pop("hysteresis")) if "hysteresis" in options else (),
+        **options,
+    )
+
+
+class RuleSet:
+    """The rules of one sensor, checked in priority order, the first match decides a control's action.
+
+    Thresholds are evaluated once per params snapshot, a phase switch rebinds them on the next reading.
+    The rules that apply to a device are looked up once per device name, a reading only compares floats.
+    """
+
+    def __init__(self, sensor: str, rules: list[Rule], interval: float = 0.0):
+        self.sensor = sensor
+        self.rules = sorted(rules, key=lambda rule: -rule.priority)  # stable, config order within a priority
+        self.interval = interval  # s, minimum time between decisions
+
+        self._params = None
+        self._compiled: list[tuple[str | None, object, float, Action]] = []
+        self._by_device: dict[str | None, tuple] = {}
+
+    def bind(self, params: Params) -> None:
+        self._compiled = []
+        for rule in self.rules:
+            threshold = _evaluate(rule.setpoint, params)
+            if rule.condition in (">", ">="):
+                threshold += _evaluate(rule.hysteresis, params)
+            else:
+                threshold -= _evaluate(rule.hysteresis, params)
+            self._compiled.append((rule.device, CONDITIONS[rule.condition], threshold, rule.action))
+        self._by_device = {}
+        self._params = params
+
+    def checks(self, device: str) -> tuple:
+        """(test, threshold, action) of the rules that apply to `device`, in priority order."""
+        if config.params is not self._params:
+            self.bind(config.params)
+        checks = self._by_device.get(device)
+        if checks is None:
+            checks = self._by_device[device] = tuple(
+                (test, threshold, action) for name, test, threshold, action in self._compiled
+                if name is None or name == device
+            )
+        return checks
+
+    def decide(self, value: float, device: str) -> Action | None:
+        for test, threshold, action in self.checks(device):
+            if test is None or test(value, threshold):
+                return action
+        return None
+
+
+def compile_rules(rules: Sequence[dict], intervals: Mapping[str, float] | None = None) -> dict[str, RuleSet]:
+    """Rule sets by sensor id, a reading only looks at the rules of its own sensor."""
+    by_sensor: dict[str, list[Rule]] = {}
+    for options in rules:
+        rule = parse_rule(options)
+        by_sensor.setdefault(rule.sensor, []).append(rule)
+    intervals = intervals or {}
+    return {sensor: RuleSet(sensor, rules, intervals.get(sensor, 0.0)) for sensor, rules in by_sensor.items()}
+
+
+rule_table = compile_rules(config.CONTROL_RULES, config.RULE_INTERVALS)
+
+
+class RuleController:
+    """Switches the controls of a reading as the sensor's rule set decides.
+
+    Subclasses name the `sensor` of a built-in rule set, sensors without a controller class get a plain
+    RuleController from `load_all_processors`.
+    """
+
+    sensor: str = None
+
+    def __init__(self, rule_set: RuleSet | None = None, clock=None):
+        self.rule_set = rule_set or rule_table[self.sensor]
+        self.clock = clock or get_clock()
+        self.last_decision_time = self.clock.monotonic()
+
+    async def __call__(self, sensor_data: SensorData, command_queue: Queue) -> None:
+        try:
+            rule_set = self.rule_set
+            # Preventing frequent switching of the device operating modes where the rule set asks for it
+            if rule_set.interval and self.clock.monotonic() - self.last_decision_time < rule_set.interval:
+                return
+
+            value = sensor_data.value
+            for ctrl in sensor_data.controls:
+                # RuleSet.decide inlined, this runs for every reading
+                for test, threshold, action in rule_set.checks(ctrl.device):
+                    if test is None or test(value, threshold):
+                        break
+                else:
+                    continue
+                device = get_device(ctrl)
+                if device is None:
+                    log.error(f"Unknown device: {ctrl.device}")
+                    continue
+                await device(action, ctrl, command_queue)
+            if rule_set.interval:
+                self.last_decision_time = self.clock.monotonic()
+                journal.record(controller_key(sensor_data), {"at": self.clock.time()})
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(f"{type(self).__name__}: {sensor_data}")
+        except Exception as e:
+            log.exception(f"Unexpected error: {e}")
+
+    def restore(self, entry: dict) -> None:
+        # A restart doesn't shorten the interval between decisions, nor does it hold up an overdue one
+        self.last_decision_time = monotonic_at(self.clock, entry["at"])
+
+    @property
+    def decision_interval(self):
+        return self.rule_set.interval
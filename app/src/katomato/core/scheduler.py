@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from asyncio import Queue
+from dataclasses import dataclass
+
+from katomato.core.instrumentation import probes
+from katomato.core.sensor_data import SensorData
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class MailboxStats:
+    depth: int = 0
+    max_depth: int = 0
+    submitted: int = 0
+    coalesced: int = 0  # readings superseded by a newer one for the same sensor
+    processed: int = 0
+    errors: int = 0
+
+
+class ControllerScheduler:
+    """Runs controllers from one mailbox per controller instance.
+
+    A controller instance handles one reading at a time in a single worker task, the instances of different
+    zones run side by side. Stats are kept per controller name. A reading that arrives while an
+    older one for the same sensor is still queued replaces it, so a slow controller always acts on the
+    latest value and the number of tasks and queued readings stays bounded whatever the sensor rate: a
+    mailbox holds one reading per sensor its controller gets, so a single one for the instances of the
+    controller table.
+    The worker exits once its mailbox is empty and is restarted by the next `submit`.
+    """
+
+    def __init__(self):
+        self.stats: dict[str, MailboxStats] = {}
+
+        self._mailboxes: dict[object, dict[tuple, tuple[SensorData, Queue, int]]] = {}  # by controller
+        self._workers: dict[object, asyncio.Task] = {}
+
+    def submit(self, name: str, controller, sensor_data: SensorData, command_queue: Queue) -> None:
+        mailbox = self._mailboxes.get(controller)
+        if mailbox is None:
+            mailbox = self._mailboxes[controller] = {}
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = MailboxStats()
+        stats.submitted += 1
+
+        key = sensor_data.board, sensor_data.zone, sensor_data.sensor
+        if key in mailbox:
+            del mailbox[key]  # re-inserted at the end, readings stay in arrival order
+            stats.coalesced += 1
+            stats.depth -= 1
+        mailbox[key] = (sensor_data, command_queue, time.perf_counter_ns())
+        stats.depth += 1
+        stats.max_depth = max(stats.max_depth, stats.depth)
+
+        if controller not in self._workers:
+            self._workers[controller] = asyncio.create_task(self._run(name, controller, mailbox, stats))
+
+    def depth(self, name: str) -> int:
+        """Readings queued for the controllers of `name`, all zones."""
+        stats = self.stats.get(name)
+        return stats.depth if stats else 0
+
+    @property
+    def active_workers(self) -> int:
+        return len(self._workers)
+
+    async def _run(self, name: str, controller, mailbox: dict, stats: MailboxStats) -> None:
+        try:
+            while mailbox:
+                sensor_data, command_queue, submitted = mailbox.pop(next(iter(mailbox)))
+                stats.depth -= 1
+                start = time.perf_counter_ns()
+                probes.record("mailbox", name, start - submitted)
+                try:
+                    await controller(sensor_data, command_queue)
+                    stats.processed += 1
+                    probes.since("controller", name, start)
+                    probes.since("reading", name, sensor_data.received_ns)
+                except Exception as e:
+                    stats.errors += 1
+                    log.exception(f"Controller {name} failed on {sensor_data}: {e}")
+        finally:
+            del self._workers[controller]
+            if not mailbox:
+                del self._mailboxes[controller]  # instances come and go with their zones
+
+    async def close(self) -> None:
+        """Cancels the workers, queued readings are discarded."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for mailbox in self._mailboxes.values():
+            mailbox.clear()
+        for stats in self.stats.values():
+            stats.depth = 0
+
+
+scheduler = ControllerScheduler()
@@ -1,5 +1,4 @@
-from dataclasses import dataclass
-from typing import List
+from typing import NamedTuple
 
 '''
 {
@@ -14,20 +13,25 @@ from typing import List
 }
 '''
 
-@dataclass
-class Control:
+# Immutable records, a NamedTuple is much cheaper to build than a frozen dataclass on the per-frame path
+class Control(NamedTuple):
     pin: int
     type: str
     device: str
+    board: str | None = None  # id of the board the device is wired to, set on receipt
 
-@dataclass
-class SensorData:
+class SensorData(NamedTuple):
     sensor: str
     label: str
     value: float
     unit: str
-    controls: List[Control]
+    controls: tuple[Control, ...]  # shared between readings of the same sensor, never mutate
+    board: str | None = None  # id of the board that sent the reading
+    received_ns: int = 0  # perf_counter_ns() when the bytes arrived, 0 if unknown
+    zone: str | None = None  # pot or tray of a board with several, sent before "controls"
 
-@dataclass
-class State:
+class State(NamedTuple):
     value: float
+
+class Duty(NamedTuple):
+    value: float  # 0..1 of the device's working range
@@ -1,84 +1,597 @@
 import asyncio
+import binascii
+import itertools
+import json
 import logging
+import math
 import os
+import struct
+import time
 from asyncio import BaseTransport, Queue
-
-import serial_asyncio
+from collections.abc import Callable
+from typing import NamedTuple
 
 from katomato.config import config
 from katomato.core.dispatcher import controller_dispatcher
-from katomato.core.utils.command_util import get_sensor_data
+from katomato.core.framing import LineFramer
+from katomato.core.instrumentation import probes
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.utils.command_util import build_arduino_command, get_sensor_data
 
 log = logging.getLogger(__name__)
 
+'''
+Binary telemetry frame, negotiated with the "telemetry" command:
+
+  SYNC (0xA5) | LEN (u8) | PAYLOAD (LEN bytes) | CRC16 (u16 LE, CRC-16/CCITT-FALSE over LEN and PAYLOAD)
+
+PAYLOAD starts with the frame type:
+  META     0x01 | idx u8 | id str | label str | unit str | control count u8 | (pin u8 | type str | device str)...
+  READING  0x02 | idx u8 | seq u16 LE | value f32 LE
+  ACK      0x03 | seq u16 LE | status u8 | reason str, status 0 is success
+
+str is u8 length followed by UTF-8 bytes. META frames are sent once per sensor after the handshake,
+READING frames replace the JSON lines from then on. JSON lines (errors) may still be interleaved.
+
+Commands carry a "seq" number, the firmware answers each one with an ACK frame, or with
+{"sensor": "ack", "value": seq} / {"sensor": "nack", "value": seq, "label": reason} lines in JSON mode.
+'''
+
+SYNC = 0xA5
+FRAME_META = 0x01
+FRAME_READING = 0x02
+FRAME_ACK = 0x03
+_READING = struct.Struct("<BBHf")
+_ACK = struct.Struct("<BHB")
+
+
+class Ack(NamedTuple):
+    seq: int
+    ok: bool
+    reason: str = ""
+
+
+def _crc16(data: bytes) -> int:
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(payload: bytes) -> bytes:
+    body = bytes([len(payload)]) + payload
+    return bytes([SYNC]) + body + _crc16(body).to_bytes(2, "little")
+
+
+def _encode_str(value: str) -> bytes:
+    data = value.encode()
+    return bytes([len(data)]) + data
+
+
+def encode_meta(idx: int, sensor: str, label: str, unit: str, controls: tuple[Control, ...]) -> bytes:
+    payload = bytes([FRAME_META, idx]) + _encode_str(sensor) + _encode_str(label) + _encode_str(unit)
+    payload += bytes([len(controls)])
+    for ctrl in controls:
+        payload += bytes([ctrl.pin]) + _encode_str(ctrl.type) + _encode_str(ctrl.device)
+    return encode_frame(payload)
+
+
+def encode_reading(idx: int, seq: int, value: float) -> bytes:
+    return encode_frame(_READING.pack(FRAME_READING, idx, seq & 0xFFFF, value))
+
+
+def encode_ack(seq: int, reason: str = "") -> bytes:
+    payload = _ACK.pack(FRAME_ACK, seq & 0xFFFF, 1 if reason else 0)
+    return encode_frame(payload + _encode_str(reason) if reason else payload)
+
+
+class TelemetryDecoder:
+    """Decodes binary telemetry frames interleaved with JSON lines.
+
+    `feed` returns decoded readings as SensorData, command acknowledgements as Ack and JSON lines as bytes. A frame with a bad CRC
+    is skipped by resynchronizing on the next SYNC byte or JSON line.
+    """
+
+    def __init__(self, max_line_length: int = 1024):
+        self.max_line_length = max_line_length
+        self.sensors = {}  # idx -> SensorData template from the META frame
+        self.crc_errors = 0
+        self.lost_frames = 0
+
+        self._buffer = bytearray()
+        self._last_seq = {}
+
+    @property
+    def pending(self) -> bytes:
+        return bytes(self._buffer)
+
+    def feed(self, data: bytes) -> list[SensorData | Ack | bytes]:
+        buffer = self._buffer
+        buffer += data
+        items = []
+        pos = 0
+        size = len(buffer)
+
+        while pos < size:
+            first = buffer[pos]
+            if first == SYNC:
+                if size - pos < 2:
+                    break
+                end = pos + buffer[pos + 1] + 4
+                if end > size:
+                    break
+                body = bytes(buffer[pos + 1:end - 2])
+                if _crc16(body) != int.from_bytes(buffer[end - 2:end], "little"):
+                    self.crc_errors += 1
+                    pos = self._resync(pos + 1)
+                    continue
+                try:
+                    reading = self._decode(body[1:])
+                except (struct.error, IndexError):
+                    log.warning(f"Malformed telemetry frame: {body.hex()}")
+                    reading = None
+                if reading:
+                    items.append(reading)
+                pos = end
+            elif first == ord("{"):
+                newline = buffer.find(b"\n", pos)
+                if newline == -1:
+                    if size - pos > self.max_line_length:
+                        pos = self._resync(pos + 1)
+                        continue
+                    break
+                items.append(bytes(buffer[pos:newline]))
+                pos = newline + 1
+            else:
+                pos = self._resync(pos + 1)  # line endings and noise between frames
+
+        del buffer[:pos]
+        return items
+
+    def _resync(self, pos: int) -> int:
+        candidates = [i for i in (self._buffer.find(SYNC, pos), self._buffer.find(b"{", pos)) if i != -1]
+        return min(candidates, default=len(self._buffer))
+
+    def _decode(self, payload: bytes) -> SensorData | Ack | None:
+        if payload[0] == FRAME_READING:
+            _, idx, seq, value = _READING.unpack(payload)
+            template = self.sensors.get(idx)
+            if template is None:
+                log.warning(f"Reading for unknown sensor index: {idx}")
+                return None
+            last = self._last_seq.get(idx)
+            if last is not None and seq != (last + 1) & 0xFFFF:
+                self.lost_frames += (seq - last - 1) & 0xFFFF
+            self._last_seq[idx] = seq
+            # Rounded to drop float32 noise, e.g. 21.299999. NaN and inf become None, as null in a JSON line does
+            value = round(value, 4) if math.isfinite(value) else None
+            return SensorData(template.sensor, template.label, value, template.unit, template.controls)
+        elif payload[0] == FRAME_ACK:
+            _, seq, status = _ACK.unpack_from(payload)
+            reason = payload[_ACK.size + 1:].decode("utf-8", errors="replace") if status else ""
+            return Ack(seq, status == 0, reason)
+        elif payload[0] == FRAME_META:
+            self._decode_meta(payload)
+        return None
+
+    def _decode_meta(self, payload: bytes) -> None:
+        idx = payload[1]
+        pos = 2
+
+        def read_str():
+            nonlocal pos
+            length = payload[pos]
+            value = payload[pos + 1:pos + 1 + length].decode("utf-8", errors="replace")
+            pos += 1 + length
+            return value
+
+        sensor, label, unit = read_str(), read_str(), read_str()
+        count = payload[pos]
+        pos += 1
+        controls = []
+        for _ in range(count):
+            pin = payload[pos]
+            pos += 1
+            controls.append(Control(pin, read_str(), read_str()))
+        self.sensors[idx] = SensorData(sensor, label, None, unit, tuple(controls))
+        self._last_seq.pop(idx, None)
+
+
+class CommandWriter:
+    """Paced, batched command writes.
+
+    Pending commands are joined into one write of at most `budget` bytes, the firmware's serial receive
+    buffer, and writes are paced to `budget` bytes per `interval`. The board can then stall its loop() for
+    up to `interval` without its receive buffer overflowing. A command that repeats the last value written
+    to its pin is dropped, a newer command to a pin replaces one still pending. `send` waits while a full
+    batch is pending, so commands keep waiting (and collapsing) in the priority command queue.
+    """
+
+    def __init__(self, write: Callable[[bytes], None], budget: int = 64, interval: float = 0.1):
+        self.write = write
+        self.budget = budget
+        self.interval = interval
+        self.writes = 0
+        self.written = 0
+        self.deduplicated = 0
+
+        self._pending = {}  # key -> (value, line)
+        self._pending_bytes = 0
+        self._last_written = {}  # (command, pin) -> value
+        self._unique_keys = itertools.count()
+        self._can_write = asyncio.Event()
+        self._can_write.set()
+        self._room = asyncio.Event()
+        self._task = None
+        self._last_size = 0
+
+    async def send(self, command: str, dedupe: bool = True) -> None:
+        while self._pending_bytes >= self.budget:
+            self._room.clear()
+            await self._room.wait()
+        self.send_nowait(command, dedupe)
+
+    def send_nowait(self, command: str, dedupe: bool = True) -> None:
+        key, value = self._key(command)
+        if key in self._pending:
+            self._pending_bytes -= len(self._pending.pop(key)[1])
+        if dedupe and self.redundant(command):
+            return
+
+        line = command.encode() + b"\n"
+        self._pending[key] = (value, line)
+        self._pending_bytes += len(line)
+        if self._task is None:
+            if self._can_write.is_set():
+                self._write_batch()
+            self._task = asyncio.create_task(self._run())
+
+    def redundant(self, command: str) -> bool:
+        """Whether the command repeats the last value written to its pin and nothing else is pending for it."""
+        key, value = self._key(command)
+        if key in self._pending or key not in self._last_written or self._last_written[key] != value:
+            return False
+        self.deduplicated += 1
+        log.debug(f"Redundant command dropped: {command}")
+        return True
+
+    def forget(self, command: str) -> None:
+        """The board may not have applied the last value written to the command's pin."""
+        self._last_written.pop(self._key(command)[0], None)
+
+    def pause(self) -> None:
+        self._can_write.clear()
+
+    def resume(self) -> None:
+        self._can_write.set()
+
+    def reset(self) -> None:
+        """Forgets pending commands and the written values, the board resets on reconnect."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._last_written.clear()
+        self._can_write.set()
+        self._room.set()
+
+    async def _run(self) -> None:
+        task = asyncio.current_task()
+        try:
+            while True:
+                await asyncio.sleep(self.interval * self._last_size / self.budget)
+                if not self._pending:
+                    return
+                await self._can_write.wait()
+                self._write_batch()
+        finally:
+            if self._task is task:
+                self._task = None
+
+    def _write_batch(self) -> None:
+        lines = []
+        size = 0
+        for key, (value, line) in list(self._pending.items()):
+            if lines and size + len(line) > self.budget:
+                break
+            del self._pending[key]
+            lines.append(line)
+            size += len(line)
+            if not isinstance(key, int):
+                self._last_written[key] = value
+
+        self._pending_bytes -= size
+        self._last_size = size
+        self.write(b"".join(lines))
+        self.writes += 1
+        self.written += len(lines)
+        log.debug(f"Wrote {len(lines)} commands, {size} bytes")
+        self._room.set()
+
+    def _key(self, command: str):
+        try:
+            data = json.loads(command)
+            return (data["command"], data["pin"]), data["value"]
+        except (ValueError, TypeError, KeyError):
+            return next(self._unique_keys), None
+
+
+class _Inflight:
+    __slots__ = ("attempts", "command", "key", "timer")
+
+    def __init__(self, command: str, key):
+        self.command = command
+        self.key = key
+        self.attempts = 1
+        self.timer = None
+
+
+class InflightTable:
+    """Sequence numbers, acknowledgement tracking and retries for outbound commands.
+
+    Up to `window` commands may wait for their ACK at the same time, `track` waits for a free slot. A command
+    without an ACK after `timeout` is retransmitted up to `retries` times. A newer command to the same pin
+    supersedes one still in flight, only the latest value is worth retrying. Firmware that never acknowledges
+    anything is detected when the first command runs out of retries, commands are untracked from then on.
+    """
+
+    def __init__(
+            self,
+            retransmit: Callable[[str], None],
+            on_failed: Callable[[str], None] | None = None,
+            window: int = 4,
+            timeout: float = 1.0,
+            retries: int = 3,
+    ):
+        self.retransmit = retransmit
+        self.on_failed = on_failed  # a NACKed or expired command, the board may not have applied it
+        self.window = window
+        self.timeout = timeout
+        self.retries = retries
+        self.supported = None  # unknown until the first ACK or the first expired command
+
+        self.acked = 0
+        self.nacked = 0
+        self.retried = 0
+        self.expired = 0
+        self.superseded = 0
+
+        self._entries: dict[int, _Inflight] = {}
+        self._latest = {}  # (command, pin) -> seq
+        self._seq = 0
+        self._slot_free = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def track(self, command: str) -> str:
+        """Returns the command stamped with its sequence number."""
+        if self.supported is False:
+            return command
+        try:
+            data = json.loads(command)
+            key = data["command"], data["pin"]
+        except (ValueError, TypeError, KeyError):
+            return command
+
+        self._supersede(key)
+        while len(self._entries) >= self.window:
+            self._slot_free.clear()
+            await self._slot_free.wait()
+            if self.supported is False:
+                return command
+        self._supersede(key)  # a newer command may have been tracked while waiting
+
+        seq = self._seq
+        self._seq = (seq + 1) & 0xFFFF
+        entry = _Inflight(json.dumps(data | {"seq": seq}), key)
+        self._entries[seq] = entry
+        self._latest[key] = seq
+        self._start_timer(seq, entry)
+        return entry.command
+
+    def ack(self, ack: Ack) -> None:
+        entry = self._pop(ack.seq)
+        if entry is None:
+            return  # superseded or already expired
+        self.supported = True
+        if ack.ok:
+            self.acked += 1
+        else:
+            self.nacked += 1
+            log.warning(f"Arduino rejected {entry.command}: {ack.reason}")
+            if self.on_failed:
+                self.on_failed(entry.command)
+
+    def reset(self) -> None:
+        for entry in self._entries.values():
+            entry.timer.cancel()
+        self._entries.clear()
+        self._latest.clear()
+        self._slot_free.set()
+
+    def _supersede(self, key) -> None:
+        seq = self._latest.get(key)
+        if seq is not None and self._pop(seq):
+            self.superseded += 1
+
+    def _pop(self, seq: int) -> _Inflight | None:
+        entry = self._entries.pop(seq, None)
+        if entry is None:
+            return None
+        entry.timer.cancel()
+        if self._latest.get(entry.key) == seq:
+            del self._latest[entry.key]
+        self._slot_free.set()
+        return entry
+
+    def _start_timer(self, seq: int, entry: _Inflight) -> None:
+        entry.timer = asyncio.get_running_loop().call_later(self.timeout, self._expire, seq)
+
+    def _expire(self, seq: int) -> None:
+        entry = self._entries.get(seq)
+        if entry is None:
+            return
+        if entry.attempts <= self.retries:
+            entry.attempts += 1
+            self.retried += 1
+            log.warning(f"No ACK for {entry.command}, retry {entry.attempts - 1}/{self.retries}")
+            self.retransmit(entry.command)
+            self._start_timer(seq, entry)
+            return
+
+        self._pop(seq)
+        self.expired += 1
+        if self.on_failed:
+            self.on_failed(entry.command)
+        if self.supported is None:
+            log.warning("Firmware does not acknowledge commands, sending them unacknowledged")
+            self.supported = False
+            self.reset()
+        else:
+            log.error(f"Command not acknowledged after {self.retries} retries: {entry.command}")
+
 
 class ArduinoProtocol(asyncio.Protocol):
-    def __init__(self, command_queue: Queue, on_connection_lost=None):
+    def __init__(self, command_queue: Queue, on_connection_lost=None, board: str | None = None):
         self.command_queue = command_queue
+        self.board = board
         self.transport = None
-        self.buffer = ""  # Buffer to store incoming data
+        self.framer = LineFramer(max_line_length=config.SERIAL_MAX_LINE_LENGTH)  # Buffers incoming data
+        self.writer = CommandWriter(
+            lambda data: self.transport.write(data),
+            budget=config.SERIAL_WRITE_BUDGET,
+            interval=config.SERIAL_WRITE_INTERVAL,
+        )
+        self.inflight = InflightTable(
+            self._retransmit,
+            on_failed=self.writer.forget,
+            window=config.SERIAL_ACK_WINDOW,
+            timeout=config.SERIAL_ACK_TIMEOUT,
+            retries=config.SERIAL_ACK_RETRIES,
+        )
+        self.telemetry = None  # TelemetryDecoder once binary telemetry is requested
         self.on_connection_lost = on_connection_lost  # Callback
+        self._negotiation_timer = None
+        self._telemetry_failed = False
+        self._board_controls = {}  # id(controls) -> (controls, controls stamped with the board)
 
     def data_received(self, data: bytes) -> None:
+        received = time.perf_counter_ns()
+        if self.telemetry:
+            items = self.telemetry.feed(data)
+            if self._negotiation_timer and self.telemetry.sensors:
+                self._negotiation_timer.cancel()
+                self._negotiation_timer = None
+                log.info(f"Binary telemetry negotiated for {len(self.telemetry.sensors)} sensors")
+        else:
+            items = self.framer.feed(data)  # Complete lines only, a partial line stays in the framer
+
+        for item in items:
+            if isinstance(item, SensorData):
+                controller_dispatcher(self._from_board(item, received), self.command_queue)
+                continue
+            if isinstance(item, Ack):
+                self.inflight.ack(item)
+                continue
+
+            striped_line = item.strip()
+            if os.environ.get("APP_MODE") == "arduino_debug":
+                log.info(f"Debug mode: {striped_line.decode('utf-8', errors='ignore')}")
+            else:
+                sensor_data = get_sensor_data(striped_line)
+                if sensor_data:
+                    if sensor_data.sensor in ("ack", "nack"):
+                        self.inflight.ack(Ack(sensor_data.value, sensor_data.sensor == "ack", sensor_data.label))
+                    elif sensor_data.sensor == "error":
+                        log.warning(f"Arduino error: {sensor_data.value}")
+                        if self._negotiation_timer:
+                            self._negotiation_failed()
+                    else:
+                        controller_dispatcher(self._from_board(sensor_data, received), self.command_queue)
+                        if self.telemetry is None and self._binary_telemetry_wanted:
+                            self._negotiate_telemetry()
+        probes.since("receive", self.board, received)
 
-        self.buffer += data.decode("utf-8", errors="ignore")
-
-        if "\n" in self.buffer:
-            lines = self.buffer.split("\n")
-            for line in lines[
-                        :-1
-                        ]:  # Process all lines except the last one (partial data)
-                striped_line = line.strip()
-                if os.environ.get("APP_MODE") == "arduino_debug":
-                    log.info(f"Debug mode: {striped_line}")
-                else:
-                    sensor_data = get_sensor_data(striped_line)
-                    if sensor_data:
-                        if sensor_data.sensor == "error":
-                            log.warning(f"Arduino error: {sensor_data.value}")
-                        else:
-                            controller_dispatcher(sensor_data, self.command_queue)
-
-            self.buffer = lines[-1]  # Keep the last partial line (if any) in the buffer
-
-        if self.buffer and self.buffer.endswith("\n"):
-            self.buffer = ""
+    def _from_board(self, sensor_data: SensorData, received_ns: int = 0) -> SensorData:
+        if self.board is None:
+            return sensor_data
+        controls = sensor_data.controls
+        cached = self._board_controls.get(id(controls))
+        if cached is None or cached[0] is not controls:
+            if len(self._board_controls) >= 256:
+                self._board_controls.clear()
+            cached = controls, tuple(ctrl._replace(board=self.board) for ctrl in controls)
+            self._board_controls[id(controls)] = cached
+        return SensorData(sensor_data.sensor, sensor_data.label, sensor_data.value, sensor_data.unit, cached[1],
+                          self.board, received_ns, sensor_data.zone)
+
+    @property
+    def _binary_telemetry_wanted(self) -> bool:
+        return (
+                config.TELEMETRY_PROTOCOL == "binary"
+                and not self._telemetry_failed
+                and self.transport is not None
+                and os.environ.get("APP_MODE") != "arduino_debug"
+        )
+
+    def _negotiate_telemetry(self) -> None:
+        # Started after the first JSON frame, the board is up and its sensors are known to work
+        self.telemetry = TelemetryDecoder(self.framer.max_line_length)
+        self.telemetry.feed(self.framer.pending)
+        self.framer.reset()
+        self.transport.write(build_arduino_command("telemetry", 0, 1).encode() + b"\n")
+        self._negotiation_timer = asyncio.get_running_loop().call_later(
+            config.TELEMETRY_HANDSHAKE_TIMEOUT, self._negotiation_failed
+        )
+
+    def _negotiation_failed(self) -> None:
+        log.warning("Binary telemetry is not supported by the firmware, using JSON")
+        if self._negotiation_timer:
+            self._negotiation_timer.cancel()
+            self._negotiation_timer = None
+        self.framer.feed(self.telemetry.pending)  # A partial line at most, nothing is returned
+        self.telemetry = None
+        self._telemetry_failed = True
+
+    def _retransmit(self, command: str) -> None:
+        if self.transport:
+            self.writer.send_nowait(command, dedupe=False)
 
     def connection_made(self, transport: BaseTransport) -> None:
         self.transport = (
             transport  # The transport object represents the serial connection
         )
+        self.framer.reset()
+        self.writer.reset()
+        self.inflight.reset()
+        self.telemetry = None
+        self._telemetry_failed = False
         log.info("Connected to Arduino")
 
     def connection_lost(self, exc: Exception | None) -> None:
-        log.info("Connection lost", exc)
+        log.info(f"Connection lost: {exc}")
+        self.transport = None
+        if self._negotiation_timer:
+            self._negotiation_timer.cancel()
+            self._negotiation_timer = None
+        self.writer.reset()
+        self.inflight.reset()
         if self.on_connection_lost:
             asyncio.create_task(self.on_connection_lost())  # Trigger reconnection
 
+    def pause_writing(self) -> None:
+        self.writer.pause()
+
+    def resume_writing(self) -> None:
+        self.writer.resume()
+
     async def send_command(self, command: str) -> None:
         """Send a command to Arduino."""
         if command and self.transport:
-            log.info(f"Sending command to Arduino: {command}")
-            self.transport.write(command.encode())
+            log.debug(f"Sending command to Arduino: {command}")
+            if self.writer.redundant(command):
+                return
+            command = await self.inflight.track(command)
+            await self.writer.send(command, dedupe=False)
         else:
             log.warning("Empty command ignored.")
 
-
-async def serial_connection_loop(command_queue: Queue) -> ArduinoProtocol:
-    loop = asyncio.get_running_loop()
-
-    async def reconnect():
-        log.info("Attempting to reconnect in 5 seconds...")
-        await asyncio.sleep(5)
-        await establish_serial_connection()  # reconnects, but you don't need to store the protocol
-
-    async def establish_serial_connection():
-        transport, protocol = await serial_asyncio.create_serial_connection(
-            loop,
-            lambda: ArduinoProtocol(command_queue, on_connection_lost=reconnect),
-            config.SERIAL_PORT,
-            baudrate=config.BAUD_RATE,
-        )
-        return protocol
-
-    return await establish_serial_connection()
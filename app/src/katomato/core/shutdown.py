@@ -1,13 +1,15 @@
 import asyncio
 import logging
 
+from katomato.core.scheduler import scheduler
+
 log = logging.getLogger(__name__)
 
 
 class ShutdownHandler:
-    def __init__(self, command_queue, arduino_protocol) -> None:
+    def __init__(self, command_queue, connections) -> None:
         self.command_queue = command_queue
-        self.arduino_protocol = arduino_protocol
+        self.connections = connections
         self._shutdown_event = asyncio.Event()
 
     async def start(self):
@@ -20,9 +22,8 @@ class ShutdownHandler:
         self._shutdown_event.set()
 
     async def shutdown(self):
-        if self.arduino_protocol.transport:
-            self.arduino_protocol.transport.close()
-            log.info("Serial connection closed.")
+        await scheduler.close()
+        await self.connections.close()
 
         await asyncio.sleep(0.5)
         loop = asyncio.get_running_loop()
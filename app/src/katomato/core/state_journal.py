@@ -0,0 +1,253 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from katomato.config import config
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.registry import CONTROLLERS, DEVICES
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.utils.command_util import build_arduino_command
+
+log = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jnl"
+SNAPSHOT_FILE = "snapshot.json"
+MANUAL_PHASE = ("phase",)  # a phase set by the `phase` command, the schedule stays stopped after a restart
+
+
+class StateJournal:
+    """Latest state by key, such as a device's output, kept across restarts in an append-only journal.
+
+    A record is a JSON line [key, value] appended to the active segment and flushed at once, so a crash of the
+    process loses nothing, `run` fsyncs every `fsync_interval` seconds against power loss. After
+    `snapshot_records` records the active segment is closed and the whole state written to a snapshot naming
+    the first segment to replay, the segments before it are deleted. Loading reads the snapshot and replays
+    the segments after it, a record torn by a crash is skipped. Without a `directory` the journal lives in
+    memory only.
+    """
+
+    def __init__(self, directory: str | None, fsync_interval: float = 1.0, snapshot_records: int = 1000):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_records = snapshot_records
+        self.entries: dict[tuple, dict] = {}
+        self.written = 0  # records since the last snapshot
+        self.torn = 0  # records skipped by the last load
+
+        self._loaded = False
+        self._segment = 1  # id of the active segment
+        self._file = None
+        self._unsynced = False
+
+    def get(self, key: tuple) -> dict | None:
+        return self.load().get(key)
+
+    def record(self, key: tuple, value: dict) -> None:
+        entries = self.load()
+        if entries.get(key) == value:
+            return
+        entries[key] = value
+        if self.directory is None:
+            return
+        try:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self._path(self._segment), "ab")
+            self._file.write(json.dumps([key, value]).encode() + b"\n")
+            self._file.flush()
+            self._unsynced = True
+            self.written += 1
+        except (OSError, TypeError, ValueError) as e:
+            log.exception(f"State journal write failed, {key} is not restored after a restart: {e}")
+
+    def load(self) -> dict[tuple, dict]:
+        """The journaled state, read from disk on first use."""
+        if self._loaded or self.directory is None:
+            return self.entries
+        self._loaded = True
+        if not os.path.isdir(self.directory):
+            return self.entries
+
+        first = 0
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_FILE)) as f:
+                snapshot = json.load(f)
+            self.entries.update((tuple(key), value) for key, value in snapshot["entries"])
+            first = snapshot["segment"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"State snapshot unreadable, replaying the journal alone: {e}")
+
+        ids = sorted(
+            int(name.removesuffix(SEGMENT_SUFFIX))
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        for segment_id in ids:
+            if segment_id < first:
+                self._delete(segment_id)  # left by a crash right after the snapshot
+            else:
+                self._replay(segment_id)
+        # Never append to a segment of a previous run, it may end with a torn record
+        self._segment = max(ids[-1] + 1 if ids else 1, first)
+        if self.torn:
+            log.warning(f"State journal: {self.torn} torn records skipped")
+        return self.entries
+
+    async def run(self) -> None:
+        if self.directory is None:
+            return
+        try:
+            while True:
+                await asyncio.sleep(self.fsync_interval)
+                if self.written >= self.snapshot_records:
+                    await self.compact()
+                elif self._unsynced:
+                    self._unsynced = False
+                    await asyncio.to_thread(os.fsync, self._file.fileno())
+        finally:
+            self.close()
+
+    async def compact(self) -> None:
+        """Writes the state to a snapshot, records from now on go to a new segment."""
+        if self.directory is None:
+            return
+        segment, self._file = self._file, None
+        self._segment += 1
+        self.written = 0
+        self._unsynced = False
+        # The values are replaced on every record, never changed, a shallow copy is a consistent state
+        snapshot = {"segment": self._segment, "entries": list(self.load().items())}
+        await asyncio.to_thread(self._write_snapshot, segment, snapshot)
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                os.fsync(self._file.fileno())
+                self._file.close()
+            except OSError as e:
+                log.exception(f"State journal close failed: {e}")
+            self._file = None
+
+    def _replay(self, segment_id: int) -> None:
+        with open(self._path(segment_id), "rb") as f:
+            for line in f:
+                try:
+                    key, value = json.loads(line)
+                    self.entries[tuple(key)] = value
+                except (ValueError, TypeError):
+                    self.torn += 1
+                    continue
+                self.written += 1
+
+    def _write_snapshot(self, segment, snapshot: dict) -> None:
+        try:
+            if segment is not None:
+                os.fsync(segment.fileno())
+                segment.close()
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            # The segments are kept, the next load replays them
+            log.exception(f"State snapshot write failed: {e}")
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(SEGMENT_SUFFIX) and int(name.removesuffix(SEGMENT_SUFFIX)) < snapshot["segment"]:
+                self._delete(int(name.removesuffix(SEGMENT_SUFFIX)))
+
+    def _path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:08d}{SEGMENT_SUFFIX}")
+
+    def _delete(self, segment_id: int) -> None:
+        try:
+            os.remove(self._path(segment_id))
+        except FileNotFoundError:
+            pass
+
+
+journal = StateJournal(
+    config.STATE_JOURNAL_DIR, config.STATE_JOURNAL_FSYNC_INTERVAL, config.STATE_JOURNAL_SNAPSHOT_RECORDS
+)
+
+
+def device_key(ctrl: Control) -> tuple:
+    return "device", ctrl.device, ctrl.board, ctrl.pin
+
+
+def controller_key(sensor_data: SensorData) -> tuple:
+    return "controller", sensor_data.sensor, sensor_data.board, sensor_data.zone
+
+
+def monotonic_at(clock, at: float) -> float:
+    """The clock's monotonic time of a journaled UNIX time, monotonic time starts anew with the process."""
+    return clock.monotonic() - max(0.0, clock.time() - at)
+
+
+def restore_state() -> int:
+    """Hands the journaled state to the devices and controllers it belongs to, returns their number.
+
+    Their instances are created here, before the first reading, so a device compares the first command
+    with its output before the restart instead of an assumed off. A device's `restore` returns the value
+    its pin is reconciled to, which `reconcile` sends once the board is connected.
+    """
+    start = time.perf_counter()
+    restored = 0
+    for key, entry in list(journal.load().items()):
+        kind, *instance_key = key
+        if key == MANUAL_PHASE:
+            phase_cls = config.get_growth_phases().get(entry.get("name"))
+            if phase_cls is None:
+                log.warning(f"Journaled phase {entry.get('name')} is unknown, ignored")
+                continue
+            config.switch_growth_phase(phase_cls)
+        elif kind == "device":
+            device = DEVICES.get(tuple(instance_key))
+            if not hasattr(device, "restore"):
+                log.warning(f"Journaled state of {key} ignored, the device is not restorable")
+                continue
+            value = device.restore(entry)
+            if value != entry.get("value"):
+                journal.record(key, {**entry, "value": value})
+        elif kind == "controller":
+            controller = CONTROLLERS.get(tuple(instance_key))
+            if not hasattr(controller, "restore"):
+                continue
+            controller.restore(entry)
+        else:
+            continue
+        restored += 1
+    log.info(f"Restored {restored} journaled states in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return restored
+
+
+async def reconcile(connections, command_queue: PriorityCommandQueue) -> None:
+    """Sends the outputs the devices assume to every board once it is connected.
+
+    The firmware starts with its pins off, or keeps the outputs of before the restart if only this process
+    restarted, either way the board ends up with the journaled outputs.
+    """
+    await asyncio.gather(*(
+        _reconcile(board, connection, connections.default_board, command_queue)
+        for board, connection in connections.connections.items()
+    ))
+
+
+async def _reconcile(board: str, connection, default_board: str, command_queue: PriorityCommandQueue) -> None:
+    await connection.connected.wait()
+    sent = 0
+    for key, entry in list(journal.load().items()):
+        if key[0] != "device" or (key[2] or default_board) != board or entry.get("value") is None:
+            continue
+        _, name, device_board, pin = key
+        lane = getattr(DEVICES.instances.get((name, device_board, pin)), "lane", Lane.ACTUATION)
+        await command_queue.put(build_arduino_command(entry["type"], pin, entry["value"], device_board), lane)
+        sent += 1
+    if sent:
+        log.info(f"Board {board}: {sent} journaled outputs re-sent")
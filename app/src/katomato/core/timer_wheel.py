@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import logging
+import math
+from collections.abc import Callable
+
+from katomato.config import config
+from katomato.core.clock import get_clock
+
+log = logging.getLogger(__name__)
+
+
+class TimerEntry:
+    __slots__ = ("callback", "cancelled", "rounds", "when")
+
+    def __init__(self, when: float, callback: Callable, rounds: int):
+        self.when = when  # planned, fires at most one tick later
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timing wheel for timed device actions such as stopping a pump.
+
+    One driver task serves every timer: it wakes up once per `tick` while timers are pending and exits once
+    the wheel is empty, the next `schedule` restarts it. Scheduling and cancelling are O(1), a timer fires
+    within one tick after its deadline. A callback may return a coroutine, it is run as a task.
+    """
+
+    def __init__(self, tick: float = 0.1, slots: int = 512, clock=None):
+        self.tick = tick
+        self.clock = clock
+        self.fired = 0
+        self.cancelled = 0
+
+        self._slots: list[list[TimerEntry]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._pending = 0
+        self._origin = 0.0  # time of tick 0 of the running driver
+        self._ticks = 0
+        self._task = None
+        self._callbacks = set()  # running coroutine callbacks
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def schedule(self, delay: float, callback: Callable) -> TimerEntry:
+        clock = self.clock or get_clock()
+        now = clock.monotonic()
+        loop = asyncio.get_running_loop()
+        running = self._task is not None and not self._task.done() and self._task.get_loop() is loop
+        if running:
+            # The next slot fires at the next tick, not a full tick from now
+            ticks = max(1, math.ceil((now + delay - self._next_tick()) / self.tick) + 1)
+        else:
+            self._origin, self._ticks = now, 1
+            ticks = max(1, math.ceil(delay / self.tick))
+
+        entry = TimerEntry(now + delay, callback, (ticks - 1) // len(self._slots))
+        self._slots[(self._cursor + ticks) % len(self._slots)].append(entry)
+        self._pending += 1
+        if not running:
+            self._task = loop.create_task(self._run(clock))
+        return entry
+
+    def _next_tick(self) -> float:
+        return self._origin + self._ticks * self.tick
+
+    async def _run(self, clock) -> None:
+        while self._pending:
+            await clock.sleep(max(0.0, self._next_tick() - clock.monotonic()))
+            self._ticks += 1
+            self._advance()
+
+    def _advance(self) -> None:
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        slot = self._slots[self._cursor]
+        if not slot:
+            return
+
+        due = []
+        waiting = []
+        for entry in slot:
+            if entry.cancelled:
+                self.cancelled += 1
+            elif entry.rounds:
+                entry.rounds -= 1
+                waiting.append(entry)
+            else:
+                due.append(entry)
+        self._slots[self._cursor] = waiting
+        self._pending -= len(slot) - len(waiting)
+
+        for entry in due:
+            self.fired += 1
+            try:
+                result = entry.callback()
+            except Exception as e:
+                log.exception(f"Timer callback failed: {e}")
+                continue
+            if inspect.isawaitable(result):
+                task = asyncio.ensure_future(result)
+                self._callbacks.add(task)
+                task.add_done_callback(self._callbacks.discard)
+
+
+timers = TimerWheel(tick=config.TIMER_WHEEL_TICK, slots=config.TIMER_WHEEL_SLOTS)
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+from asyncio import AbstractEventLoop, BaseProtocol, BaseTransport
+from collections.abc import Callable
+
+import serial_asyncio
+
+log = logging.getLogger(__name__)
+
+TRANSPORT_REGISTRY = {}
+LOOPBACK_BOARDS = {}
+
+
+def transport_registry(name):
+    def decorator(func):
+        TRANSPORT_REGISTRY[name] = func
+        return func
+
+    return decorator
+
+
+async def open_transport(
+        loop: AbstractEventLoop, protocol_factory: Callable[[], BaseProtocol], transport: str = "serial", **options
+) -> tuple[BaseTransport, BaseProtocol]:
+    connect = TRANSPORT_REGISTRY.get(transport)
+    if connect is None:
+        raise ValueError(f"Unknown transport: {transport}")
+    return await connect(loop, protocol_factory, **options)
+
+
+@transport_registry("serial")
+async def serial_transport(loop, protocol_factory, port: str, baudrate: int = 9600):
+    return await serial_asyncio.create_serial_connection(loop, protocol_factory, port, baudrate=baudrate)
+
+
+@transport_registry("tcp")
+async def tcp_transport(loop, protocol_factory, host: str, port: int):
+    # e.g. ser2net or an ESP-Link bridge in front of the board
+    return await loop.create_connection(protocol_factory, host, port)
+
+
+@transport_registry("loopback")
+async def loopback_transport(loop, protocol_factory, name: str):
+    board = LOOPBACK_BOARDS.get(name)
+    if board is None:
+        raise ConnectionRefusedError(f"No loopback board: {name}")
+    protocol = protocol_factory()
+    transport = LoopbackTransport(loop, protocol, board)
+    protocol.connection_made(transport)
+    board.connection_made(transport)
+    return transport, protocol
+
+
+class LoopbackBoard:
+    """The board side of a loopback transport, e.g. a simulated Arduino.
+
+    Registered by name in LOOPBACK_BOARDS. `received` gets the bytes written by the host, `send` delivers
+    bytes to the host protocol on the next loop iteration, like data read from a serial port.
+    """
+
+    def __init__(self):
+        self.transport = None
+
+    def connection_made(self, transport: "LoopbackTransport") -> None:
+        self.transport = transport
+
+    def connection_lost(self) -> None:
+        self.transport = None
+
+    def received(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def send(self, data: bytes) -> None:
+        if self.transport:
+            self.transport.deliver(data)
+
+
+class LoopbackTransport(asyncio.Transport):
+    def __init__(self, loop: AbstractEventLoop, protocol: BaseProtocol, board: LoopbackBoard):
+        super().__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self._board = board
+        self._closing = False
+
+    def write(self, data: bytes) -> None:
+        if not self._closing:
+            self._board.received(bytes(data))
+
+    def deliver(self, data: bytes) -> None:
+        if not self._closing:
+            self._loop.call_soon(self._protocol.data_received, data)
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        self._board.connection_lost()
+        self._loop.call_soon(self._protocol.connection_lost, None)
+
+    def abort(self) -> None:
+        self.close()
+
+    def get_write_buffer_size(self) -> int:
+        return 0
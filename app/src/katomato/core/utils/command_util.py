@@ -3,20 +3,88 @@ import logging
 
 from katomato.core.sensor_data import Control, SensorData
 
+try:
+    # Optional faster JSON backend, installed with the `fast` extra
+    from orjson import loads as json_loads
+except ImportError:
+    def json_loads(data: bytes):
+        # json.loads detects the encoding of bytes on every call, the firmware only sends UTF-8
+        return json.loads(data.decode())
+
 log = logging.getLogger(__name__)
 
+CONTROLS_KEY = b'"controls"'
+CONTROLS_CACHE_SIZE = 256
+
+# (sensor, raw controls bytes) -> decoded controls, False if keys follow the controls array. The firmware
+# sends the same controls for a sensor on every reading, so they are decoded once and the same tuple is shared
+# by all readings.
+_controls_cache: dict[tuple[str, bytes], tuple[Control, ...] | bool] = {}
+
 
-def build_arduino_command(command_type: str, pin: int, value: int | float) -> str:
-    return json.dumps({"command": command_type, "pin": pin, "value": value})
+def build_arduino_command(command_type: str, pin: int, value: int | float, board: str | None = None) -> str:
+    command = {"command": command_type, "pin": pin, "value": value}
+    if board is not None:
+        command["board"] = board  # routing only, removed before the command is sent
+    return json.dumps(command)
 
 
-def get_sensor_data(line: str) -> SensorData | None:
+def get_sensor_data(line: str | bytes) -> SensorData | None:
     if not line:
         return None
+    if isinstance(line, str):
+        line = line.encode()
+    try:
+        return _decode_cached(line) or _decode(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        log.error(f"Invalid JSON: {line.decode('utf-8', errors='replace')}")
+        return None
+
+
+def _decode_cached(line: bytes) -> SensorData | None:
+    """Fast path for frames ending with the controls array: only the scalar head is parsed."""
+    idx = line.rfind(CONTROLS_KEY)
+    if idx == -1:
+        return None
     try:
-        data = json.loads(line)
-        data["controls"] = [Control(**ctrl) for ctrl in data.get("controls", [])]
-        return SensorData(**data)
-    except json.JSONDecodeError:
-        log.error(f"Invalid JSON: {line}")
+        head = json_loads(line[:idx].rstrip().rstrip(b",") + b"}")
+    except ValueError:
         return None
+    if not isinstance(head, dict) or "sensor" not in head or "value" not in head:
+        return None
+
+    tail = line[idx:]
+    key = (head["sensor"], tail)
+    controls = _controls_cache.get(key)
+    if controls is None:
+        try:
+            data = json_loads(b"{" + tail)
+            # Keys after the controls array, e.g. a zone, are not in the head, the full parse keeps them
+            controls = _to_controls(data["controls"]) if len(data) == 1 else False
+        except (ValueError, TypeError, KeyError):
+            return None  # controls is not the last key
+        if len(_controls_cache) >= CONTROLS_CACHE_SIZE:
+            _controls_cache.clear()
+        _controls_cache[key] = controls
+    if controls is False:
+        return None
+
+    return _to_sensor_data(head, controls)
+
+
+def _decode(line: bytes) -> SensorData | None:
+    data = json_loads(line)
+    if not isinstance(data, dict) or "sensor" not in data:
+        log.error(f"Invalid sensor data: {line.decode('utf-8', errors='replace')}")
+        return None
+    return _to_sensor_data(data, _to_controls(data.get("controls", ())))
+
+
+def _to_controls(controls: list[dict]) -> tuple[Control, ...]:
+    return tuple(Control(ctrl["pin"], ctrl["type"], ctrl["device"]) for ctrl in controls)
+
+
+def _to_sensor_data(data: dict, controls: tuple[Control, ...]) -> SensorData:
+    # label, unit and controls are absent from error frames: {"sensor": "error", "value": "..."}
+    return SensorData(data["sensor"], data.get("label", ""), data.get("value"), data.get("unit", ""), controls,
+                      zone=data.get("zone"))
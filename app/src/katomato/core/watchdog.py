@@ -0,0 +1,146 @@
+import asyncio
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from katomato.config import config
+from katomato.core.instrumentation import probes
+from katomato.core.registry import Action, get_device
+from katomato.core.sensor_data import Control
+
+log = logging.getLogger(__name__)
+
+STACK_DEPTH = 12  # innermost frames kept per sample
+
+
+@dataclass(slots=True)
+class Stall:
+    started: float  # UNIX time of the last heartbeat before the stall
+    lag: float  # s, updated while the stall lasts
+    task: str  # the task holding the loop, or the callback's innermost function
+    stack: str
+
+
+class LoopWatchdog:
+    """Detects an event loop blocked by a synchronous call and finds the culprit.
+
+    A heartbeat task on the loop records the loop lag every `interval`. A monitor thread checks the heartbeat:
+    once it is `threshold` late the loop thread's stack and the current task are sampled into `stalls`,
+    once it is `alarm` late the alarm handlers are scheduled. They run as soon as the loop is free again,
+    the stall is logged from the monitor thread right away.
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25, alarm: float = 5.0, history: int = 32):
+        self.interval = interval
+        self.threshold = threshold
+        self.alarm = alarm
+        self.stalls: deque[Stall] = deque(maxlen=history)
+        self.alarms = 0
+
+        self._handlers: list[Callable] = []
+        self._alarm_tasks = set()  # running async alarm handlers
+        self._beat = None
+        self._loop = None
+        self._loop_thread = None
+        self._stopped = threading.Event()
+
+    def on_alarm(self, handler: Callable[[Stall], object]) -> None:
+        """`handler(stall)` is called on the loop for every stall longer than `alarm`, it may be async."""
+        self._handlers.append(handler)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        monitor = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        monitor.start()
+        try:
+            while True:
+                self._beat = time.monotonic()
+                await asyncio.sleep(self.interval)
+                probes.record("loop_lag", "watchdog", int((time.monotonic() - self._beat - self.interval) * 1e9))
+        finally:
+            self._stopped.set()
+
+    def _monitor(self) -> None:
+        stall, stalled_beat, alarmed = None, None, False
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold:
+                if stall is not None:
+                    log.warning(f"Event loop was blocked for {stall.lag:.2f} s by {stall.task}")
+                stall, stalled_beat = None, None
+                continue
+
+            if beat != stalled_beat:
+                stall, stalled_beat, alarmed = self._sample(beat, lag), beat, False
+                self.stalls.append(stall)
+                log.warning(f"Event loop blocked by {stall.task}:\n{stall.stack}")
+            stall.lag = lag
+            if lag >= self.alarm and not alarmed:
+                alarmed = True
+                self.alarms += 1
+                log.critical(f"Event loop blocked for {lag:.1f} s, raising the safety alarm")
+                self._loop.call_soon_threadsafe(self._raise_alarm, stall)
+
+    def _sample(self, beat: float, lag: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread)
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            culprit = f"task {task.get_name()} ({task.get_coro().__qualname__})"
+        elif frame is not None:
+            culprit = f"callback {frame.f_code.co_qualname}"
+        else:
+            culprit = "unknown"
+        stack = "".join(traceback.format_stack(frame, limit=STACK_DEPTH)) if frame is not None else ""
+        return Stall(time.time() - (time.monotonic() - beat), lag, culprit, stack)
+
+    def _raise_alarm(self, stall: Stall) -> None:
+        for handler in self._handlers:
+            try:
+                result = handler(stall)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._alarm_tasks.add(task)
+                    task.add_done_callback(self._alarm_done)
+            except Exception as e:
+                log.exception(f"Watchdog alarm handler failed: {e}")
+
+    def _alarm_done(self, task: asyncio.Future) -> None:
+        self._alarm_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"Watchdog alarm handler failed: {task.exception()}", exc_info=task.exception())
+
+    def dump(self) -> str:
+        if not self.stalls:
+            return "No event loop stalls"
+        return "\n".join(
+            f"{time.strftime('%H:%M:%S', time.localtime(s.started))} {s.lag:.3f} s {s.task}\n{s.stack}"
+            for s in self.stalls
+        )
+
+
+watchdog = LoopWatchdog(
+    interval=config.WATCHDOG_INTERVAL,
+    threshold=config.WATCHDOG_THRESHOLD,
+    alarm=config.WATCHDOG_ALARM_LAG,
+)
+
+
+async def trip_alarm(command_queue, stall: Stall) -> None:
+    """Switches the WATCHDOG_ALARM_CONTROLS devices the way the smoke controller does."""
+    for options in config.WATCHDOG_ALARM_CONTROLS:
+        ctrl = Control(**options)
+        device = get_device(ctrl)
+        if device is None:
+            log.error(f"Unknown watchdog alarm device: {ctrl.device}")
+            continue
+        await device(Action.DOWN, ctrl, command_queue)
@@ -1,11 +1,15 @@
 import asyncio
 import logging
-from asyncio import Queue
 from functools import singledispatchmethod
 
-from katomato.config.base import get_hardware_config
+from katomato.config import config
+from katomato.core.calibration import calibrations
+from katomato.core.clock import get_clock
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.instrumentation import timed_device
 from katomato.core.registry import device_registry, Action
-from katomato.core.sensor_data import Control, State
+from katomato.core.sensor_data import Control, Duty, State
+from katomato.core.state_journal import device_key, journal
 from katomato.core.utils.command_util import build_arduino_command
 
 log = logging.getLogger(__name__)
@@ -13,10 +17,28 @@ log = logging.getLogger(__name__)
 
 @device_registry("exhaust_fan")
 class ExhaustFan:
-    def __init__(self):
+    """PWM fan that stalls below an RPM threshold, found from the fan speed readings and kept across restarts.
+
+    The threshold is the lowest `pwm_values` index at which the fan reaches `fan_speed_floor`. It is looked
+    up in the calibration store on first use, or found by a binary search over the index, one probe per
+    speed reading. While the fan idles at its threshold every reading validates it: readings below the
+    floor search above it, and once the calibration is `revalidate_interval` old a search below it checks
+    whether the fan runs slower. Such a revalidation yields to any Action or Duty.
+    """
+
+    lane = Lane.ACTUATION
+    continuous = True  # takes a Duty as well as an Action
+
+    def __init__(self, clock=None):
+        self.clock = clock or get_clock()
         self.current_rpm_idx = 0
         self.rpm_threshold_idx = 0
         self.rpm_threshold_determined = False
+        self.calibrated_at = 0.0  # UNIX time
+        self.output = None  # PWM value last sent, None until the first command
+        self._search = None  # [lo, hi] index range of the running threshold search
+        self._low_readings = 0
+        self._cache_checked = False
         self._lock = asyncio.Lock()
 
     @singledispatchmethod
@@ -24,50 +46,142 @@ class ExhaustFan:
         raise NotImplementedError("Unsupported type")
 
     @__call__.register
-    async def _(self, action: Action, ctrl: Control, command_queue: Queue) -> None:
+    @timed_device
+    async def _(self, action: Action, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
         async with self._lock:
-            if self.rpm_threshold_determined:
-                if action == Action.UP:
-                    # Decrease speed if not already reached the threshold
-                    if self.current_rpm_idx > self.rpm_threshold_idx:
-                        self.current_rpm_idx -= 1
-                    else:
-                        return
-                elif action == Action.DOWN:
-                    # Increase speed if not at max
-                    if self.current_rpm_idx < len(self.pwm_values) - 1:
-                        self.current_rpm_idx += 1
-                    else:
-                        return
-                await command_queue.put(
-                    build_arduino_command(
-                        ctrl.type, ctrl.pin, self.pwm_values[self.current_rpm_idx]
-                    )
-                )
-
-    """Minimal RPM threshold search"""
+            if not await self._ready(ctrl, command_queue):
+                return
+            if action == Action.UP:
+                # Decrease speed if not already reached the threshold
+                if self.current_rpm_idx > self.rpm_threshold_idx:
+                    self.current_rpm_idx -= 1
+                elif not self._off_step():
+                    return
+            elif action == Action.DOWN:
+                # Increase speed if not at max
+                if self.current_rpm_idx < len(self.pwm_values) - 1:
+                    self.current_rpm_idx += 1
+                elif not self._off_step():
+                    return
+            await self._send(self.pwm_values[self.current_rpm_idx], ctrl, command_queue)
+
+    """Any duty between the RPM threshold and full speed, small changes are not sent"""
 
     @__call__.register
-    async def _(self, state: State, ctrl: Control, command_queue: Queue) -> None:
-        if not self.rpm_threshold_determined:
-            async with self._lock:
-                if not self.rpm_threshold_determined:
-                    if state.value >= self.fan_speed_floor:
-                        self.rpm_threshold_determined = True
-                        log.info(f"RPM threshold found. idx: {self.rpm_threshold_idx}")
-                        return
-                    else:
-                        self.rpm_threshold_idx += 1
-                        self.current_rpm_idx = self.rpm_threshold_idx
-                        await command_queue.put(
-                            build_arduino_command(
-                                ctrl.type,
-                                ctrl.pin,
-                                self.pwm_values[self.current_rpm_idx],
-                            )
-                        )
-        else:
+    @timed_device
+    async def _(self, duty: Duty, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        async with self._lock:
+            if not await self._ready(ctrl, command_queue):
+                return
+            floor = self.pwm_values[self.rpm_threshold_idx]
+            value = round(floor + (self.pwm_values[-1] - floor) * min(max(duty.value, 0.0), 1.0))
+            change = abs(value - (self.output if self.output is not None else self.pwm_values[self.current_rpm_idx]))
+            # The ends of the range are always reached, a fan at full speed stays at full speed
+            if change == 0 or (change < self.min_step and value not in (floor, self.pwm_values[-1])):
+                return
+            await self._send(value, ctrl, command_queue)
+
+    """RPM threshold search and validation"""
+
+    @__call__.register
+    @timed_device
+    async def _(self, state: State, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        async with self._lock:
+            if self._search is not None:
+                await self._probe_result(state.value, ctrl, command_queue)
+            elif not self.rpm_threshold_determined:
+                if not await self._ready(ctrl, command_queue):
+                    log.info(f"Searching the RPM threshold: {ctrl}")
+                    await self._start_search(0, len(self.pwm_values) - 1, ctrl, command_queue)
+            elif self._running() == self.pwm_values[self.rpm_threshold_idx]:
+                await self._validate(state.value, ctrl, command_queue)
+
+    async def _ready(self, ctrl: Control, command_queue: PriorityCommandQueue) -> bool:
+        """Whether the threshold is known, a calibration from before a restart is taken over on first use."""
+        if not self.rpm_threshold_determined and not self._cache_checked:
+            self._cache_checked = True
+            entry = calibrations.get(self._key(ctrl))
+            idx = entry.get("idx") if entry else None
+            # A changed floor or speed table invalidates the calibration
+            if (idx is not None and 0 <= idx < len(self.pwm_values) and entry.get("pwm") == self.pwm_values[idx]
+                    and entry.get("floor") == self.fan_speed_floor):
+                self.rpm_threshold_idx = idx
+                self.rpm_threshold_determined = True
+                self.calibrated_at = entry.get("at", 0.0)
+                log.info(f"RPM threshold from the calibration store. idx: {idx}")
+                # A known speed after the restart, unless the state journal restored one at or above the threshold
+                if self.output is None or self.current_rpm_idx < idx:
+                    self.current_rpm_idx = idx
+                    await self._send(self.pwm_values[idx], ctrl, command_queue)
+        if self._search is not None and self.rpm_threshold_determined:
+            log.info(f"RPM threshold revalidation interrupted: {ctrl}")
+            self._search = None
+            self.current_rpm_idx = self.rpm_threshold_idx
+        return self.rpm_threshold_determined and self._search is None
+
+    async def _validate(self, rpm: float, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        if rpm < self.fan_speed_floor:
+            # Twice in a row, a reading may have been taken while the fan was still spinning up
+            self._low_readings += 1
+            if self._low_readings >= 2:
+                log.warning(f"Fan below {self.fan_speed_floor} rpm at its threshold, searching again: {ctrl}")
+                await self._start_search(self.rpm_threshold_idx + 1, len(self.pwm_values) - 1, ctrl, command_queue)
             return
+        self._low_readings = 0
+        if self.rpm_threshold_idx > 0 and self.clock.time() - self.calibrated_at >= self.revalidate_interval:
+            log.info(f"Revalidating the RPM threshold: {ctrl}")
+            await self._start_search(0, self.rpm_threshold_idx, ctrl, command_queue)
+
+    async def _start_search(self, lo: int, hi: int, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        # hi is taken to reach the floor, full speed is the threshold if nothing lower does
+        self._low_readings = 0
+        if lo >= hi:
+            return await self._found(min(lo, len(self.pwm_values) - 1), ctrl, command_queue)
+        self._search = [lo, hi]
+        self.current_rpm_idx = (lo + hi) // 2
+        await self._send(self.pwm_values[self.current_rpm_idx], ctrl, command_queue)
+
+    async def _probe_result(self, rpm: float, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        lo, hi = self._search
+        if rpm >= self.fan_speed_floor:
+            hi = self.current_rpm_idx
+        else:
+            lo = self.current_rpm_idx + 1
+        self._search = None
+        await self._start_search(lo, hi, ctrl, command_queue)
+
+    async def _found(self, idx: int, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        self.rpm_threshold_idx = self.current_rpm_idx = idx
+        self.rpm_threshold_determined = True
+        self.calibrated_at = self.clock.time()
+        log.info(f"RPM threshold found. idx: {idx}")
+        await calibrations.put(self._key(ctrl), {
+            "idx": idx, "pwm": self.pwm_values[idx], "floor": self.fan_speed_floor, "at": self.calibrated_at,
+        })
+        if self.output != self.pwm_values[idx]:
+            await self._send(self.pwm_values[idx], ctrl, command_queue)
+
+    async def _send(self, value: int, ctrl: Control, command_queue: PriorityCommandQueue) -> None:
+        self.output = value
+        journal.record(device_key(ctrl), {"type": ctrl.type, "value": value, "idx": self.current_rpm_idx})
+        await command_queue.put(build_arduino_command(ctrl.type, ctrl.pin, value, ctrl.board), self.lane)
+
+    def restore(self, entry: dict) -> int | None:
+        # The step and PWM value of before the restart, the threshold still comes from the calibration store
+        self.current_rpm_idx = min(max(entry.get("idx", 0), 0), len(self.pwm_values) - 1)
+        self.output = entry.get("value")
+        return self.output
+
+    def _running(self) -> int:
+        return self.output if self.output is not None else self.pwm_values[self.current_rpm_idx]
+
+    def _off_step(self) -> bool:
+        # Left at another speed by a Duty or an interrupted search
+        return self.output is not None and self.output != self.pwm_values[self.current_rpm_idx]
+
+    @staticmethod
+    def _key(ctrl: Control) -> str:
+        return f"exhaust_fan:{ctrl.board}:{ctrl.pin}"
 
     @property
     def pwm_values(self):
@@ -85,6 +199,14 @@ class ExhaustFan:
             255,
         ]  # Fan speeds in 10% increments
 
+    @property
+    def revalidate_interval(self):
+        return config.CALIBRATION_REVALIDATE_INTERVAL
+
+    @property
+    def min_step(self):
+        return config.EXHAUST_FAN_MIN_STEP
+
     @property
     def fan_speed_floor(self):
-        return get_hardware_config().get("ExhaustFan").FAN_SPEED_FLOOR
+        return config.params.exhaust_fan_speed_floor
@@ -1,26 +1,37 @@
 import asyncio
-from asyncio import Queue
 
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.instrumentation import timed_device
 from katomato.core.registry import Action
 from katomato.core.sensor_data import Control
+from katomato.core.state_journal import device_key, journal
 from katomato.core.utils.command_util import build_arduino_command
 
 """A digital control device with linear logic where the desired action matches the desired command"""
 
 
 class LinearDevice:
+    lane = Lane.ACTUATION
+
     def __init__(self):
         self.state = 0
         self._lock = asyncio.Lock()
 
+    @timed_device
     async def __call__(
-        self, action: Action, ctrl: Control, command_queue: Queue
+        self, action: Action, ctrl: Control, command_queue: PriorityCommandQueue
     ) -> None:
         async with self._lock:
             if self.state == action.value:
                 return
             else:
                 self.state = action.value
+            journal.record(device_key(ctrl), {"type": ctrl.type, "value": self.state})
             await command_queue.put(
-                build_arduino_command(ctrl.type, ctrl.pin, self.state)
+                build_arduino_command(ctrl.type, ctrl.pin, self.state, ctrl.board), self.lane
             )
+
+    def restore(self, entry: dict) -> int:
+        """Takes over the journaled state, returns the value the pin is reconciled to."""
+        self.state = entry.get("value", 0)
+        return self.state
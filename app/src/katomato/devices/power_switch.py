@@ -1,7 +1,8 @@
+from katomato.core.command_queue import Lane
 from katomato.core.registry import device_registry
 from katomato.devices.linear_device import LinearDevice
 
 
 @device_registry("power_switch")
 class PowerSwitch(LinearDevice):
-    pass
+    lane = Lane.SAFETY
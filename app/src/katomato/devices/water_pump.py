@@ -1,6 +1,5 @@
 from katomato.config import config
-from katomato.config.base import get_hardware_config
-from katomato.core.registry import device_registry
+from katomato.core.registry import Action, device_registry
 from katomato.core.sensor_data import SensorData
 from katomato.devices.duration_estimation_device import DurationEstimatingDevice
 from katomato.devices.linear_device import LinearDevice
@@ -21,7 +20,7 @@ Where:
 class WaterPump(LinearDevice, DurationEstimatingDevice):
     async def estimate_runtime(self, sensor_data: SensorData) -> float:
         m_current = sensor_data.value
-        m_target = config.growth_phase.SOIL_MOISTURE_CEIL
+        m_target = config.params.SOIL_MOISTURE_CEIL
         v_pot = self.pot_volume
         q_pump = self.flow_rate
 
@@ -29,10 +28,15 @@ class WaterPump(LinearDevice, DurationEstimatingDevice):
         runtime = (delta_moisture / 100) * (v_pot / q_pump)
         return runtime
 
+    def restore(self, entry: dict) -> int:
+        # A run is not resumed, its stop timer is gone. The pump is stopped until the next soil reading asks for water
+        self.state = Action.DOWN.value
+        return self.state
+
     @property
     def flow_rate(self):
-        return get_hardware_config().get("WaterPump").FLOW_RATE
+        return config.params.water_pump_flow_rate
 
     @property
     def pot_volume(self):
-        return get_hardware_config().get("WaterPump").POT_VOLUME
+        return config.params.pot_volume
@@ -1,24 +1,57 @@
 import asyncio
+from functools import partial
 
 from katomato import controllers, devices
+from katomato.config import config
+from katomato.core.command_queue import Lane, PriorityCommandQueue
 from katomato.core.dispatcher import command_dispatcher
-from katomato.core.serial import serial_connection_loop
+from katomato.core.instrumentation import probes
+from katomato.core.metrics import load_all_sinks
+from katomato.core.metrics.fanout import fanout as metrics_fanout
+from katomato.core.connection import ConnectionManager
+from katomato.core.phase_schedule import load_schedule, run_schedule
+from katomato.core.scheduler import scheduler
 from katomato.core.shutdown import ShutdownHandler
+from katomato.core.state_journal import journal, reconcile, restore_state
+from katomato.core.watchdog import trip_alarm, watchdog
 from katomato.core.cli import handle_cli
 
 
 async def main():
-    command_queue = asyncio.Queue()
+    command_queue = PriorityCommandQueue(
+        limits={Lane[name.upper()]: limit for name, limit in config.COMMAND_LANE_LIMITS.items()},
+        starvation_limit=config.COMMAND_STARVATION_LIMIT,
+    )
     controllers.load_all_processors()
     devices.load_all_devices()
+    load_all_sinks()
+    restore_state()  # before the phase schedule is loaded and the first reading arrives
+
+    connections = ConnectionManager(
+        config.get_boards(),
+        command_queue,
+        backoff_initial=config.RECONNECT_BACKOFF_INITIAL,
+        backoff_max=config.RECONNECT_BACKOFF_MAX,
+    )
+    connections.start()
+    shutdown_handler = ShutdownHandler(command_queue, connections)
 
-    arduino_protocol = await serial_connection_loop(command_queue)
-    shutdown_handler = ShutdownHandler(command_queue, arduino_protocol)
+    for lane in Lane:
+        probes.watch(f"commands.{lane.name.lower()}", lambda lane=lane: command_queue.depth(lane))
+    probes.watch("mailboxes", lambda: sum(stats.depth for stats in scheduler.stats.values()))
+    probes.watch("metrics", lambda: len(metrics_fanout))
+    watchdog.on_alarm(partial(trip_alarm, command_queue))
 
     await asyncio.gather(
         handle_cli(command_queue),
-        command_dispatcher(command_queue, arduino_protocol, shutdown_handler),
+        command_dispatcher(command_queue, connections, shutdown_handler),
+        reconcile(connections, command_queue),
         shutdown_handler.start(),
+        run_schedule(load_schedule()),
+        metrics_fanout.run(),
+        probes.run(),
+        watchdog.run(),
+        journal.run(),
     )
 
 
@@ -0,0 +1,22 @@
+import argparse
+import logging
+
+from katomato.sim.runner import run_simulation
+
+parser = argparse.ArgumentParser(prog="python -m katomato.sim", description="Runs the controllers against a "
+                                                                            "simulated greenhouse in virtual time")
+parser.add_argument("--days", type=float, default=90.0)
+parser.add_argument("--interval", type=float, default=60.0, help="s between sensor readings")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--planted-at", default="2025-04-01")
+args = parser.parse_args()
+
+logging.getLogger().setLevel(logging.WARNING)
+result = run_simulation(args.days, args.interval, args.seed, args.planted_at, sample_interval=3600.0)
+
+print(f"{result.days:g} days in {result.wall_seconds:.1f} s, {result.readings} readings, {result.commands} commands")
+print(f"pump {result.pump_seconds / 3600:.1f} h, humidifier {result.humidifier_seconds / 3600:.1f} h")
+print(f"{'day':>6} {'phase':<24} {'temp':>6} {'hum':>6} {'soil':>6} {'rpm':>6}")
+for sample in result.samples[::24]:
+    print(f"{sample.day:6.1f} {sample.phase:<24} {sample.temperature:6.1f} {sample.humidity:6.1f} "
+          f"{sample.soil_moisture:6.1f} {sample.fan_rpm:6.0f}")
@@ -0,0 +1,222 @@
+import json
+import logging
+import math
+import random
+from asyncio import AbstractEventLoop
+from collections import Counter
+
+from katomato.config.base import get_hardware_config
+from katomato.core.sensor_data import Control
+from katomato.core.serial import encode_ack, encode_meta, encode_reading
+from katomato.core.transport import LoopbackBoard
+
+log = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60  # s
+
+# Pins and sensors of the firmware, see arduino/include/config/PinConfig.h and HardwareRegistry.cpp
+ALARM_LIGHT_PIN = 4
+HUMIDIFIER_PIN = 7
+EXH_FAN_CONTROL_PIN = 9
+WATER_PUMP_PIN = 12
+POWER_SWITCH_PIN = 13
+
+_exhaust_fan = Control(EXH_FAN_CONTROL_PIN, "analog", "exhaust_fan")
+SENSORS = (
+    ("dt", "Temperature", "C", (_exhaust_fan,)),
+    ("dh", "Humidity", "%", (Control(ALARM_LIGHT_PIN, "digital", "alarm_light"),
+                             Control(HUMIDIFIER_PIN, "digital", "humidifier"))),
+    ("ef", "Exhaust Fan Speed", "rpm", (_exhaust_fan,)),
+    ("sm", "Soil Moisture", "%", (Control(WATER_PUMP_PIN, "digital", "water_pump"),)),
+)
+
+
+class PlantModel:
+    """Lumped physical model of the greenhouse, integrated up to the virtual time of every event.
+
+    Relay pins are active low like the relay boards the firmware drives: a device runs while its pin is
+    LOW, which is also the state of every pin after boot. The exhaust fan is PWM driven and stalls below
+    `fan_stall_pwm`. Temperature follows a daily ambient cycle plus solar gain, the exhaust fan exchanges
+    air with the outside, the humidifier and transpiration add humidity and the pump adds soil moisture
+    at the configured flow rate, which the plant uses up faster when it is warm.
+    """
+
+    max_step = 10.0  # s, integration step
+
+    ambient_temp = 20.0  # C, daily mean
+    ambient_temp_swing = 6.0  # C
+    ambient_hum = 50.0  # %
+    solar_gain = 0.004  # C/s at noon
+    passive_exchange = 1 / 1800  # 1/s
+    fan_exchange = 1 / 120  # 1/s at full speed
+    humidifier_rate = 0.15  # %/s
+    transpiration = 0.002  # %/s of humidity
+    soil_use = 8.0 / DAY  # %/s at 20 C
+    field_capacity = 60.0  # %, excess water drains
+    drainage = 0.05  # 1/s
+    fan_max_rpm = 2000
+    fan_stall_pwm = 60
+
+    def __init__(self, temperature: float = 22.0, humidity: float = 60.0, soil_moisture: float = 40.0):
+        self.time = 0.0
+        self.temperature = temperature
+        self.humidity = humidity
+        self.soil_moisture = soil_moisture
+        self.pins = {ALARM_LIGHT_PIN: 0, HUMIDIFIER_PIN: 0, EXH_FAN_CONTROL_PIN: 0, WATER_PUMP_PIN: 0,
+                     POWER_SWITCH_PIN: 0}
+        self.pump_seconds = 0.0
+        self.humidifier_seconds = 0.0
+
+        pump = get_hardware_config()["WaterPump"]
+        self.pump_rate = pump.FLOW_RATE / pump.POT_VOLUME * 100  # %/s
+
+    def _relay_on(self, pin: int) -> bool:
+        return self.pins[pin] == 0 and self.pins[POWER_SWITCH_PIN] == 0
+
+    @property
+    def fan_rpm(self) -> float:
+        pwm = self.pins[EXH_FAN_CONTROL_PIN] if self.pins[POWER_SWITCH_PIN] == 0 else 0
+        return 0.0 if pwm < self.fan_stall_pwm else self.fan_max_rpm * pwm / 255
+
+    def set_pin(self, pin: int, value: int) -> bool:
+        if pin not in self.pins:
+            return False
+        self.pins[pin] = value
+        return True
+
+    def advance(self, now: float) -> None:
+        while self.time < now:
+            dt = min(self.max_step, now - self.time)
+            self._step(dt)
+            self.time += dt
+
+    def _step(self, dt: float) -> None:
+        day = self.time / DAY
+        ambient = self.ambient_temp + self.ambient_temp_swing * math.sin(2 * math.pi * (day - 0.375))
+        sun = max(0.0, math.sin(2 * math.pi * (day - 0.25)))
+        exchange = self.passive_exchange + self.fan_exchange * self.fan_rpm / self.fan_max_rpm
+
+        self.temperature += (self.solar_gain * sun - exchange * (self.temperature - ambient)) * dt
+
+        moist = min(1.0, self.soil_moisture / self.field_capacity)
+        hum = self.transpiration * moist - exchange * (self.humidity - self.ambient_hum)
+        if self._relay_on(HUMIDIFIER_PIN):
+            hum += self.humidifier_rate
+            self.humidifier_seconds += dt
+        self.humidity = min(100.0, max(0.0, self.humidity + hum * dt))
+
+        soil = -self.soil_use * max(0.0, 1 + 0.05 * (self.temperature - 20)) * moist
+        if self._relay_on(WATER_PUMP_PIN):
+            soil += self.pump_rate
+            self.pump_seconds += dt
+        if self.soil_moisture > self.field_capacity:
+            soil -= self.drainage * (self.soil_moisture - self.field_capacity)
+        self.soil_moisture = min(100.0, max(0.0, self.soil_moisture + soil * dt))
+
+
+class GreenhouseBoard(LoopbackBoard):
+    """Simulated Arduino on a loopback transport: the firmware's sensors and serial protocol over a PlantModel.
+
+    Readings of all sensors are sent every `interval` seconds of loop time, JSON lines until the host asks
+    for binary telemetry. Commands with a sequence number are acknowledged like the firmware does. Sensor
+    noise comes from a seeded generator, so the same seed gives the same run.
+    """
+
+    def __init__(self, plant: PlantModel, loop: AbstractEventLoop, interval: float = 60.0, seed: int = 0):
+        super().__init__()
+        self.plant = plant
+        self.loop = loop
+        self.interval = interval
+        self.binary = False
+        self.readings = 0
+        self.commands = 0
+        self.pin_commands = Counter()
+
+        self._random = random.Random(seed)
+        self._pending = b""
+        self._sequence = 0
+        self._timer = None
+        self._upper_value = get_hardware_config()["SoilMoistureSensor"].UPPER_VALUE
+
+    def connection_made(self, transport) -> None:
+        super().connection_made(transport)
+        self.binary = False
+        self._timer = self.loop.call_later(self.interval, self._tick)
+
+    def connection_lost(self) -> None:
+        super().connection_lost()
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def received(self, data: bytes) -> None:
+        *lines, self._pending = (self._pending + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                self._handle(line)
+
+    def _handle(self, line: bytes) -> None:
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return self._send_json({"sensor": "error", "value": "Invalid JSON"})
+
+        if command.get("command") == "telemetry":
+            self.binary = command.get("value") == 1
+            if self.binary:
+                for idx, (sensor, label, unit, controls) in enumerate(SENSORS):
+                    self.send(encode_meta(idx, sensor, label, unit, controls))
+            return
+
+        self.commands += 1
+        self.plant.advance(self.loop.time())
+        seq = command.get("seq", -1)
+        pin, value = command.get("pin", -1), command.get("value", -1)
+        if pin < 0 or value < 0:
+            return self._ack(seq, "Missing fields")
+        if not self.plant.set_pin(pin, value):
+            return self._ack(seq, "No control for pin")
+        self.pin_commands[pin] += 1
+        self._ack(seq, "")
+
+    def _ack(self, seq: int, error: str) -> None:
+        if seq < 0:
+            if error:
+                self._send_json({"sensor": "error", "value": error})
+        elif self.binary:
+            self.send(encode_ack(seq, error))
+        elif error:
+            self._send_json({"sensor": "nack", "label": error, "value": seq})
+        else:
+            self._send_json({"sensor": "ack", "value": seq})
+
+    def _tick(self) -> None:
+        self._timer = self.loop.call_later(self.interval, self._tick)
+        self.plant.advance(self.loop.time())
+        values = self.sample()
+        for idx, (sensor, label, unit, controls) in enumerate(SENSORS):
+            self.readings += 1
+            if self.binary:
+                self.send(encode_reading(idx, self._sequence, values[idx]))
+                self._sequence += 1
+            else:
+                self._send_json({
+                    "sensor": sensor,
+                    "label": label,
+                    "value": values[idx],
+                    "unit": unit,
+                    "controls": [{"pin": c.pin, "type": c.type, "device": c.device} for c in controls],
+                })
+
+    def sample(self) -> tuple[float, float, float, float]:
+        """Sensor values in SENSORS order, as the firmware would read them."""
+        plant, noise = self.plant, self._random.gauss
+        return (
+            round(plant.temperature + noise(0, 0.2), 1),  # DHT22 resolution
+            round(min(100.0, max(0.0, plant.humidity + noise(0, 1.0))), 1),
+            float(plant.fan_rpm),
+            float(min(self._upper_value, max(0, round(plant.soil_moisture / 100 * self._upper_value + noise(0, 3))))),
+        )
+
+    def _send_json(self, data: dict) -> None:
+        self.send(json.dumps(data).encode() + b"\n")
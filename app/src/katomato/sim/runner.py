@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import NamedTuple
+
+from katomato import controllers, devices
+from katomato.config import config
+from katomato.core.calibration import calibrations
+from katomato.core.clock import VirtualClockLoop
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.connection import ConnectionManager
+from katomato.core.dispatcher import command_dispatcher
+from katomato.core.filters import filters
+from katomato.core.phase_schedule import PhaseSchedule, run_schedule
+from katomato.core.registry import CONTROLLERS, DEVICES
+from katomato.core.scheduler import scheduler
+from katomato.core.shutdown import ShutdownHandler
+from katomato.core.state_journal import journal
+from katomato.core.transport import LOOPBACK_BOARDS
+from katomato.sim.plant import DAY, EXH_FAN_CONTROL_PIN, GreenhouseBoard, PlantModel
+
+log = logging.getLogger(__name__)
+
+BOARD = "sim"
+
+
+class Sample(NamedTuple):
+    day: float
+    phase: str
+    temperature: float
+    humidity: float
+    soil_moisture: float
+    fan_rpm: float
+
+
+@dataclass
+class SimResult:
+    days: float
+    wall_seconds: float = 0.0
+    readings: int = 0
+    commands: int = 0
+    fan_commands: int = 0
+    pump_seconds: float = 0.0
+    humidifier_seconds: float = 0.0
+    samples: list[Sample] = field(default_factory=list)
+
+
+def run_simulation(
+        days: float = 90.0,
+        reading_interval: float = 60.0,
+        seed: int = 0,
+        planted_at: str = "2025-04-01",
+        sample_interval: float = 3600.0,
+        plant: PlantModel | None = None,
+) -> SimResult:
+    """Runs the controllers against a simulated greenhouse for `days` of virtual time.
+
+    The whole host side runs unchanged: readings from a GreenhouseBoard go through the loopback transport,
+    the ArduinoProtocol and the controller scheduler, commands through the priority queue, the writer and
+    the ACK window back to the board. The phase schedule follows the plant age from `planted_at`. A `plant`
+    gives another climate or starting state than the default PlantModel.
+    """
+    loop = VirtualClockLoop(epoch=datetime.fromisoformat(planted_at).timestamp())  # planted at time 0
+    try:
+        return loop.run_until_complete(
+            _simulate(days, reading_interval, seed, planted_at, sample_interval, plant or PlantModel())
+        )
+    finally:
+        loop.close()
+
+
+async def _simulate(days, reading_interval, seed, planted_at, sample_interval, plant) -> SimResult:
+    loop = asyncio.get_running_loop()
+    result = SimResult(days)
+    started = time.perf_counter()
+
+    with _fresh_state():
+        board = GreenhouseBoard(plant, loop, interval=reading_interval, seed=seed)
+        LOOPBACK_BOARDS[BOARD] = board
+
+        command_queue = PriorityCommandQueue(
+            limits={Lane[name.upper()]: limit for name, limit in config.COMMAND_LANE_LIMITS.items()},
+            starvation_limit=config.COMMAND_STARVATION_LIMIT,
+        )
+        connections = ConnectionManager({BOARD: {"transport": "loopback", "name": BOARD}}, command_queue)
+        connections.start()
+
+        phases = config.get_growth_phases()
+        schedule = PhaseSchedule(
+            [(phases[name], duration) for name, duration in config.PHASE_SCHEDULE.items()],
+            transition=config.PHASE_TRANSITION_DAYS,
+            step=config.PHASE_SCHEDULE_STEP,
+        )
+        tasks = [
+            asyncio.create_task(command_dispatcher(command_queue, connections, ShutdownHandler(command_queue, connections))),
+            asyncio.create_task(run_schedule(schedule, planted_at)),
+            asyncio.create_task(_sample(plant, result, sample_interval)),
+        ]
+        try:
+            await asyncio.sleep(days * DAY)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await scheduler.close()
+            await connections.close()
+
+    plant.advance(loop.time())
+    result.wall_seconds = time.perf_counter() - started
+    result.readings = board.readings
+    result.commands = board.commands
+    result.fan_commands = board.pin_commands[EXH_FAN_CONTROL_PIN]
+    result.pump_seconds = plant.pump_seconds
+    result.humidifier_seconds = plant.humidifier_seconds
+    log.info(
+        f"Simulated {days} days in {result.wall_seconds:.1f} s: {result.readings} readings, "
+        f"{result.commands} commands"
+    )
+    return result
+
+
+async def _sample(plant: PlantModel, result: SimResult, interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        plant.advance(loop.time())
+        result.samples.append(Sample(
+            loop.time() / DAY,
+            config.params.phase,
+            plant.temperature,
+            plant.humidity,
+            plant.soil_moisture,
+            plant.fan_rpm,
+        ))
+        await asyncio.sleep(interval)
+
+
+@contextmanager
+def _fresh_state():
+    """New controller and device instances, empty filters, calibrations and state journal and the active phase
+    restored, runs don't share state."""
+    controllers.load_all_processors()
+    devices.load_all_devices()
+    instances = CONTROLLERS.instances, DEVICES.instances
+    calibration = calibrations.path, calibrations.entries
+    state = journal.directory, journal.entries
+    phase = config.growth_phase, config.params
+    board = LOOPBACK_BOARDS.get(BOARD)
+    try:
+        CONTROLLERS.instances, DEVICES.instances = {}, {}
+        calibrations.path, calibrations.entries = None, {}  # in memory, the simulated fan is not the real one
+        journal.directory, journal.entries = None, {}
+        filters.reset()
+        yield
+    finally:
+        CONTROLLERS.instances, DEVICES.instances = instances
+        calibrations.path, calibrations.entries = calibration
+        journal.directory, journal.entries = state
+        config.growth_phase, config.params = phase
+        filters.reset()
+        if board is None:
+            LOOPBACK_BOARDS.pop(BOARD, None)
+        else:
+            LOOPBACK_BOARDS[BOARD] = board
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import random
+import time
+
+import pytest
+
+from katomato.core.serial import ArduinoProtocol
+from katomato.core.utils.command_util import build_arduino_command
+from tests.benchmarks.bench_utils import report
+
+COMMANDS = 120
+PINS = 6
+LINK_DELAY = 0.005  # s each way
+LOSS = 0.2  # commands lost on the way to the board, e.g. a noisy cable
+
+
+class _LossyBoard:
+    """A fake transport: applies commands after the link delay, loses some and acknowledges the rest."""
+
+    def __init__(self, protocol: ArduinoProtocol, acks: bool, seed: int = 1):
+        self.protocol = protocol
+        self.acks = acks
+        self.state = {}
+        self.random = random.Random(seed)
+
+    def write(self, data: bytes) -> None:
+        loop = asyncio.get_running_loop()
+        for line in data.splitlines():
+            if self.random.random() >= LOSS:
+                loop.call_later(LINK_DELAY, self._apply, json.loads(line))
+
+    def _apply(self, command: dict) -> None:
+        self.state[command["pin"]] = command["value"]
+        if self.acks and "seq" in command:
+            reply = json.dumps({"sensor": "ack", "value": command["seq"]}).encode() + b"\n"
+            asyncio.get_running_loop().call_later(LINK_DELAY, self.protocol.data_received, reply)
+
+    def close(self) -> None:
+        pass
+
+
+async def _run(window: int, acks: bool) -> dict[str, float]:
+    protocol = ArduinoProtocol(asyncio.Queue())
+    board = _LossyBoard(protocol, acks)
+    protocol.connection_made(board)
+    protocol.writer.interval = 0
+    protocol.inflight.window = window
+    protocol.inflight.timeout = 6 * LINK_DELAY
+    if not acks:
+        protocol.inflight.supported = False  # untracked, as for firmware without ACKs
+
+    expected = {}
+    start = time.perf_counter()
+    for i in range(COMMANDS):
+        pin, value = 20 + i % PINS, i
+        expected[pin] = value
+        await protocol.send_command(build_arduino_command("analog", pin, value))
+    while len(protocol.inflight):
+        await asyncio.sleep(LINK_DELAY)
+    await asyncio.sleep(2 * LINK_DELAY)
+    elapsed = time.perf_counter() - start
+
+    protocol.inflight.reset()
+    protocol.writer.reset()
+    return {
+        "commands/s": COMMANDS / elapsed,
+        "retried": protocol.inflight.retried,
+        "pins_correct": sum(board.state.get(pin) == value for pin, value in expected.items()),
+    }
+
+
+@pytest.mark.asyncio
+async def test_command_acks_lossy_link():
+    rows = {
+        "fire_and_forget": await _run(window=4, acks=False),
+        "stop_and_wait": await _run(window=1, acks=True),
+        "window=4": await _run(window=4, acks=True),
+    }
+    report(f"{COMMANDS} commands to {PINS} pins, {LOSS:.0%} loss, {2 * LINK_DELAY * 1e3:.0f} ms RTT", rows)
+
+    assert rows["window=4"]["pins_correct"] == PINS
+    assert rows["window=4"]["commands/s"] > 2 * rows["stop_and_wait"]["commands/s"]
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from katomato.controllers.smoke import SmokeDetectionController
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.dispatcher import command_dispatcher
+from katomato.core.registry import DEVICE_REGISTRY, DEVICES
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.utils.command_util import build_arduino_command
+from katomato.devices.alarm_light import AlarmLight
+from katomato.devices.power_switch import PowerSwitch
+from tests.benchmarks.bench_utils import report
+
+BYTES_PER_SECOND = 9600  # 96000 baud, 10x the real link to keep the run short
+POWER_PIN = 6
+SMOKE = SensorData("smoke", "Smoke", 1, "", (Control(4, "digital", "alarm_light"), Control(POWER_PIN, "digital", "power_switch")))
+
+
+class _FifoQueue(asyncio.Queue):
+    """The previous single FIFO command queue."""
+
+    async def put(self, item, lane=None):
+        await super().put(item)
+
+
+class _FakeTransport:
+    def __init__(self):
+        self.power_cut = asyncio.Event()
+        self.sent = 0
+
+    async def send_command(self, command: str, board: str | None = None) -> None:
+        await asyncio.sleep(len(command) / BYTES_PER_SECOND)
+        self.sent += 1
+        data = json.loads(command)
+        if data.get("pin") == POWER_PIN and data.get("value") == 1:
+            self.power_cut.set()
+
+
+async def _smoke_to_power_cut(queue, monkeypatch) -> dict[str, float]:
+    monkeypatch.setitem(DEVICE_REGISTRY, "alarm_light", AlarmLight)
+    monkeypatch.setitem(DEVICE_REGISTRY, "power_switch", PowerSwitch)
+    DEVICES.clear()  # fresh devices, both switched off
+
+    # Backlog: exhaust fan PWM steps and CLI commands
+    for step in range(40):
+        await queue.put(build_arduino_command("analog", 9, step * 6), Lane.ACTUATION)
+    for pin in range(20, 40):
+        await queue.put(build_arduino_command("digital", pin, 1), Lane.HOUSEKEEPING)
+
+    transport = _FakeTransport()
+    dispatcher = asyncio.create_task(command_dispatcher(queue, transport, None))
+    await asyncio.sleep(0.01)  # the dispatcher is busy with the backlog
+
+    start = time.perf_counter()
+    await SmokeDetectionController()(SMOKE, queue)
+    await asyncio.wait_for(transport.power_cut.wait(), 5)
+    latency = time.perf_counter() - start
+
+    dispatcher.cancel()
+    await asyncio.gather(dispatcher, return_exceptions=True)
+    return {"latency_ms": latency * 1e3, "sent_before_cut": transport.sent - 1}
+
+
+@pytest.mark.asyncio
+async def test_smoke_to_power_cut_latency(monkeypatch):
+    rows = {
+        "fifo": await _smoke_to_power_cut(_FifoQueue(), monkeypatch),
+        "lanes": await _smoke_to_power_cut(PriorityCommandQueue(), monkeypatch),
+    }
+    report("Smoke -> power cut behind a 60 command backlog", rows)
+
+    assert rows["lanes"]["latency_ms"] * 5 < rows["fifo"]["latency_ms"]
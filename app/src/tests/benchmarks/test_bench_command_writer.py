@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from katomato.core.command_queue import PriorityCommandQueue
+from katomato.core.serial import CommandWriter
+from katomato.core.utils.command_util import build_arduino_command
+from tests.benchmarks.bench_utils import report
+
+BYTES_PER_SECOND = 960  # 9600 baud, 8N1
+RX_BUFFER = 64  # bytes, HardwareSerial on the Uno
+LOOP_PERIOD = 0.001  # s, firmware loop() without sensor work
+SENSOR_INTERVAL = 1.0  # s
+SENSOR_STALL = 0.08  # s, loop() blocked reading the DHT and sending sensors, worst case
+READ_TIMEOUT = 1.0  # s, Stream::readStringUntil
+SCALE = 10  # the writer runs 10x faster than the modelled link
+
+BURSTS = 3
+BURST_GAP = 1.0  # s
+PINS = (4, 5, 6, 7, 8, 9)
+
+
+def _burst(n: int) -> list[str]:
+    # Exhaust fan PWM steps, switch flips and switches re-sent in the state they are already in
+    commands = []
+    for step in range(5):
+        commands.append(build_arduino_command("analog", 9, (n * 5 + step) * 10))
+        for pin in PINS[:-1]:
+            commands.append(build_arduino_command("digital", pin, (pin + n + (step > 2 and pin % 2)) % 2))
+    return commands
+
+
+def _expected() -> dict[int, int]:
+    state = {}
+    for n in range(BURSTS):
+        for command in _burst(n):
+            data = json.loads(command)
+            state[data["pin"]] = data["value"]
+    return state
+
+
+def _wire(writes: list[tuple[float, bytes]]) -> list[tuple[float, int]]:
+    """Arrival time of every byte at the board."""
+    arrivals = []
+    busy_until = 0.0
+    for t, data in writes:
+        busy_until = max(busy_until, t)
+        for byte in data:
+            busy_until += 1 / BYTES_PER_SECOND
+            arrivals.append((busy_until, byte))
+    return arrivals
+
+
+def _stalled(t: float) -> bool:
+    return t % SENSOR_INTERVAL < SENSOR_STALL
+
+
+def _board_line_reader(writes) -> tuple[dict, int, float]:
+    """Current firmware: all buffered lines are read on every loop(), bytes are lost while the buffer is full."""
+    lines, line, rx, last_poll, lost_bytes, done = [], bytearray(), [], 0.0, 0, 0.0
+    for t, byte in _wire(writes):
+        poll = last_poll + LOOP_PERIOD
+        if _stalled(poll):
+            poll += SENSOR_STALL - poll % SENSOR_INTERVAL
+        if poll <= t:
+            for b in rx:
+                if b == ord("\n"):
+                    lines.append(bytes(line))
+                    line.clear()
+                    done = poll
+                else:
+                    line.append(b)
+            rx.clear()
+            last_poll = t
+        if len(rx) < RX_BUFFER:
+            rx.append(byte)
+        else:
+            lost_bytes += 1
+    lines.append(bytes(line + bytes(b for b in rx if b != ord("\n"))))
+    return _apply(lines), lost_bytes, done
+
+
+def _board_previous(writes) -> tuple[dict, int, float]:
+    """Previous firmware and host: unterminated commands, one readStringUntil per loop() parses one object."""
+    reads, current, last = [], bytearray(), None
+    for t, byte in _wire(writes):
+        if last is not None and t - last >= READ_TIMEOUT:
+            reads.append(bytes(current))
+            current.clear()
+        current.append(byte)
+        last = t
+    reads.append(bytes(current))
+
+    decoder = json.JSONDecoder()
+    lines = []
+    for data in reads:
+        try:
+            obj, _ = decoder.raw_decode(data.decode())
+            lines.append(json.dumps(obj).encode())
+        except ValueError:
+            pass
+    return _apply(lines), 0, last + READ_TIMEOUT
+
+
+def _apply(lines: list[bytes]) -> dict[int, int]:
+    state = {}
+    for line in lines:
+        try:
+            data = json.loads(line)
+            state[data["pin"]] = data["value"]
+        except (ValueError, KeyError):
+            pass
+    return state
+
+
+def _unpaced(terminator: bytes) -> list[tuple[float, bytes]]:
+    return [
+        (n * BURST_GAP, command.encode() + terminator)
+        for n in range(BURSTS)
+        for command in _burst(n)
+    ]
+
+
+async def _writer() -> tuple[list[tuple[float, bytes]], CommandWriter]:
+    """The command queue, command_dispatcher and CommandWriter, in time scaled by SCALE."""
+    writes = []
+    start = time.perf_counter()
+    writer = CommandWriter(lambda data: writes.append(((time.perf_counter() - start) * SCALE, data)),
+                           budget=RX_BUFFER, interval=0.1 / SCALE)
+    queue = PriorityCommandQueue()
+
+    async def dispatch():
+        while True:
+            await writer.send(await queue.get())
+
+    dispatcher = asyncio.create_task(dispatch())
+    for n in range(BURSTS):
+        await asyncio.sleep(max(0.0, start + n * BURST_GAP / SCALE - time.perf_counter()))
+        for command in _burst(n):
+            await queue.put(command)
+    while not queue.empty() or writer._task:
+        await asyncio.sleep(writer.interval)
+    dispatcher.cancel()
+    return writes, writer
+
+
+def _row(writes, board) -> dict[str, float]:
+    state, lost_bytes, done = board(writes)
+    expected = _expected()
+    return {
+        "writes": len(writes),
+        "bytes": sum(len(data) for _, data in writes),
+        "lost_bytes": lost_bytes,
+        "pins_correct": sum(state.get(pin) == value for pin, value in expected.items()),
+        "settled_s": done,
+    }
+
+
+@pytest.mark.asyncio
+async def test_command_writer_link_model():
+    writes, _ = await _writer()
+    rows = {
+        "previous": _row(_unpaced(b""), _board_previous),
+        "unpaced_lines": _row(_unpaced(b"\n"), _board_line_reader),
+        "writer": _row(writes, _board_line_reader),
+    }
+    report(f"{BURSTS} bursts of 30 commands to {len(PINS)} pins at 9600 baud, {SENSOR_STALL * 1e3:.0f} ms loop stalls", rows)
+
+    assert rows["writer"]["pins_correct"] == len(PINS)
+    assert rows["writer"]["lost_bytes"] == 0
+    assert rows["writer"]["bytes"] < rows["unpaced_lines"]["bytes"]
+    assert rows["writer"]["settled_s"] < rows["previous"]["settled_s"]
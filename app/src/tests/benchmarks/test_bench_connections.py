@@ -0,0 +1,69 @@
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from katomato.core.connection import ConnectionManager
+from katomato.core.transport import LOOPBACK_BOARDS, LoopbackBoard
+from tests.benchmarks.bench_utils import LoopLagProbe, report
+
+BOARD_COUNTS = (1, 12, 48)
+RATE = 20  # readings/s per board, 4 sensors at 5 Hz
+DURATION = 1.0  # s
+
+
+class _StreamingBoard(LoopbackBoard):
+    def __init__(self, name: str):
+        super().__init__()
+        self.line = json.dumps({
+            "sensor": "dt", "label": "Temperature", "value": 21.5, "unit": "C",
+            "controls": [{"pin": 9, "type": "analog", "device": "exhaust_fan"}],
+        }).encode() + b"\n"
+
+    def received(self, data: bytes) -> None:
+        pass
+
+    async def stream(self) -> None:
+        while True:
+            self.send(self.line)
+            await asyncio.sleep(1 / RATE)
+
+
+async def _run(count: int) -> dict[str, float]:
+    boards = {f"tent-{i}": _StreamingBoard(f"tent-{i}") for i in range(count)}
+    dispatched = []
+    with patch.dict(LOOPBACK_BOARDS, boards), \
+            patch("katomato.core.serial.controller_dispatcher", lambda data, queue: dispatched.append(data.board)), \
+            patch("katomato.core.serial.config.TELEMETRY_PROTOCOL", "json"):
+        manager = ConnectionManager({name: {"transport": "loopback", "name": name} for name in boards}, asyncio.Queue())
+        manager.start()
+        await manager.wait_connected(5)
+
+        probe = LoopLagProbe()
+        probe.start()
+        start = time.perf_counter()
+        streams = [asyncio.create_task(board.stream()) for board in boards.values()]
+        await asyncio.sleep(DURATION)
+        for stream in streams:
+            stream.cancel()
+        elapsed = time.perf_counter() - start
+        await probe.stop()
+        await manager.close()
+
+    return {
+        "readings/s": len(dispatched) / elapsed,
+        "boards_seen": len(set(dispatched)),
+        "lag_p99_ms": probe.p99_ms,
+        "lag_max_ms": probe.max_ms,
+    }
+
+
+@pytest.mark.asyncio
+async def test_connection_manager_many_boards():
+    rows = {f"boards={count}": await _run(count) for count in BOARD_COUNTS}
+    report(f"Boards on one event loop, {RATE} readings/s each", rows)
+
+    assert rows[f"boards={BOARD_COUNTS[-1]}"]["boards_seen"] == BOARD_COUNTS[-1]
+    assert rows[f"boards={BOARD_COUNTS[-1]}"]["lag_p99_ms"] < 20
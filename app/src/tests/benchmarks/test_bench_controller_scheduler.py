@@ -0,0 +1,75 @@
+import asyncio
+import time
+import tracemalloc
+
+import pytest
+
+from katomato.core.scheduler import ControllerScheduler
+from katomato.core.sensor_data import Control, SensorData
+from tests.benchmarks.bench_utils import report
+
+RATE = 100  # Hz
+DURATION = 2.0  # s
+DEVICE_LATENCY = 0.5  # s, a slow command round trip while the controller holds its lock
+
+
+class _LockedController:
+    """Shaped like TemperatureController: serialized by a lock, slow while a device is switched."""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.decisions = 0
+
+    async def __call__(self, sensor_data, command_queue):
+        async with self._lock:
+            self.decisions += 1
+            await asyncio.sleep(DEVICE_LATENCY)
+
+
+def _reading(i: int) -> SensorData:
+    return SensorData("dt", "Temperature", 20 + i % 7, "C", (Control(9, "analog", "exhaust_fan"),))
+
+
+async def _stream(submit) -> dict[str, float]:
+    tracemalloc.start()
+    peak_tasks = 0
+    start = time.perf_counter()
+    for i in range(int(RATE * DURATION)):
+        submit(_reading(i))
+        peak_tasks = max(peak_tasks, len(asyncio.all_tasks()) - 1)
+        await asyncio.sleep(max(0.0, start + (i + 1) / RATE - time.perf_counter()))
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak_tasks": peak_tasks, "peak_kB": peak_bytes / 1024}
+
+
+@pytest.mark.asyncio
+async def test_controller_scheduler_100hz_stream():
+    queue = asyncio.Queue()
+
+    controller = _LockedController()
+    pending = set()
+
+    def create_task(sensor_data):
+        # The previous controller_dispatcher, with a reference kept only so the tasks can be cleaned up
+        task = asyncio.create_task(controller(sensor_data, queue))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    before = await _stream(create_task)
+    before["decisions"] = controller.decisions
+    for task in list(pending):
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    controller = _LockedController()
+    scheduler = ControllerScheduler()
+    after = await _stream(lambda sensor_data: scheduler.submit("dt", controller, sensor_data, queue))
+    after["decisions"] = controller.decisions
+    await scheduler.close()
+
+    report(f"Controller scheduling, {RATE} Hz for {DURATION:.0f} s", {"create_task": before, "scheduler": after})
+
+    assert after["peak_tasks"] <= 1
+    assert before["peak_tasks"] > 10 * after["peak_tasks"]
+    assert after["peak_kB"] < before["peak_kB"]
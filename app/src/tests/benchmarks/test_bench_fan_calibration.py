@@ -0,0 +1,54 @@
+import asyncio
+import statistics
+
+from katomato.core.calibration import calibrations
+from katomato.core.command_queue import PriorityCommandQueue
+from katomato.core.registry import Action
+from katomato.core.sensor_data import Control, State
+from katomato.devices.exhaust_fan import ExhaustFan
+from tests.benchmarks.bench_utils import report
+
+CONTROL = Control(pin=1, type="pwm", device="exhaust_fan", board="bench")
+
+
+def _fan_rpm(fan: ExhaustFan, stall_pwm: int) -> int:
+    return 1500 if (fan.output or 0) >= stall_pwm else 0
+
+
+async def _search(stall_pwm: int, queue: PriorityCommandQueue) -> int:
+    # Speed readings until an Action is no longer ignored, from an empty calibration store
+    calibrations.entries = {}
+    fan = ExhaustFan()
+    readings = 0
+    while not (fan.rpm_threshold_determined and fan._search is None):
+        await fan(State(_fan_rpm(fan, stall_pwm)), CONTROL, queue)
+        readings += 1
+    return readings
+
+
+async def _restart(queue: PriorityCommandQueue) -> int:
+    fan = ExhaustFan()
+    await fan(Action.DOWN, CONTROL, queue)
+    return 0 if fan.rpm_threshold_determined else 1
+
+
+async def _readings_until_controllable() -> dict[str, dict[str, float]]:
+    queue = PriorityCommandQueue()
+    pwm_values = ExhaustFan().pwm_values
+    # The replaced linear scan went up one index per reading and took the reading at the threshold too
+    linear = [idx + 1 for idx in range(len(pwm_values))]
+    binary = [await _search(pwm, queue) for pwm in pwm_values]
+    cached = [await _restart(queue)]
+    return {
+        name: {"mean_readings": statistics.fmean(counts), "max_readings": max(counts)}
+        for name, counts in (("linear", linear), ("binary", binary), ("cached", cached))
+    }
+
+
+def test_readings_until_fan_controllable():
+    rows = asyncio.run(_readings_until_controllable())
+    report("Speed readings until the exhaust fan takes commands", rows)
+
+    assert rows["binary"]["max_readings"] <= 5
+    assert rows["binary"]["max_readings"] < rows["linear"]["max_readings"] / 2
+    assert rows["cached"]["max_readings"] == 0
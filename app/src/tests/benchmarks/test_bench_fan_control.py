@@ -0,0 +1,51 @@
+import logging
+import statistics
+
+from katomato.config import config
+from katomato.sim.plant import DAY, PlantModel
+from katomato.sim.runner import run_simulation
+from tests.benchmarks.bench_utils import report
+
+HEAT_STEP_AT = 0.5  # day
+HEAT_BEFORE = 0.003  # C/s, the fan idles at its RPM threshold
+HEAT_AFTER = 0.0065  # C/s, needs most of the fan's speed
+
+
+class _HeatStep(PlantModel):
+    """A constant climate and a slowly ventilated room whose heat load steps up at noon, e.g. lamps switched on."""
+
+    ambient_temp = 24.0
+    ambient_temp_swing = 0.0
+    solar_gain = 0.0
+    fan_exchange = 1 / 600
+
+    def _step(self, dt: float) -> None:
+        super()._step(dt)
+        self.temperature += (HEAT_AFTER if self.time >= HEAT_STEP_AT * DAY else HEAT_BEFORE) * dt
+
+
+def _run(mode: str, monkeypatch) -> dict[str, float]:
+    monkeypatch.setattr(config, "EXHAUST_FAN_MODE", mode)
+    result = run_simulation(days=1, seed=1, reading_interval=60.0, sample_interval=10.0, plant=_HeatStep())
+
+    params = config.params
+    after = [s for s in result.samples if s.day >= HEAT_STEP_AT]
+    return {
+        "fan_commands": result.fan_commands,
+        "peak_c": max(s.temperature for s in after),
+        "above_band_s": 10.0 * sum(s.temperature > params.temp_mid + params.temp_tolerance for s in after),
+        "mean_error_c": statistics.fmean(abs(s.temperature - params.temp_mid) for s in after),
+    }
+
+
+def test_exhaust_fan_modes_after_heat_step(monkeypatch):
+    logging.disable(logging.INFO)
+    try:
+        rows = {mode: _run(mode, monkeypatch) for mode in ("step", "pid")}
+    finally:
+        logging.disable(logging.NOTSET)
+
+    report("Exhaust fan on a heat step, readings every 60 s", rows)
+    assert rows["pid"]["above_band_s"] < rows["step"]["above_band_s"]
+    assert rows["pid"]["peak_c"] < rows["step"]["peak_c"]
+    assert rows["pid"]["mean_error_c"] < rows["step"]["mean_error_c"]
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from influxdb_client import InfluxDBClient, Point
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+from katomato.core.metrics.batch_writer import BatchWriter
+from katomato.core.metrics.influxdb_publisher import to_line_protocol
+from katomato.core.sensor_data import SensorData
+from tests.benchmarks.bench_utils import LoopLagProbe, report
+
+READINGS = 200
+SERVER_DELAY = 0.002  # s, simulated InfluxDB write latency
+
+
+class _InfluxStandIn(BaseHTTPRequestHandler):
+    received = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(SERVER_DELAY)
+        _InfluxStandIn.received += body.count(b"\n") + 1
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def influx_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _InfluxStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _InfluxStandIn.received = 0
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _reading(i):
+    return SensorData(sensor="dt", label="Temperature", value=20 + i % 10, unit="C", controls=[])
+
+
+async def _drive(ingest) -> float:
+    """Feeds readings the way data_received does, yielding to the loop between frames."""
+    start = time.perf_counter()
+    for i in range(READINGS):
+        ingest(_reading(i))
+        await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+@pytest.mark.asyncio
+async def test_batched_ingestion_vs_synchronous_write(influx_server):
+    client = InfluxDBClient(url=influx_server, token="token", org="org")
+    write_api = client.write_api(write_options=SYNCHRONOUS)
+
+    # Before: one synchronous HTTP write per reading on the event loop
+    def synchronous_ingest(data):
+        point = (
+            Point("sensor_data")
+            .tag("sensor", data.sensor)
+            .field("value", float(data.value))
+            .field("label", data.label)
+            .field("unit", data.unit)
+            .time(datetime.now(UTC))
+        )
+        write_api.write(bucket="bucket", org="org", record=point)
+
+    probe = LoopLagProbe()
+    probe.start()
+    before_elapsed = await _drive(synchronous_ingest)
+    await probe.stop()
+    before = {"readings/s": READINGS / before_elapsed, "lag_p99_ms": probe.p99_ms, "lag_max_ms": probe.max_ms}
+
+    # After: O(1) enqueue, batches written from the background task
+    writer = BatchWriter(
+        lambda records: write_api.write(bucket="bucket", org="org", record=records),
+        batch_size=50,
+        flush_interval=0.05,
+    )
+    writer_task = asyncio.create_task(writer.run())
+    probe = LoopLagProbe()
+    probe.start()
+    after_elapsed = await _drive(lambda data: writer.enqueue(to_line_protocol(data, time.time_ns())))
+    await probe.stop()
+    writer.stop()
+    await writer_task
+    after = {"readings/s": READINGS / after_elapsed, "lag_p99_ms": probe.p99_ms, "lag_max_ms": probe.max_ms}
+
+    client.close()
+    report("InfluxDB ingestion", {"synchronous": before, "batched": after})
+
+    assert writer.written == READINGS
+    assert after["readings/s"] > before["readings/s"]
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+from katomato.core.command_queue import PriorityCommandQueue
+from katomato.core.instrumentation import Instrumentation
+from katomato.core.scheduler import ControllerScheduler
+from katomato.core.sensor_data import SensorData
+from tests.benchmarks.bench_utils import report
+
+READINGS = 20_000
+RUNS = 3
+
+
+async def _controller(sensor_data, command_queue):
+    command_queue.put_nowait(f'{{"command": "digital", "pin": {sensor_data.value % 8}, "value": 0}}')
+
+
+async def _pipeline_seconds(monkeypatch, probes) -> float:
+    # Readings through the controller mailbox, commands through the command queue
+    for module in ("katomato.core.scheduler", "katomato.core.command_queue"):
+        monkeypatch.setattr(f"{module}.probes", probes)
+    best = float("inf")
+    for _ in range(RUNS):
+        scheduler = ControllerScheduler()
+        queue = PriorityCommandQueue()
+        start = time.perf_counter()
+        for i in range(READINGS):
+            reading = SensorData("dt", "Temperature", i, "C", (), f"board-{i}", time.perf_counter_ns())
+            scheduler.submit("dt", _controller, reading, queue)
+        while scheduler.active_workers:
+            await asyncio.sleep(0)
+        while not queue.empty():
+            queue.get_nowait()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.asyncio
+async def test_instrumentation_overhead(monkeypatch):
+    disabled = await _pipeline_seconds(monkeypatch, Instrumentation(enabled=False))
+    probes = Instrumentation()
+    enabled = await _pipeline_seconds(monkeypatch, probes)
+
+    report("Controller pipeline with latency probes", {
+        "disabled": {"us/reading": disabled / READINGS * 1e6},
+        "enabled": {"us/reading": enabled / READINGS * 1e6, "overhead %": (enabled / disabled - 1) * 100},
+    })
+    print(probes.dump())
+    assert probes.histograms["controller", "dt"].count == READINGS * RUNS
+    assert enabled < disabled * 1.5
@@ -0,0 +1,91 @@
+import json
+import time
+
+from katomato.core.framing import LineFramer
+from tests.benchmarks.bench_utils import report
+
+CHUNK_SIZES = (1, 7, 64, 512)
+
+
+def _frame(i: int, extra_controls: int = 0) -> str:
+    """A line shaped like the output of SerialHandler::sendSensorData."""
+    controls = [{"pin": 9, "type": "analog", "device": "exhaust_fan"}]
+    controls += [{"pin": 20 + n, "type": "digital", "device": f"relay_{n}"} for n in range(extra_controls)]
+    return json.dumps({
+        "sensor": "dt",
+        "label": "Temperature",
+        "value": 20.0 + i % 7,
+        "unit": "C",
+        "controls": controls,
+    }, separators=(",", ":"))
+
+
+def _capture(frames: int, extra_controls: int = 0) -> bytes:
+    return ("\r\n".join(_frame(i, extra_controls) for i in range(frames)) + "\r\n").encode()
+
+
+def _chunks(capture: bytes, size: int) -> list[bytes]:
+    return [capture[i:i + size] for i in range(0, len(capture), size)]
+
+
+class _StringSplitFramer:
+    """The previous data_received framing: decode, concatenate, split the whole buffer."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, data: bytes) -> list[str]:
+        self.buffer += data.decode("utf-8", errors="ignore")
+        if "\n" in self.buffer:
+            lines = self.buffer.split("\n")
+            self.buffer = lines[-1]
+            return lines[:-1]
+        return []
+
+
+def _replay(framer, chunks) -> tuple[int, float]:
+    start = time.perf_counter()
+    count = 0
+    for data in chunks:
+        count += len(framer.feed(data))
+    return count, time.perf_counter() - start
+
+
+def _compare(capture: bytes, expected_lines: int) -> dict[str, dict[str, float]]:
+    rows = {}
+    for size in CHUNK_SIZES:
+        chunks = _chunks(capture, size)
+        before_count, before = _replay(_StringSplitFramer(), chunks)
+        after_count, after = _replay(LineFramer(max_line_length=64 * 1024), chunks)
+
+        assert before_count == after_count == expected_lines
+        rows[f"chunk={size}"] = {
+            "split_MB/s": len(capture) / before / 1e6,
+            "framer_MB/s": len(capture) / after / 1e6,
+        }
+    return rows
+
+
+def test_line_framer_regular_frames():
+    report("Serial line framing, regular frames", _compare(_capture(400), 400))
+
+
+def test_line_framer_long_frames():
+    # A sensor with many controls, the old framing rescans the whole partial line on every chunk
+    report("Serial line framing, long frames", _compare(_capture(20, extra_controls=200), 20))
+
+
+def test_line_framer_garbage_stream():
+    garbage = bytes(range(11, 128)) * 500  # no delimiter, e.g. wrong baud rate
+    chunks = _chunks(garbage, 64)
+
+    old = _StringSplitFramer()
+    _, before = _replay(old, chunks)
+    framer = LineFramer()
+    _, after = _replay(framer, chunks)
+
+    report("Serial line framing, garbage stream", {
+        "split": {"MB/s": len(garbage) / before / 1e6, "buffered_bytes": len(old.buffer)},
+        "framer": {"MB/s": len(garbage) / after / 1e6, "buffered_bytes": len(framer.pending)},
+    })
+    assert len(framer.pending) <= framer.max_line_length
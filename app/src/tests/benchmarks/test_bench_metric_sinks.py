@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+
+from katomato.core.metrics.columnar import ColumnarFileSink
+from katomato.core.metrics.fanout import MetricsFanout, Reading
+from katomato.core.metrics.influxdb_publisher import to_line_protocol
+from katomato.core.metrics.prometheus import PrometheusSink
+from katomato.core.registry import SINK_REGISTRY
+from katomato.core.sensor_data import SensorData
+from tests.benchmarks.bench_utils import report
+
+READINGS = 20_000
+
+
+class _LineSink:
+    # The InfluxDB sink's per-reading work without its writer task
+    def __init__(self):
+        self.lines = []
+
+    def handle(self, reading):
+        self.lines.append(to_line_protocol(reading.data, reading.timestamp_ns, reading.state))
+
+    async def run(self):
+        pass
+
+
+def _readings():
+    return [Reading(SensorData("dh", "Humidity", 60 + i % 20, "%", (), "main"), i, None) for i in range(READINGS)]
+
+
+@pytest.mark.asyncio
+async def test_serial_path_cost_does_not_grow_with_sinks(tmp_path, monkeypatch):
+    readings = _readings()
+    sinks = {
+        "line": _LineSink(),
+        "file": ColumnarFileSink(str(tmp_path), rows=READINGS * 2, interval=3600),
+        "prometheus": PrometheusSink(),
+    }
+    for name, sink in sinks.items():
+        monkeypatch.setitem(SINK_REGISTRY, name, sink)
+
+    start = time.perf_counter()
+    for reading in readings:
+        for sink in sinks.values():
+            sink.handle(reading)
+    inline = time.perf_counter() - start
+
+    fanout = MetricsFanout(max_queue=READINGS)
+    start = time.perf_counter()
+    for reading in readings:
+        fanout.publish(reading)
+    published = time.perf_counter() - start
+
+    start = time.perf_counter()
+    task = asyncio.create_task(fanout.run(list(sinks)))
+    while len(fanout):
+        await asyncio.sleep(0)
+    delivered = time.perf_counter() - start
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    report(f"Metrics export on the serial path, {len(sinks)} sinks", {
+        "inline": {"us/reading": inline / READINGS * 1e6},
+        "fan-out": {"us/reading": published / READINGS * 1e6, "deliver us/reading": delivered / READINGS * 1e6},
+    })
+    assert published < inline
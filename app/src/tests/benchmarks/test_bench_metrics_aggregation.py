@@ -0,0 +1,45 @@
+import random
+import time
+
+from katomato.core.metrics.aggregator import Aggregator
+from katomato.core.metrics.influxdb_publisher import to_line_protocol, window_to_line_protocol
+from katomato.core.sensor_data import SensorData
+from tests.benchmarks.bench_utils import report
+
+HOURS = 6
+SENSORS = (("dt", "Temperature", "C"), ("dh", "Humidity", "%"), ("sm", "Soil Moisture", "%"), ("ef", "Fan Speed", "RPM"))
+S = 1_000_000_000  # ns
+
+
+def _readings():
+    # Every sensor reports once a second, as the firmware does
+    rng = random.Random(0)
+    for second in range(HOURS * 3600):
+        for sensor, label, unit in SENSORS:
+            yield SensorData(sensor, label, round(rng.uniform(20, 80), 1), unit, (), "main"), second * S
+
+
+def test_aggregation_write_volume():
+    readings = list(_readings())
+
+    start = time.perf_counter()
+    raw = [to_line_protocol(data, ts) for data, ts in readings]
+    raw_seconds = time.perf_counter() - start
+
+    windows = []
+    aggregator = Aggregator(lambda window: windows.append(window_to_line_protocol(window)), window=60)
+    start = time.perf_counter()
+    for data, ts in readings:
+        aggregator.add(data, ts)
+    aggregator.flush()
+    aggregated_seconds = time.perf_counter() - start
+
+    raw_bytes = sum(len(line) + 1 for line in raw)
+    aggregated_bytes = sum(len(line) + 1 for line in windows)
+    report(f"Metrics export, {len(SENSORS)} sensors at 1 Hz for {HOURS} h", {
+        "raw": {"records": len(raw), "kB": raw_bytes / 1024, "us/reading": raw_seconds / len(readings) * 1e6},
+        "60s windows": {"records": len(windows), "kB": aggregated_bytes / 1024,
+                        "us/reading": aggregated_seconds / len(readings) * 1e6},
+    })
+    assert len(windows) == HOURS * 60 * len(SENSORS)
+    assert aggregated_bytes * 20 < raw_bytes
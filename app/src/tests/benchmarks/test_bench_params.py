@@ -0,0 +1,60 @@
+import inspect
+import time
+
+from katomato.config import config, hardware
+from katomato.config.base import get_hardware_config
+from katomato.config.hardware import Hardware
+from tests.benchmarks.bench_utils import report
+
+FRAMES = 20_000
+RUNS = 5
+
+
+def _reflect_hardware_config():
+    # get_hardware_config before the cache, called on every reading
+    return {
+        cls.__name__: cls
+        for _, cls in inspect.getmembers(hardware, inspect.isclass)
+        if issubclass(cls, Hardware) and cls is not Hardware
+    }
+
+
+def _frame_before(value: float) -> bool:
+    # The threshold math the humidity and soil moisture controllers did per reading
+    phase = config.growth_phase
+    hum_mid = phase.HUM_FLOOR + (phase.HUM_CEIL - phase.HUM_FLOOR) / 2
+    hum_tolerance = (phase.HUM_CEIL - phase.HUM_FLOOR) / 100 * 20
+    one_percent = _reflect_hardware_config().get("SoilMoistureSensor").UPPER_VALUE / 100
+    sm_tolerance = (phase.SOIL_MOISTURE_CEIL - phase.SOIL_MOISTURE_FLOOR) / 100 * 20
+    return (value > phase.HUM_CEIL - hum_tolerance or value <= hum_mid - hum_tolerance
+            or value / one_percent <= phase.SOIL_MOISTURE_FLOOR + sm_tolerance)
+
+
+def _frame_after(value: float) -> bool:
+    params = config.params
+    return (value > params.HUM_CEIL - params.hum_tolerance or value <= params.hum_mid - params.hum_tolerance
+            or value / params.soil_moisture_one_percent <= params.SOIL_MOISTURE_FLOOR + params.soil_moisture_tolerance)
+
+
+def _best_us_per_frame(frame) -> float:
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for i in range(FRAMES):
+            frame(40 + i % 30)
+        best = min(best, time.perf_counter() - start)
+    return best / FRAMES * 1e6
+
+
+def test_params_per_frame_cost():
+    get_hardware_config()  # warm the cache
+    assert all(_frame_before(v) == _frame_after(v) for v in range(0, 1000, 7))
+
+    before = _best_us_per_frame(_frame_before)
+    after = _best_us_per_frame(_frame_after)
+
+    report("Controller parameter lookup per reading", {
+        "before": {"us/frame": before},
+        "after": {"us/frame": after, "speedup": before / after},
+    })
+    assert after < before
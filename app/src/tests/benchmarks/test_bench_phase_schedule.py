@@ -0,0 +1,68 @@
+import time
+from datetime import datetime
+
+from katomato.config import config
+from katomato.config.base import get_hardware_config
+from katomato.config.params import build_params, interpolate
+from katomato.core.phase_schedule import DAY, PhaseSchedule
+from tests.benchmarks.bench_utils import report
+
+READINGS = 20_000
+RUNS = 5
+
+
+def _schedule() -> PhaseSchedule:
+    phases = config.get_growth_phases()
+    return PhaseSchedule([(phases[name], days) for name, days in config.PHASE_SCHEDULE.items()])
+
+
+def _on_the_fly(schedule_spec, planted_at: str):
+    # Setpoints derived from the calendar on every reading instead of a table lookup
+    hardware = get_hardware_config()
+
+    def lookup():
+        age = (datetime.now() - datetime.fromisoformat(planted_at)).total_seconds()
+        end = 0.0
+        for i, (phase_cls, days) in enumerate(schedule_spec):
+            end += days * DAY
+            if age < end:
+                params = build_params(phase_cls(), hardware)
+                left = end - age
+                if i + 1 < len(schedule_spec) and left <= 2 * DAY:
+                    params = interpolate(params, build_params(schedule_spec[i + 1][0](), hardware), 1 - left / (2 * DAY))
+                return params
+        return build_params(schedule_spec[-1][0](), hardware)
+
+    return lookup
+
+
+def _best_us(lookup) -> float:
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for _ in range(READINGS):
+            lookup()
+        best = min(best, time.perf_counter() - start)
+    return best / READINGS * 1e6
+
+
+def test_phase_schedule_lookup_cost():
+    phases = config.get_growth_phases()
+    spec = [(phases[name], days) for name, days in config.PHASE_SCHEDULE.items()]
+    planted_at = datetime.fromtimestamp(time.time() - 20 * DAY).isoformat()
+
+    start = time.perf_counter()
+    schedule = _schedule()
+    build_ms = (time.perf_counter() - start) * 1000
+    planted = datetime.fromisoformat(planted_at).timestamp()
+
+    before = _best_us(_on_the_fly(spec, planted_at))
+    after = _best_us(lambda: schedule.at(time.time() - planted))
+    hot_path = _best_us(lambda: config.params.hum_mid)
+
+    report("Setpoints per reading, 20 days into the default schedule", {
+        "calendar": {"us/reading": before},
+        "table": {"us/reading": after, "entries": len(schedule.table), "build_ms": build_ms},
+        "params": {"us/reading": hot_path},
+    })
+    assert after < before
@@ -0,0 +1,81 @@
+import asyncio
+
+from katomato.config import config
+from katomato.controllers.soil_moisture import SoilMoistureController
+from katomato.core.clock import get_clock
+from katomato.core.registry import DEVICE_REGISTRY, DEVICES, Action, get_device
+from katomato.core.scheduler import ControllerScheduler
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.timer_wheel import TimerWheel
+from tests.benchmarks.bench_utils import report
+from tests.test_utils import run_virtual
+
+RUNTIME = 120.0  # s, planned pump run
+WET_AT = 30.0  # s, the soil reaches the target early
+
+
+class _Pump:
+    def __init__(self, clock):
+        self.clock = clock
+        self.stopped_at = None
+
+    async def estimate_runtime(self, sensor_data):
+        return RUNTIME
+
+    async def __call__(self, action, ctrl, command_queue):
+        if action == Action.DOWN and self.stopped_at is None:
+            self.stopped_at = self.clock.monotonic()
+
+
+class _BlockingController(SoilMoistureController):
+    """The previous controller: the lock is held while the pump runs."""
+
+    async def __call__(self, sensor_data, command_queue):
+        async with self._lock:
+            if self.clock.monotonic() - self.last_decision_time < self.decision_interval:
+                return
+            val = sensor_data.value / config.params.soil_moisture_one_percent
+            for ctrl in sensor_data.controls:
+                device = get_device(ctrl)
+                if val <= config.params.SOIL_MOISTURE_FLOOR + config.params.soil_moisture_tolerance:
+                    duration = await device.estimate_runtime(sensor_data)
+                    await device(Action.UP, ctrl, command_queue)
+                    await self.clock.sleep(duration)
+                    await device(Action.DOWN, ctrl, command_queue)
+            self.last_decision_time = self.clock.monotonic()
+
+
+def _reading(percent: float) -> SensorData:
+    raw = percent * config.params.soil_moisture_one_percent
+    return SensorData("sm", "Soil Moisture", raw, "%", (Control(12, "digital", "bench_pump"),))
+
+
+async def _watering(controller_cls) -> dict[str, float]:
+    pump = _Pump(get_clock())
+    DEVICE_REGISTRY["bench_pump"] = lambda: pump
+    DEVICES.clear()
+    controller = controller_cls(timer_wheel=TimerWheel())
+    controller.last_decision_time = -controller.decision_interval
+    scheduler = ControllerScheduler()
+    queue = asyncio.Queue()
+
+    for second in range(int(RUNTIME) + 10):
+        percent = 10.0 if second < WET_AT else config.params.SOIL_MOISTURE_CEIL + 1
+        scheduler.submit("sm", controller, _reading(percent), queue)
+        await asyncio.sleep(1)
+    stats = scheduler.stats["sm"]
+    await scheduler.close()
+    del DEVICE_REGISTRY["bench_pump"]
+    return {"stop_latency_s": pump.stopped_at - WET_AT, "readings_handled": stats.processed,
+            "readings_coalesced": stats.coalesced}
+
+
+def test_pump_stop_latency():
+    before = run_virtual(_watering(_BlockingController))
+    after = run_virtual(_watering(SoilMoistureController))
+
+    report(f"Pump planned for {RUNTIME:.0f} s, soil wet after {WET_AT:.0f} s, a reading every second", {
+        "before": before,
+        "after": after,
+    })
+    assert after["stop_latency_s"] < 1.0 < before["stop_latency_s"]
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from katomato.config import config
+from katomato.core.registry import DEVICE_REGISTRY, Action, get_device
+from katomato.core.rules import RuleController, rule_table
+from katomato.core.sensor_data import Control, SensorData
+from tests.benchmarks.bench_utils import report
+
+log = logging.getLogger(__name__)
+
+READINGS = 50_000
+
+
+class _Device:
+    async def __call__(self, action, ctrl, command_queue):
+        pass
+
+
+class _ClassHumidityController:
+    """The previous hand-coded HumidityController."""
+
+    def __init__(self, debug_log=True):
+        self.debug_log = debug_log
+
+    async def __call__(self, sensor_data, command_queue):
+        val = sensor_data.value
+        for ctrl in sensor_data.controls:
+            device = get_device(ctrl)
+            params = config.params
+            if val > params.HUM_CEIL - params.hum_tolerance:
+                await device(Action.DOWN, ctrl, command_queue)
+            elif val <= params.hum_mid - params.hum_tolerance:
+                await device(Action.UP, ctrl, command_queue)
+        if self.debug_log:
+            log.debug(f"HumidityController: {sensor_data}")  # formatted even with DEBUG off
+
+
+async def _throughput(controller, readings) -> dict[str, float]:
+    queue = asyncio.Queue()
+    start = time.perf_counter()
+    for sensor_data in readings:
+        await controller(sensor_data, queue)
+    elapsed = time.perf_counter() - start
+    return {"readings_per_s": len(readings) / elapsed, "us_per_reading": elapsed / len(readings) * 1e6}
+
+
+@pytest.mark.asyncio
+async def test_rule_evaluation_throughput(monkeypatch):
+    monkeypatch.setitem(DEVICE_REGISTRY, "bench_humidifier", _Device)
+    ctrl = Control(7, "digital", "bench_humidifier")
+    params = config.params
+    # A sweep across the band: above the ceiling, inside and below the middle
+    low, high = params.HUM_FLOOR - 5, params.HUM_CEIL + 5
+    readings = [
+        SensorData("dh", "Humidity", low + (high - low) * (i % 100) / 100, "%", (ctrl,))
+        for i in range(READINGS)
+    ]
+
+    rows = {
+        "class": await _throughput(_ClassHumidityController(), readings),
+        "class-quiet": await _throughput(_ClassHumidityController(debug_log=False), readings),
+        "rules": await _throughput(RuleController(rule_table["dh"]), readings),
+    }
+    report(f"Humidity controller, {READINGS} readings", rows)
+
+    assert rows["rules"]["readings_per_s"] > rows["class"]["readings_per_s"]
+    # The rule lookup itself costs about as much as the hand-coded comparisons
+    assert rows["rules"]["readings_per_s"] > rows["class-quiet"]["readings_per_s"] * 0.6
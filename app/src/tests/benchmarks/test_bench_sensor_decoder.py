@@ -0,0 +1,93 @@
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import pytest
+
+from katomato.core.utils import command_util
+from katomato.core.utils.command_util import get_sensor_data
+from tests.benchmarks.bench_utils import report
+
+FRAMES = 4000
+
+
+@dataclass
+class _Control:
+    pin: int
+    type: str
+    device: str
+
+
+@dataclass
+class _SensorData:
+    sensor: str
+    label: str
+    value: float
+    unit: str
+    controls: list
+
+
+def _previous_decoder(line):
+    """get_sensor_data before controls caching: full parse, fresh Control objects per frame."""
+    data = json.loads(line.decode())  # data_received used to decode every chunk to str
+    data["controls"] = [_Control(**ctrl) for ctrl in data.get("controls", [])]
+    return _SensorData(**data)
+
+
+def _frames() -> list[bytes]:
+    return [
+        b'{"sensor":"dh","label":"Humidity","value":%.1f,"unit":"%%","controls":['
+        b'{"pin":4,"type":"digital","device":"alarm_light"},{"pin":5,"type":"digital","device":"humidifier"}]}'
+        % (50 + i % 30)
+        for i in range(FRAMES)
+    ]
+
+
+def _measure(decode, frames, repeat: int = 5) -> dict[str, float]:
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            decode(frame)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    # Memory retained by decoded readings, e.g. while they wait in controller mailboxes
+    tracemalloc.start()
+    retained = [decode(frame) for frame in frames]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(retained) == len(frames)
+
+    return {"us/frame": elapsed / len(frames) * 1e6, "bytes/frame": size / len(frames)}
+
+
+def test_sensor_decoder(monkeypatch):
+    frames = _frames()
+    rows = {"previous": _measure(_previous_decoder, frames)}
+
+    monkeypatch.setattr(command_util, "json_loads", lambda data: json.loads(data.decode()))
+    rows["cached+json"] = _measure(get_sensor_data, frames)
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson:
+        monkeypatch.setattr(command_util, "json_loads", orjson.loads)
+        rows["cached+orjson"] = _measure(get_sensor_data, frames)
+
+    report("Sensor frame decoding", rows)
+
+    assert rows["cached+json"]["bytes/frame"] < rows["previous"]["bytes/frame"]
+
+
+@pytest.mark.parametrize("frame", _frames()[:1])
+def test_decoders_agree(frame):
+    previous = _previous_decoder(frame)
+    current = get_sensor_data(frame)
+
+    assert (current.sensor, current.label, current.value, current.unit) == \
+           (previous.sensor, previous.label, previous.value, previous.unit)
+    assert [(c.pin, c.type, c.device) for c in current.controls] == \
+           [(c.pin, c.type, c.device) for c in previous.controls]
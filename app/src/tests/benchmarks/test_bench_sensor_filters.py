@@ -0,0 +1,60 @@
+import math
+import random
+import time
+
+from katomato.config import config
+from katomato.core.filters import FilterStage
+from katomato.core.registry import Action
+from katomato.core.sensor_data import SensorData
+from tests.benchmarks.bench_utils import report
+
+READINGS = 20_000
+
+
+def _humidity_stream(seed: int = 0) -> list[SensorData]:
+    # A slow swing across the humidifier thresholds, DHT noise and a glitch every few hundred readings
+    rng = random.Random(seed)
+    params = config.params
+    values = []
+    for i in range(READINGS):
+        value = params.hum_mid + (params.HUM_CEIL - params.hum_mid) * math.sin(i / 500) + rng.gauss(0, 1.0)
+        if rng.random() < 0.005:
+            value = rng.choice((0.0, 99.9))
+        values.append(SensorData("dh", "Humidity", round(value, 1), "%", ()))
+    return values
+
+
+def _toggles(readings) -> int:
+    # The humidity controller's decision, only changes turn into commands
+    params = config.params
+    state, toggles = None, 0
+    for reading in readings:
+        if reading is None:
+            continue
+        if reading.value > params.HUM_CEIL - params.hum_tolerance:
+            action = Action.DOWN
+        elif reading.value <= params.hum_mid - params.hum_tolerance:
+            action = Action.UP
+        else:
+            continue
+        toggles += action != state
+        state = action
+    return toggles
+
+
+def test_filters_cut_humidifier_toggles():
+    readings = _humidity_stream()
+    stage = FilterStage(config.SENSOR_FILTERS, window=config.FILTER_WINDOW)
+
+    start = time.perf_counter()
+    filtered = [stage.apply(reading) for reading in readings]
+    elapsed = time.perf_counter() - start
+
+    raw = _toggles(readings)
+    after = _toggles(filtered)
+    report("Humidifier toggles on a noisy humidity stream", {
+        "raw": {"toggles": raw},
+        "filtered": {"toggles": after, "us/reading": elapsed / READINGS * 1e6,
+                     "rejected": sum(reading is None for reading in filtered)},
+    })
+    assert after < raw
@@ -0,0 +1,24 @@
+import logging
+
+from katomato.sim.runner import run_simulation
+from tests.benchmarks.bench_utils import report
+
+DAYS = 90
+
+
+def test_simulated_grow_speed():
+    logging.disable(logging.INFO)
+    try:
+        result = run_simulation(days=DAYS, reading_interval=300.0)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    report(f"{DAYS}-day grow on the virtual clock, readings every 300 s", {
+        "simulator": {
+            "wall_s": result.wall_seconds,
+            "speedup": DAYS * 86400 / result.wall_seconds,
+            "readings": result.readings,
+            "commands": result.commands,
+        },
+    })
+    assert [s.phase for s in result.samples][-1] == "LateGrowth"
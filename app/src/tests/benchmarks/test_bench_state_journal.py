@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from katomato.core.state_journal import StateJournal
+from tests.benchmarks.bench_utils import report
+
+DEVICES = 200  # pins across all boards
+RECORDS = 20_000
+
+
+def _record(directory: str | None) -> float:
+    journal = StateJournal(directory, snapshot_records=RECORDS)
+    start = time.perf_counter_ns()
+    for i in range(RECORDS):
+        journal.record(("device", "humidifier", f"b{i % 4}", i % DEVICES), {"type": "digital", "value": i % 3})
+    elapsed = time.perf_counter_ns() - start
+    journal.close()
+    return elapsed / RECORDS / 1000
+
+
+def _load(directory: str) -> float:
+    start = time.perf_counter()
+    entries = StateJournal(directory).load()
+    elapsed = (time.perf_counter() - start) * 1000
+    assert len(entries) == DEVICES
+    return elapsed
+
+
+def test_state_journal_record_and_replay(tmp_path):
+    memory_us = _record(None)
+    journaled_us = _record(str(tmp_path / "journal"))
+    replay_ms = _load(str(tmp_path / "journal"))
+
+    # The same state compacted into a snapshot plus a short journal, as after a run with periodic snapshots
+    compacted = StateJournal(str(tmp_path / "compacted"))
+    for i in range(RECORDS):
+        compacted.record(("device", "humidifier", f"b{i % 4}", i % DEVICES), {"type": "digital", "value": i % 3})
+        if i == RECORDS - 100:
+            asyncio.run(compacted.compact())
+    compacted.close()
+    snapshot_ms = _load(str(tmp_path / "compacted"))
+
+    rows = {
+        "memory": {"us_per_record": memory_us},
+        "journal": {"us_per_record": journaled_us, "replay_ms": replay_ms},
+        "snapshot": {"replay_ms": snapshot_ms},
+    }
+    report(f"State journal, {DEVICES} devices, {RECORDS} records", rows)
+
+    assert journaled_us < 100  # cheap next to a serial command
+    assert snapshot_ms < replay_ms
+    assert snapshot_ms < 50
@@ -0,0 +1,85 @@
+import json
+import time
+
+from katomato.core.sensor_data import Control
+from katomato.core.serial import TelemetryDecoder, encode_meta, encode_reading
+from katomato.core.utils.command_util import get_sensor_data
+from tests.benchmarks.bench_utils import report
+
+BAUD_RATE = 9600
+BYTES_PER_SECOND = BAUD_RATE / 10  # 8N1: start + 8 data + stop bits
+READINGS = 4000
+
+SENSORS = (
+    ("dt", "Temperature", "C", (Control(9, "analog", "exhaust_fan"),)),
+    ("dh", "Humidity", "%", (Control(4, "digital", "alarm_light"), Control(5, "digital", "humidifier"))),
+    ("sm", "Soil moisture", "%", (Control(7, "digital", "water_pump"),)),
+)
+
+
+def _json_stream() -> bytes:
+    lines = []
+    for i in range(READINGS):
+        sensor, label, unit, controls = SENSORS[i % len(SENSORS)]
+        lines.append(json.dumps({
+            "sensor": sensor,
+            "label": label,
+            "value": round(20 + i % 13 * 0.7, 2),
+            "unit": unit,
+            "controls": [c._asdict() for c in controls],
+        }, separators=(",", ":")))
+    return ("\r\n".join(lines) + "\r\n").encode()
+
+
+def _binary_stream() -> tuple[bytes, bytes]:
+    meta = b"".join(encode_meta(idx, *sensor) for idx, sensor in enumerate(SENSORS))
+    readings = b"".join(
+        encode_reading(i % len(SENSORS), i // len(SENSORS), 20 + i % 13 * 0.7) for i in range(READINGS)
+    )
+    return meta, readings
+
+
+def _decode_json(stream: bytes) -> float:
+    elapsed = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        count = sum(1 for line in stream.split(b"\n") if get_sensor_data(line.strip()))
+        elapsed = min(elapsed, time.perf_counter() - start)
+    assert count == READINGS
+    return elapsed
+
+
+def _decode_binary(meta: bytes, readings: bytes) -> float:
+    elapsed = float("inf")
+    for _ in range(5):
+        decoder = TelemetryDecoder()
+        decoder.feed(meta)
+        start = time.perf_counter()
+        count = sum(len(decoder.feed(readings[i:i + 64])) for i in range(0, len(readings), 64))
+        elapsed = min(elapsed, time.perf_counter() - start)
+    assert count == READINGS
+    assert decoder.crc_errors == decoder.lost_frames == 0
+    return elapsed
+
+
+def test_telemetry_throughput():
+    json_stream = _json_stream()
+    meta, readings = _binary_stream()
+
+    json_bytes = len(json_stream) / READINGS
+    binary_bytes = len(readings) / READINGS
+    rows = {
+        "json": {
+            "bytes/reading": json_bytes,
+            "readings/s@9600": BYTES_PER_SECOND / json_bytes,
+            "decode_us": _decode_json(json_stream) / READINGS * 1e6,
+        },
+        "binary": {
+            "bytes/reading": binary_bytes,
+            "readings/s@9600": BYTES_PER_SECOND / binary_bytes,
+            "decode_us": _decode_binary(meta, readings) / READINGS * 1e6,
+        },
+    }
+    report(f"Telemetry at {BAUD_RATE} baud (META handshake: {len(meta)} bytes)", rows)
+
+    assert rows["binary"]["readings/s@9600"] > 5 * rows["json"]["readings/s@9600"]
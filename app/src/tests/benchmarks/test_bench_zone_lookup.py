@@ -0,0 +1,39 @@
+import time
+
+from katomato.core.registry import CONTROLLER_REGISTRY, DEVICE_REGISTRY, get_controller, get_device
+from katomato.core.sensor_data import Control, SensorData
+from tests.benchmarks.bench_utils import report
+
+LOOKUPS = 100_000
+
+
+class _Thing:
+    pass
+
+
+def _lookups(zones: int) -> dict[str, float]:
+    # 50 zones per board, each with its own fan pin
+    readings = []
+    for zone in range(zones):
+        board = f"b{zone // 50}"
+        ctrl = Control(zone % 50, "analog", "bench_fan", board)
+        readings.append(SensorData("bench_dt", "Temperature", 21, "C", (ctrl,), board, zone=f"z{zone}"))
+    for data in readings:
+        get_controller(data)  # instances are created on first use, not measured
+
+    start = time.perf_counter_ns()
+    for i in range(LOOKUPS):
+        data = readings[i % zones]
+        get_controller(data)
+        get_device(data.controls[0])
+    return {"ns_per_reading": (time.perf_counter_ns() - start) / LOOKUPS}
+
+
+def test_lookup_cost_per_zone_count(monkeypatch):
+    monkeypatch.setitem(CONTROLLER_REGISTRY, "bench_dt", _Thing)
+    monkeypatch.setitem(DEVICE_REGISTRY, "bench_fan", _Thing)
+
+    rows = {f"{zones} zones": _lookups(zones) for zones in (10, 1000)}
+    report("Controller and device lookup per reading", rows)
+
+    assert rows["1000 zones"]["ns_per_reading"] < rows["10 zones"]["ns_per_reading"] * 3
@@ -0,0 +1,48 @@
+import pytest
+
+from katomato.config import config
+from katomato.config.base import get_hardware_config
+from katomato.config.zucchini import Flowering, Germination, Zucchini
+
+
+@pytest.fixture
+def restore_phase():
+    phase, params = config.growth_phase, config.params
+    yield
+    config.growth_phase, config.params = phase, params
+
+
+def test_params_match_active_phase():
+    phase = config.growth_phase
+    params = config.params
+
+    assert params.phase == type(phase).__name__
+    assert params.HUM_CEIL == phase.HUM_CEIL
+    assert params.temp_mid == pytest.approx((phase.TEMP_FLOOR + phase.TEMP_CEIL) / 2)
+    assert params.pot_volume == get_hardware_config()["WaterPump"].POT_VOLUME
+
+
+def test_switch_growth_phase_rebuilds_params(restore_phase):
+    before = config.params
+
+    config.switch_growth_phase(Flowering)
+
+    assert config.params is not before
+    assert config.params.phase == "Flowering"
+    assert config.params.SOIL_MOISTURE_CEIL == Flowering.SOIL_MOISTURE_CEIL
+
+    config.switch_growth_phase(Germination)
+    assert config.params == before
+
+
+def test_params_are_immutable():
+    with pytest.raises(AttributeError):
+        config.params.HUM_CEIL = 0
+
+
+def test_default_board_follows_subclass_serial_port():
+    class Greenhouse(Zucchini):
+        SERIAL_PORT = "/dev/ttyACM1"
+        BAUD_RATE = 115200
+
+    assert Greenhouse().get_boards() == {"main": {"transport": "serial", "port": "/dev/ttyACM1", "baudrate": 115200}}
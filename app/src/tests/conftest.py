@@ -1,19 +1,45 @@
 import pytest
-import asyncio
 
 from unittest.mock import AsyncMock, MagicMock
 
-from katomato.core.registry import DEVICE_REGISTRY
+from katomato.core.command_queue import PriorityCommandQueue
+from katomato.core.calibration import calibrations
+from katomato.core.registry import CONTROLLERS, DEVICE_REGISTRY, DEVICES
+from katomato.core.state_journal import journal
 
 
 @pytest.fixture(name="ctx")
 def controller_test_context():
     class ControllerTestContext:
         def __init__(self):
-            self.command_queue = asyncio.Queue()
+            self.command_queue = PriorityCommandQueue()
             self.mock_device = AsyncMock()
             self.mock_ctrl = MagicMock()
             self.mock_ctrl.device = "device"
-            DEVICE_REGISTRY["device"] = self.mock_device
+            DEVICE_REGISTRY["device"] = lambda: self.mock_device
 
     return ControllerTestContext()
+
+
+@pytest.fixture(autouse=True)
+def fresh_instances():
+    # Controller and device instances are created on first use, every test starts without any
+    CONTROLLERS.clear()
+    DEVICES.clear()
+    yield
+    CONTROLLERS.clear()
+    DEVICES.clear()
+
+
+@pytest.fixture(autouse=True)
+def calibration_store(monkeypatch):
+    # In memory, tests neither share calibrations nor write them to the working directory
+    monkeypatch.setattr(calibrations, "path", None)
+    monkeypatch.setattr(calibrations, "entries", {})
+
+
+@pytest.fixture(autouse=True)
+def state_journal(monkeypatch):
+    # In memory as well, a test starts without journaled state
+    monkeypatch.setattr(journal, "directory", None)
+    monkeypatch.setattr(journal, "entries", {})
@@ -1,12 +1,14 @@
+import asyncio
 import time
-from unittest.mock import patch, AsyncMock
+from unittest.mock import AsyncMock
 
 import pytest
 
 from katomato.config import config
 from katomato.controllers.soil_moisture import SoilMoistureController
 from katomato.core.registry import Action
-from tests.test_utils import get_test_sensor_data
+from katomato.core.timer_wheel import TimerWheel
+from tests.test_utils import get_test_sensor_data, run_virtual
 
 
 @pytest.fixture
@@ -65,21 +67,53 @@ async def test_delay_in_decision_making(ctx, controller):
     ctx.mock_device.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_controller_estimates_runtime(ctx, controller):
-    ctx.mock_device.estimate_runtime = AsyncMock(return_value=14.0)
+@pytest.fixture
+def timed_controller():
+    controller = SoilMoistureController(timer_wheel=TimerWheel())
+    controller.last_decision_time = -controller.decision_interval
+    return controller
 
-    with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
-        sensor_data = get_test_sensor_data(
-            ctx.mock_ctrl,
-            config.growth_phase.SOIL_MOISTURE_FLOOR * 10 + controller.soil_moisture_tolerance
+
+def test_controller_estimates_runtime(ctx, timed_controller):
+    ctx.mock_device.estimate_runtime = AsyncMock(return_value=14.0)
+    sensor_data = get_test_sensor_data(
+        ctx.mock_ctrl,
+        config.growth_phase.SOIL_MOISTURE_FLOOR * 10 + timed_controller.soil_moisture_tolerance
+    )
+
+    async def main():
+        await timed_controller(sensor_data, ctx.command_queue)
+
+        ctx.mock_device.assert_awaited_once_with(Action.UP, ctx.mock_ctrl, ctx.command_queue)
+        # The estimate gets the moisture in %, not the raw sensor value
+        ctx.mock_device.estimate_runtime.assert_called_once_with(
+            sensor_data._replace(value=sensor_data.value / timed_controller.one_percent)
         )
 
-        await controller(sensor_data, ctx.command_queue)
+        await asyncio.sleep(14.1)
+        ctx.mock_device.assert_awaited_with(Action.DOWN, ctx.mock_ctrl, ctx.command_queue)
+
+    run_virtual(main())
+
+    assert not timed_controller.runs
+
+
+def test_pump_stops_early_when_target_reached(ctx, timed_controller):
+    ctx.mock_device.estimate_runtime = AsyncMock(return_value=60.0)
+    dry = get_test_sensor_data(ctx.mock_ctrl, 0)
+    wet = get_test_sensor_data(ctx.mock_ctrl, config.params.SOIL_MOISTURE_CEIL * timed_controller.one_percent)
+
+    async def main():
+        await timed_controller(dry, ctx.command_queue)
+        await asyncio.sleep(5)
+        await timed_controller(dry, ctx.command_queue)  # handled while the pump runs, nothing changes
+        assert ctx.mock_device.await_count == 1
 
-        ctx.mock_device.assert_any_call(Action.UP, ctx.mock_ctrl, ctx.command_queue)
-        ctx.mock_device.estimate_runtime.assert_called_once_with(sensor_data)
+        await timed_controller(wet, ctx.command_queue)
+        ctx.mock_device.assert_awaited_with(Action.DOWN, ctx.mock_ctrl, ctx.command_queue)
+        assert not timed_controller.runs
 
-        mock_sleep.assert_awaited_once_with(14.0)
+        await asyncio.sleep(60)
+        assert ctx.mock_device.await_count == 2  # the planned stop was cancelled
 
-        ctx.mock_device.assert_any_call(Action.DOWN, ctx.mock_ctrl, ctx.command_queue)
+    run_virtual(main())
@@ -1,9 +1,12 @@
 import time
+from unittest.mock import AsyncMock
 
 import pytest
 
+from katomato.config import config
 from katomato.controllers.temperature import TemperatureController
-from katomato.core.registry import Action
+from katomato.core.registry import DEVICE_REGISTRY, Action
+from katomato.core.sensor_data import Control, Duty, SensorData
 from tests.test_utils import get_test_sensor_data
 
 
@@ -72,3 +75,33 @@ async def test_delay_in_decision_making(ctx, controller):
 
     # Sensor readings above acceptable value, but action hasn't been triggered
     ctx.mock_device.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_pid_mode_sets_duty_on_every_reading(ctx, monkeypatch):
+    monkeypatch.setattr(config, "EXHAUST_FAN_MODE", "pid")
+    ctx.mock_device.continuous = True
+    controller = TemperatureController()
+    light, light_device = Control(4, "digital", "light"), AsyncMock()
+    light_device.continuous = False
+    monkeypatch.setitem(DEVICE_REGISTRY, "light", lambda: light_device)
+
+    for offset in (1.0, 2.0):
+        sensor_data = SensorData("dt", "Temperature", controller.temp_mid + offset, "C", (ctx.mock_ctrl, light))
+        await controller(sensor_data, ctx.command_queue)
+
+    # The fan gets a duty on every reading, the light waits for the decision interval
+    duties = [call.args[0] for call in ctx.mock_device.await_args_list]
+    assert [type(duty) for duty in duties] == [Duty, Duty]
+    assert 0 < duties[0].value < duties[1].value <= 1
+    light_device.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_step_mode_switches_fan(ctx, controller):
+    ctx.mock_device.continuous = True
+    sensor_data = get_test_sensor_data(ctx.mock_ctrl, controller.temp_mid + controller.temp_tolerance + 0.01)
+
+    await controller(sensor_data, ctx.command_queue)
+
+    ctx.mock_device.assert_awaited_once_with(Action.DOWN, ctx.mock_ctrl, ctx.command_queue)
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from katomato.core.metrics.aggregator import Aggregator
+from katomato.core.sensor_data import SensorData
+
+S = 1_000_000_000  # ns
+
+
+def _reading(value, sensor="dh", board="main"):
+    return SensorData(sensor=sensor, label="Humidity", value=value, unit="%", controls=(), board=board)
+
+
+def test_window_is_emitted_when_the_next_one_starts():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=60)
+    for second, value in ((0, 70), (10, 74), (59, 72)):
+        aggregator.add(_reading(value), second * S)
+
+    assert emitted == []
+
+    aggregator.add(_reading(80), 61 * S)
+
+    [window] = emitted
+    assert (window.start_ns, window.min, window.max, window.mean, window.count) == (0, 70, 74, 72, 3)
+    assert len(aggregator) == 1
+
+
+def test_series_are_aggregated_per_board_and_sensor():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=60)
+    aggregator.add(_reading(70, board="a"), 0)
+    aggregator.add(_reading(50, board="b"), 0)
+    aggregator.add(_reading(20, sensor="dt", board="a"), 0)
+
+    aggregator.flush()
+
+    assert sorted((w.board, w.sensor, w.mean) for w in emitted) == [("a", "dh", 70), ("a", "dt", 20), ("b", "dh", 50)]
+    assert len(aggregator) == 0
+
+
+def test_flush_emits_only_ended_windows():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=60)
+    aggregator.add(_reading(70, board="a"), 10 * S)
+    aggregator.add(_reading(70, board="b"), 70 * S)
+
+    aggregator.flush(now_ns=90 * S)
+
+    assert [w.board for w in emitted] == ["a"]
+
+
+def test_series_are_bounded():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=60, max_series=2)
+    for board in ("a", "b", "c"):
+        aggregator.add(_reading(70, board=board), 0)
+
+    assert len(aggregator) == 2
+    assert aggregator.dropped == 1
+
+
+def test_non_numeric_readings_are_skipped():
+    aggregator = Aggregator(lambda window: None)
+
+    aggregator.add(_reading("error"), 0)
+
+    assert len(aggregator) == 0
+
+
+def test_non_finite_readings_are_skipped():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=60)
+
+    for value in (70.0, float("nan"), float("inf"), 72.0):
+        aggregator.add(_reading(value), 1 * S)
+    aggregator.flush()
+
+    assert (emitted[0].min, emitted[0].max, emitted[0].mean, emitted[0].count) == (70.0, 72.0, 71.0, 2)
+
+
+@pytest.mark.asyncio
+async def test_run_flushes_open_windows_on_cancel():
+    emitted = []
+    aggregator = Aggregator(emitted.append, window=3600)
+    aggregator.add(_reading(70), 0)
+    task = asyncio.create_task(aggregator.run())
+    await asyncio.sleep(0)
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert len(emitted) == 1
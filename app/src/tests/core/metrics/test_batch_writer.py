@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from katomato.core.metrics.batch_writer import BatchWriter, OverflowPolicy
+from katomato.core.metrics.spool import RejectedBatch
+
+
+@pytest.mark.asyncio
+async def test_flush_by_size():
+    sink = MagicMock()
+    writer = BatchWriter(sink, batch_size=3, flush_interval=60)
+    task = asyncio.create_task(writer.run())
+
+    for i in range(3):
+        writer.enqueue(f"r{i}")
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    sink.assert_called_once_with(["r0", "r1", "r2"])
+    assert writer.written == 3
+    assert len(writer) == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_by_interval():
+    sink = MagicMock()
+    writer = BatchWriter(sink, batch_size=100, flush_interval=0.01)
+    task = asyncio.create_task(writer.run())
+
+    writer.enqueue("r0")
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    sink.assert_called_once_with(["r0"])
+
+
+@pytest.mark.asyncio
+async def test_flush_splits_batches():
+    sink = MagicMock()
+    writer = BatchWriter(sink, batch_size=2)
+
+    for i in range(5):
+        writer.enqueue(f"r{i}")
+    await writer.flush()
+
+    assert [c.args[0] for c in sink.call_args_list] == [["r0", "r1"], ["r2", "r3"], ["r4"]]
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_remaining_records():
+    sink = MagicMock()
+    writer = BatchWriter(sink, batch_size=100, flush_interval=60)
+    task = asyncio.create_task(writer.run())
+
+    writer.enqueue("r0")
+    writer.stop()
+    await asyncio.wait_for(task, 1)
+
+    sink.assert_called_once_with(["r0"])
+
+
+def test_drop_oldest_when_full():
+    writer = BatchWriter(MagicMock(), batch_size=10, max_buffer=2)
+
+    for i in range(3):
+        writer.enqueue(f"r{i}")
+
+    assert list(writer._buffer) == ["r1", "r2"]
+    assert writer.dropped == 1
+
+
+def test_drop_newest_when_full():
+    writer = BatchWriter(MagicMock(), batch_size=10, max_buffer=2, overflow_policy=OverflowPolicy.DROP_NEWEST)
+
+    for i in range(3):
+        writer.enqueue(f"r{i}")
+
+    assert list(writer._buffer) == ["r0", "r1"]
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_spill_when_full():
+    spill = MagicMock()
+    writer = BatchWriter(MagicMock(), batch_size=10, max_buffer=2, overflow_policy=OverflowPolicy.SPILL, spill=spill)
+
+    for i in range(3):
+        writer.enqueue(f"r{i}")
+    assert list(writer._buffer) == ["r2"]
+
+    await writer.flush()
+
+    spill.assert_called_once_with(["r0", "r1"])
+    assert writer.spilled == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_spilled():
+    sink = MagicMock(side_effect=ConnectionError("down"))
+    spill = MagicMock()
+    writer = BatchWriter(sink, spill=spill)
+
+    writer.enqueue("r0")
+    await writer.flush()
+
+    spill.assert_called_once_with(["r0"])
+    assert writer.written == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_write_without_spill_is_dropped():
+    writer = BatchWriter(MagicMock(side_effect=ConnectionError("down")))
+
+    writer.enqueue("r0")
+    await writer.flush()
+
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_write_is_not_spilled():
+    spill = MagicMock()
+    writer = BatchWriter(MagicMock(side_effect=RejectedBatch("HTTP 400")), spill=spill)
+
+    writer.enqueue("r0")
+    await writer.flush()
+
+    spill.assert_not_called()
+    assert writer.dropped == 1
@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from katomato.core.metrics.fanout import MetricsFanout, MetricsSink, Reading, metrics_ingestion
+from katomato.core.registry import SINK_REGISTRY
+from katomato.core.sensor_data import SensorData
+
+
+class RecordingSink(MetricsSink):
+    def __init__(self):
+        self.readings = []
+
+    def handle(self, reading):
+        self.readings.append(reading)
+
+
+class FailingSink(MetricsSink):
+    def handle(self, reading):
+        raise RuntimeError("sink down")
+
+
+def _reading(value):
+    return Reading(SensorData("dh", "Humidity", value, "%", ()), value, None)
+
+
+@pytest.fixture
+def sinks(monkeypatch):
+    registry = {"a": RecordingSink(), "b": RecordingSink(), "failing": FailingSink()}
+    for name, sink in registry.items():
+        monkeypatch.setitem(SINK_REGISTRY, name, sink)
+    return registry
+
+
+def test_metrics_ingestion_wrapper():
+    data = SensorData(sensor="temp", value=25.5, unit="C", label="Temperature", controls=[])
+    mock_func = MagicMock(return_value="done")
+
+    with patch("katomato.core.metrics.fanout.fanout.publish") as mock_publish:
+        result = metrics_ingestion(mock_func)(data)
+
+    mock_func.assert_called_once_with(data)
+    reading = mock_publish.call_args.args[0]
+    assert reading.data == data
+    assert reading.timestamp_ns > 0
+    assert result == "done"
+
+
+@pytest.mark.asyncio
+async def test_every_sink_gets_every_reading(sinks):
+    fanout = MetricsFanout(batch=2)
+    task = asyncio.create_task(fanout.run(["a", "failing", "b"]))
+    for value in range(5):
+        fanout.publish(_reading(value))
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert [r.data.value for r in sinks["a"].readings] == [0, 1, 2, 3, 4]
+    assert sinks["b"].readings == sinks["a"].readings
+    assert len(fanout) == 0
+
+
+def test_full_queue_drops_the_oldest_reading():
+    fanout = MetricsFanout(max_queue=2)
+    for value in range(3):
+        fanout.publish(_reading(value))
+
+    assert len(fanout) == 2
+    assert fanout.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_sink_is_rejected(sinks):
+    with pytest.raises(ValueError, match="nope"):
+        await MetricsFanout().run(["a", "nope"])
@@ -1,9 +1,20 @@
 import pytest
 from unittest.mock import MagicMock, patch
 
-from influxdb_client import Point
+from influxdb_client.rest import ApiException
 
-from katomato.core.metrics.influxdb_publisher import influx_ingestion
+from katomato.config import config
+from katomato.core.filters import FilterState
+from katomato.core.metrics import influxdb_publisher
+from katomato.core.metrics.aggregator import Window
+from katomato.core.metrics.fanout import Reading
+from katomato.core.metrics.influxdb_publisher import (
+    InfluxDBSink,
+    to_line_protocol,
+    window_to_line_protocol,
+    write_batch,
+)
+from katomato.core.metrics.spool import RejectedBatch
 from katomato.core.sensor_data import SensorData
 
 
@@ -18,31 +29,110 @@ def sample_sensor_data():
     )
 
 
-def test_influx_ingestion_wrapper(sample_sensor_data):
-    mock_func = MagicMock(return_value="done")
+def test_influxdb_sink_buffers_raw_readings(sample_sensor_data, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_RAW", True)
 
-    # Apply the wrapper manually
-    wrapped_func = influx_ingestion(mock_func)
+    with patch("katomato.core.metrics.influxdb_publisher.writer.enqueue") as mock_enqueue:
+        InfluxDBSink().handle(Reading(sample_sensor_data, 123, None))
 
-    with patch("katomato.core.metrics.influxdb_publisher.write_api.write") as mock_write:
-        result = wrapped_func(sample_sensor_data)
+        # Assert the reading was buffered, not written inline
+        mock_enqueue.assert_called_once()
+        line = mock_enqueue.call_args.args[0]
+        assert isinstance(line, str)
+        assert line.startswith("sensor_data,sensor=temp ")
+        assert 'label="Temperature"' in line
+        assert 'unit="C"' in line
+        assert "value=25.5" in line
 
-        # Assert wrapped function was called
-        mock_func.assert_called_once_with(sample_sensor_data)
 
-        # Assert Influx write was called
-        mock_write.assert_called_once()
-        args, kwargs = mock_write.call_args
+def test_influxdb_sink_aggregates_without_raw(sample_sensor_data, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_RAW", False)
 
-        assert "record" in kwargs
-        rec = kwargs["record"]
-        assert isinstance(rec, Point)
+    with (
+        patch("katomato.core.metrics.influxdb_publisher.writer.enqueue") as mock_enqueue,
+        patch("katomato.core.metrics.influxdb_publisher.aggregator.add") as mock_add,
+    ):
+        InfluxDBSink().handle(Reading(sample_sensor_data, 123, None))
 
-        line = rec.to_line_protocol()
-        assert "sensor=temp" in line
-        assert 'label="Temperature"' in line
-        assert 'unit="C"' in line
-        assert "value=25.5" in line
+    mock_enqueue.assert_not_called()
+    mock_add.assert_called_once_with(sample_sensor_data, 123)
+
+
+def test_window_to_line_protocol():
+    data = SensorData(sensor="dh", value=70, unit="%", label="Air Humidity", controls=[], board="main")
+    window = Window(data, 60_000_000_000, 70.0)
+    window.add(72.0)
+
+    line = window_to_line_protocol(window)
 
-        # Return value passed through correctly
-        assert result == "done"
+    assert line == (
+        r"sensor_window,board=main,label=Air\ Humidity,sensor=dh,unit=% "
+        "min=70.0,max=72.0,mean=71.0,count=2i 60000000000"
+    )
+
+
+def test_to_line_protocol_escaping():
+    data = SensorData(sensor="a b", value=1, unit='"x"', label="Soil, Moisture", controls=[])
+
+    line = to_line_protocol(data, 123)
+
+    assert line == r'sensor_data,sensor=a\ b value=1.0,label="Soil, Moisture",unit="\"x\"" 123'
+
+
+def test_line_protocol_leaves_out_non_finite_fields():
+    data = SensorData(sensor="dt", value=float("nan"), unit="C", label="Temperature", controls=[])
+    state = FilterState(raw=float("nan"), filtered=None, min=21.0, max=float("inf"), mean=21.5, stddev=0.5, rejected=0)
+    window = Window(data._replace(value=21.0), 0, 21.0)
+    window.min = float("nan")
+
+    assert to_line_protocol(data, 123, state) == (
+        'sensor_data,sensor=dt mean=21.5,stddev=0.5,min=21.0,label="Temperature",unit="C" 123'
+    )
+    assert window_to_line_protocol(window) == (
+        "sensor_window,label=Temperature,sensor=dt,unit=C max=21.0,mean=21.0,count=1i 0"
+    )
+
+
+def test_write_batch_sends_records(monkeypatch):
+    mock_write_api = MagicMock()
+    monkeypatch.setattr(influxdb_publisher, "write_api", mock_write_api)
+
+    write_batch(["a", "b"])
+
+    assert mock_write_api.write.call_args.kwargs["record"] == ["a", "b"]
+
+
+def test_write_batch_without_client(monkeypatch):
+    monkeypatch.setattr(influxdb_publisher, "write_api", None)
+    monkeypatch.setattr(influxdb_publisher, "connect", MagicMock())
+
+    with pytest.raises(ConnectionError):
+        write_batch(["a"])
+
+
+@pytest.mark.parametrize("status, rejected", [(400, True), (422, True), (401, False), (503, False)])
+def test_write_batch_rejection(monkeypatch, status, rejected):
+    mock_write_api = MagicMock()
+    mock_write_api.write.side_effect = ApiException(status=status, reason="x")
+    monkeypatch.setattr(influxdb_publisher, "write_api", mock_write_api)
+
+    with pytest.raises(RejectedBatch if rejected else ApiException) as error:
+        write_batch(["a"])
+
+    assert isinstance(error.value, RejectedBatch) == rejected
+
+
+def test_to_line_protocol_with_filter_state():
+    data = SensorData(sensor="dh", value=71, unit="%", label="Humidity", controls=[])
+    state = FilterState(raw=71, filtered=70.5, min=69.0, max=72.0, mean=70.25, stddev=0.5, rejected=0)
+
+    line = to_line_protocol(data, 123)
+    filtered = to_line_protocol(data, 123, state)
+    rejected = to_line_protocol(data, 123, state._replace(filtered=None))
+
+    assert filtered == (
+        'sensor_data,sensor=dh value=71.0,filtered=70.5,mean=70.25,stddev=0.5,min=69.0,max=72.0,'
+        'label="Humidity",unit="%" 123'
+    )
+    assert "filtered=" not in rejected and "mean=70.25" in rejected
+    assert "mean=" not in line
@@ -0,0 +1,88 @@
+import asyncio
+import math
+
+import pytest
+
+from katomato.core.filters import FilterState
+from katomato.core.instrumentation import Instrumentation
+from katomato.core.metrics.columnar import ColumnarFileSink, read_columns
+from katomato.core.metrics.fanout import Reading
+from katomato.core.metrics.prometheus import PrometheusSink
+from katomato.core.sensor_data import SensorData
+
+
+def _reading(value, ts, sensor="dh", filtered=None):
+    data = SensorData(sensor, "Humidity", value, "%", (), "main")
+    state = None if filtered is None else FilterState(value, filtered, value, value, value, 0.0, 0)
+    return Reading(data, ts, state)
+
+
+@pytest.mark.asyncio
+async def test_columnar_file_round_trip(tmp_path):
+    sink = ColumnarFileSink(str(tmp_path), rows=3, interval=60)
+    task = asyncio.create_task(sink.run())
+    sink.handle(_reading(70.5, 1_000, filtered=70.0))
+    sink.handle(_reading(71.0, 2_000))
+    sink.handle(_reading(21.0, 1_500, sensor="dt"))
+    await asyncio.sleep(0.05)
+
+    [path] = tmp_path.iterdir()
+    columns = read_columns(str(path))
+    assert columns["main", None, "dh"]["timestamp_ns"] == [1_000, 2_000]
+    assert columns["main", None, "dh"]["value"] == [70.5, 71.0]
+    assert columns["main", None, "dh"]["filtered"][0] == 70.0 and math.isnan(columns["main", None, "dh"]["filtered"][1])
+    assert columns["main", None, "dt"]["value"] == [21.0]
+    assert sink.written == 3
+
+    sink.handle(_reading(72.0, 3_000))
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert len(list(tmp_path.glob("*.kcol"))) == 2
+
+
+@pytest.mark.asyncio
+async def test_prometheus_endpoint_serves_latest_readings():
+    sink = PrometheusSink("127.0.0.1", 0)
+    sink.handle(_reading(70.0, 1_000_000_000, filtered=69.5))
+    sink.handle(_reading(71.0, 2_000_000_000, filtered=70.5))
+
+    server = await asyncio.start_server(sink._serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+
+    labels = 'board="main",sensor="dh",label="Humidity",unit="%"'
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert f"katomato_sensor_value{{{labels}}} 71.0\n" in response
+    assert f"katomato_sensor_filtered{{{labels}}} 70.5\n" in response
+    assert f"katomato_sensor_updated_seconds{{{labels}}} 2.0\n" in response
+
+
+def test_prometheus_page_spells_non_finite_values():
+    sink = PrometheusSink()
+    sink.handle(_reading(math.nan, 1_000_000_000, filtered=math.inf))
+    sink.handle(_reading(-math.inf, 1_000_000_000, sensor="dt"))
+
+    page = sink.render()
+
+    assert 'katomato_sensor_value{board="main",sensor="dh",label="Humidity",unit="%"} NaN\n' in page
+    assert 'katomato_sensor_filtered{board="main",sensor="dh",label="Humidity",unit="%"} +Inf\n' in page
+    assert 'katomato_sensor_value{board="main",sensor="dt",label="Humidity",unit="%"} -Inf\n' in page
+    assert "nan" not in page and " inf" not in page
+
+
+def test_prometheus_page_exports_stage_latency(monkeypatch):
+    probes = Instrumentation()
+    probes.record("controller", "dt", 2_000_000)
+    probes.watch("commands", lambda: 0)
+    monkeypatch.setattr("katomato.core.metrics.prometheus.probes", probes)
+
+    page = PrometheusSink().render()
+
+    assert 'katomato_stage_latency_seconds{stage="controller",key="dt",quantile="0.99"} 0.002' in page
+    assert 'katomato_stage_latency_seconds_count{stage="controller",key="dt"} 1' in page
+    assert 'katomato_queue_depth{queue="commands"} 0' in page
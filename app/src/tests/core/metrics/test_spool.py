@@ -0,0 +1,139 @@
+import asyncio
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from katomato.core.metrics.spool import Compaction, RejectedBatch, Spool, keep_synced, replay
+
+
+def _segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def test_append_and_read(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(["r0", "r1", "r2"])
+
+    records, _ = spool.read(2)
+
+    assert records == ["r0", "r1"]
+
+
+def test_commit_advances_cursor(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(["r0", "r1", "r2"])
+
+    records, position = spool.read(2)
+    spool.commit(position)
+    records, _ = spool.read(10)
+
+    assert records == ["r2"]
+
+
+def test_segments_rotate_and_replayed_segments_are_deleted(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=8)
+    for i in range(4):
+        spool.append([f"record{i}"])
+    assert len(_segments(tmp_path)) == 4
+
+    records, position = spool.read(10)
+    spool.commit(position)
+
+    assert records == [f"record{i}" for i in range(4)]
+    assert len(_segments(tmp_path)) == 1
+
+
+def test_drop_oldest_keeps_disk_usage_bounded(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=8, max_bytes=30)
+    for i in range(10):
+        spool.append([f"record{i}"])
+
+    records, _ = spool.read(100)
+
+    assert spool.size_bytes <= 30
+    assert records == ["record7", "record8", "record9"]
+    assert spool.dropped_bytes > 0
+
+
+def test_drop_newest_keeps_disk_usage_bounded(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=8, max_bytes=30, compaction=Compaction.DROP_NEWEST)
+    for i in range(10):
+        spool.append([f"record{i}"])
+
+    records, _ = spool.read(100)
+
+    assert spool.size_bytes <= 30
+    assert records == ["record0", "record1", "record2"]
+    assert spool.dropped == 7
+
+
+def test_reopen_resumes_from_cursor(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(["r0", "r1", "r2"])
+    _, position = spool.read(1)
+    spool.commit(position)
+    spool.close()
+
+    reopened = Spool(str(tmp_path))
+    reopened.append(["r3"])
+    records, _ = reopened.read(10)
+
+    assert records == ["r1", "r2", "r3"]
+
+
+def test_torn_record_is_skipped(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(["r0"])
+    spool.close()
+    with open(tmp_path / _segments(tmp_path)[0], "ab") as f:
+        f.write(b"torn")
+
+    records, _ = Spool(str(tmp_path)).read(10)
+
+    assert records == ["r0"]
+
+
+@pytest.mark.asyncio
+async def test_replay_waits_for_sink_then_drains(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.append(["r0", "r1", "r2"])
+    sink = MagicMock(side_effect=[ConnectionError("down"), None, None])
+
+    task = asyncio.create_task(replay(spool, sink, batch_size=2, rate=1_000_000, retry_interval=0.01))
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert [c.args[0] for c in sink.call_args_list] == [["r0", "r1"], ["r0", "r1"], ["r2"]]
+    assert spool.read(10)[0] == []
+
+
+@pytest.mark.asyncio
+async def test_replay_drops_rejected_batch(tmp_path, caplog):
+    spool = Spool(str(tmp_path))
+    spool.append(["bad", "r1", "r2"])
+    sink = MagicMock(side_effect=[RejectedBatch("HTTP 400"), None])
+
+    task = asyncio.create_task(replay(spool, sink, batch_size=2, rate=1_000_000, retry_interval=0.01))
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert [c.args[0] for c in sink.call_args_list] == [["bad", "r1"], ["r2"]]
+    assert spool.read(10)[0] == []
+    assert spool.rejected == 2
+    assert any("rejected 2 spooled records" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_keep_synced_fsyncs_pending_records_and_closes(tmp_path):
+    spool = Spool(str(tmp_path), fsync_batch=1000, fsync_interval=3600)
+    spool.append(["r0"])
+    assert spool._unsynced == 1
+
+    task = asyncio.create_task(keep_synced(spool, interval=0.01))
+    await asyncio.sleep(0.05)
+    assert spool._unsynced == 0
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert spool._active is None
@@ -5,12 +5,13 @@ from unittest.mock import patch
 import pytest
 
 from katomato.core.cli import handle_cli
+from katomato.core.command_queue import PriorityCommandQueue
 from katomato.core.utils.command_util import get_sensor_data
 
 
 @pytest.mark.asyncio
 async def test_handle_cli_phase_command():
-    queue = asyncio.Queue()
+    queue = PriorityCommandQueue()
 
     with patch("builtins.input", side_effect=["phase vegetative", "exit"]):
         task = asyncio.create_task(handle_cli(queue))
@@ -25,7 +26,7 @@ async def test_handle_cli_phase_command():
 
 @pytest.mark.asyncio
 async def test_handle_cli_exit_command():
-    queue = asyncio.Queue()
+    queue = PriorityCommandQueue()
 
     with patch("builtins.input", side_effect=["exit"]):
         await handle_cli(queue)
@@ -35,7 +36,7 @@ async def test_handle_cli_exit_command():
 
 @pytest.mark.asyncio
 async def test_handle_cli_invalid_command_format(caplog):
-    queue = asyncio.Queue()
+    queue = PriorityCommandQueue()
 
     with patch("builtins.input", side_effect=["invalid command", "exit"]):
         task = asyncio.create_task(handle_cli(queue))
@@ -47,7 +48,7 @@ async def test_handle_cli_invalid_command_format(caplog):
 @patch("katomato.core.cli.controller_dispatcher")
 @pytest.mark.asyncio
 async def test_handle_cli_sim_command_dispatch(mock_dispatcher):
-    queue = asyncio.Queue()
+    queue = PriorityCommandQueue()
     sim_data = (
         '{"sensor": "ef", "label": "Exhaust Fan Speed", "value": 0, "unit": "rpm", '
         '"controls": [{"pin": 4, "type": "analog", "device": "exhaust_fan"}]}'
@@ -61,3 +62,31 @@ async def test_handle_cli_sim_command_dispatch(mock_dispatcher):
 
     mock_dispatcher.assert_called_once_with(sensor_data, queue)
     assert json.loads(await queue.get()) == {"command": "exit"}
+
+
+@pytest.mark.asyncio
+async def test_handle_cli_stats_command(caplog):
+    queue = PriorityCommandQueue()
+    caplog.set_level("INFO")
+
+    with (
+        patch("katomato.core.cli.probes.dump", return_value="controller dt 1") as dump,
+        patch("katomato.core.cli.probes.reset") as reset,
+        patch("builtins.input", side_effect=["stats", "stats reset", "exit"]),
+    ):
+        await handle_cli(queue)
+
+    dump.assert_called_once()
+    reset.assert_called_once()
+    assert any("controller dt 1" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_handle_cli_stalls_command(caplog):
+    queue = PriorityCommandQueue()
+    caplog.set_level("INFO")
+
+    with patch("builtins.input", side_effect=["stalls", "exit"]):
+        await handle_cli(queue)
+
+    assert any("Event loop stalls" in message for message in caplog.messages)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from katomato.controllers.soil_moisture import SoilMoistureController
+from katomato.controllers.temperature import TemperatureController
+from katomato.core.clock import get_clock
+from katomato.core.registry import Action
+from katomato.core.timer_wheel import TimerWheel
+from tests.test_utils import get_test_sensor_data, run_virtual
+
+
+def test_virtual_clock_fires_timers_in_order():
+    clock = get_clock()
+    fired = []
+
+    async def sleeper():
+        await clock.sleep(3)
+        fired.append(clock.monotonic())
+
+    async def main():
+        clock.call_later(5, fired.append, "b")
+        clock.call_later(1, fired.append, "a")
+        clock.call_later(9, fired.append, "cancelled").cancel()
+        task = asyncio.create_task(sleeper())
+        await clock.sleep(10)
+        assert task.done()
+        return clock.monotonic(), clock.time() - asyncio.get_running_loop().epoch
+
+    assert run_virtual(main()) == (10, 10)
+    assert fired == ["a", 3, "b"]
+
+
+def test_virtual_clock_skips_idle_time():
+    woke = []
+
+    async def sleeper(delay):
+        await asyncio.sleep(delay)
+        woke.append(get_clock().monotonic())
+
+    async def main():
+        await asyncio.gather(sleeper(86400), sleeper(60))
+
+    run_virtual(main())
+
+    assert woke == [60, 86400]
+
+
+def test_thousands_of_throttled_decisions_run_in_virtual_time(ctx):
+    controller = TemperatureController()
+    hot = get_test_sensor_data(ctx.mock_ctrl, controller.temp_mid + controller.temp_tolerance + 1)
+
+    async def main():
+        controller.last_decision_time = get_clock().monotonic()
+        for _ in range(6001):  # a reading every 10 s, 1000 decision intervals
+            await asyncio.sleep(10)
+            await controller(hot, ctx.command_queue)
+
+    started = time.perf_counter()
+    run_virtual(main())
+
+    assert ctx.mock_device.await_count == 1000  # one decision per decision_interval
+    assert time.perf_counter() - started < 5
+
+
+def test_pump_runtime_follows_the_clock(ctx):
+    controller = SoilMoistureController(timer_wheel=TimerWheel())
+    ctx.mock_device.estimate_runtime.return_value = 14.0
+    dry = get_test_sensor_data(ctx.mock_ctrl, 0)
+
+    async def main():
+        controller.last_decision_time = -controller.decision_interval
+        await controller(dry, ctx.command_queue)
+        await asyncio.sleep(13.9)
+        ctx.mock_device.assert_awaited_once_with(Action.UP, ctx.mock_ctrl, ctx.command_queue)
+
+        await asyncio.sleep(0.2)
+        ctx.mock_device.assert_awaited_with(Action.DOWN, ctx.mock_ctrl, ctx.command_queue)
+
+    run_virtual(main())
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.utils.command_util import build_arduino_command
+
+
+@pytest.mark.asyncio
+async def test_safety_lane_is_served_first():
+    queue = PriorityCommandQueue()
+    await queue.put(json.dumps({"command": "phase", "name": "veg"}), Lane.HOUSEKEEPING)
+    await queue.put(build_arduino_command("analog", 9, 25))
+    await queue.put(build_arduino_command("digital", 6, 1), Lane.SAFETY)
+
+    assert [json.loads(await queue.get()).get("pin") for _ in range(3)] == [6, 9, None]
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_same_pin_command_supersedes_queued_one():
+    queue = PriorityCommandQueue()
+    await queue.put(build_arduino_command("analog", 9, 25))
+    await queue.put(build_arduino_command("digital", 4, 1))
+    await queue.put(build_arduino_command("analog", 9, 51))
+
+    assert queue.qsize() == 2
+    assert queue.collapsed == 1
+    assert await queue.get() == build_arduino_command("analog", 9, 51)  # keeps the queue position
+    assert await queue.get() == build_arduino_command("digital", 4, 1)
+
+
+@pytest.mark.asyncio
+async def test_safety_command_supersedes_other_lanes():
+    queue = PriorityCommandQueue()
+    await queue.put(build_arduino_command("analog", 9, 25), Lane.HOUSEKEEPING)
+    await queue.put(build_arduino_command("analog", 9, 51))
+    await queue.put(build_arduino_command("analog", 9, 0), Lane.SAFETY)
+
+    assert queue.qsize() == 1
+    assert queue.collapsed == 2
+    assert await queue.get() == build_arduino_command("analog", 9, 0)
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_starvation_guard_serves_passed_over_lane():
+    queue = PriorityCommandQueue(starvation_limit=2)
+    await queue.put(json.dumps({"command": "exit"}), Lane.HOUSEKEEPING)
+    for pin in range(5):
+        await queue.put(build_arduino_command("digital", pin, 1))
+
+    served = [json.loads(await queue.get())["command"] for _ in range(3)]
+
+    assert served == ["digital", "digital", "exit"]
+
+
+def test_lane_limit():
+    queue = PriorityCommandQueue(limits={Lane.ACTUATION: 1})
+    queue.put_nowait(build_arduino_command("digital", 4, 1))
+
+    queue.put_nowait(build_arduino_command("digital", 4, 0))  # superseding never needs room
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait(build_arduino_command("digital", 5, 1))
+    queue.put_nowait(build_arduino_command("digital", 5, 1), Lane.SAFETY)
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_room_and_get_waits_for_command():
+    queue = PriorityCommandQueue(limits={Lane.ACTUATION: 1})
+    queue.put_nowait(build_arduino_command("digital", 4, 1))
+
+    put = asyncio.create_task(queue.put(build_arduino_command("digital", 5, 1)))
+    await asyncio.sleep(0)
+    assert not put.done()
+
+    assert json.loads(await queue.get())["pin"] == 4
+    await put
+    assert json.loads(await queue.get())["pin"] == 5
+
+    get = asyncio.create_task(queue.get())
+    await asyncio.sleep(0)
+    assert not get.done()
+    await queue.put(build_arduino_command("digital", 6, 0), Lane.SAFETY)
+    assert json.loads(await get)["pin"] == 6
+
+
+@pytest.mark.asyncio
+async def test_starvation_guard_never_preempts_safety_lane():
+    queue = PriorityCommandQueue(starvation_limit=1)
+    await queue.put(build_arduino_command("digital", 4, 1))
+    for pin in range(5, 8):
+        await queue.put(build_arduino_command("digital", pin, 0), Lane.SAFETY)
+
+    served = [json.loads(await queue.get())["pin"] for _ in range(4)]
+
+    assert served == [5, 6, 7, 4]
@@ -0,0 +1,95 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from katomato.core.connection import ConnectionManager
+from katomato.core.transport import LOOPBACK_BOARDS, LoopbackBoard, open_transport
+from katomato.core.utils.command_util import build_arduino_command
+
+
+class _Board(LoopbackBoard):
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+
+    def received(self, data: bytes) -> None:
+        for line in data.splitlines():
+            command = json.loads(line)
+            self.commands.append(command)
+            if "seq" in command:
+                self.send(json.dumps({"sensor": "ack", "value": command["seq"]}).encode() + b"\n")
+
+
+@pytest.fixture
+def boards():
+    registered = {"a": _Board(), "b": _Board()}
+    with patch.dict(LOOPBACK_BOARDS, registered):
+        yield registered
+
+
+@pytest.fixture
+def manager(boards):
+    return ConnectionManager(
+        {name: {"transport": "loopback", "name": name} for name in boards},
+        asyncio.Queue(),
+        backoff_initial=0.01,
+        backoff_max=0.04,
+    )
+
+
+@pytest.mark.asyncio
+async def test_commands_are_routed_by_board(manager, boards):
+    manager.start()
+    await manager.wait_connected(1)
+
+    await manager.send_command(build_arduino_command("digital", 4, 1), "b")
+    await manager.send_command(build_arduino_command("digital", 5, 1))  # the first board is the default
+    await manager.send_command(build_arduino_command("digital", 6, 1), "unknown")
+
+    assert [cmd["pin"] for cmd in boards["a"].commands] == [5]
+    assert [cmd["pin"] for cmd in boards["b"].commands] == [4]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_keeps_the_same_handle(manager, boards):
+    manager.start()
+    await manager.wait_connected(1)
+    connection = manager["a"]
+    protocol = connection.protocol
+
+    protocol.transport.close()
+    for _ in range(3):
+        await asyncio.sleep(0)  # connection_lost, then the reconnect callback
+    assert protocol.transport is not None
+    await asyncio.wait_for(connection.connected.wait(), 1)
+
+    assert manager["a"].protocol is protocol
+    assert connection.reconnects == 1
+    await manager.send_command(build_arduino_command("digital", 4, 1), "a")
+    assert boards["a"].commands[-1]["pin"] == 4
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_unavailable_board_is_retried_with_backoff(manager, boards, caplog):
+    board = LOOPBACK_BOARDS.pop("b")
+    manager.start()
+    await asyncio.wait_for(manager["a"].connected.wait(), 1)
+    await asyncio.sleep(0.05)
+    assert not manager["b"].connected.is_set()
+    assert manager["b"]._delay == 0.04  # capped
+
+    LOOPBACK_BOARDS["b"] = board
+    await asyncio.wait_for(manager["b"].connected.wait(), 1)
+    assert manager["b"]._delay == 0.01
+    assert any("Board b unavailable" in message for message in caplog.messages)
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_transport():
+    with pytest.raises(ValueError, match="Unknown transport: pigeon"):
+        await open_transport(asyncio.get_running_loop(), lambda: None, "pigeon")
@@ -5,14 +5,17 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from katomato.core.command_queue import PriorityCommandQueue
 from katomato.core.dispatcher import command_dispatcher, controller_dispatcher
 from katomato.core.sensor_data import SensorData
 from katomato.core.registry import CONTROLLER_REGISTRY
+from katomato.core.utils.command_util import build_arduino_command
+from katomato.core.state_journal import MANUAL_PHASE, journal
 
 
 @pytest.fixture
 def command_queue():
-    return asyncio.Queue()
+    return PriorityCommandQueue()
 
 
 @pytest.fixture
@@ -71,6 +74,7 @@ async def test_command_dispatcher_switches_phase(command_queue, fake_arduino_pro
         task.cancel()
 
         switch_mock.assert_called_once_with(mock_phase)
+        assert journal.get(MANUAL_PHASE) == {"name": "veg"}  # kept across a restart
 
 
 @pytest.mark.asyncio
@@ -102,12 +106,12 @@ def test_controller_dispatcher_found_controller():
     mock_controller = AsyncMock()
     sensor_data = SensorData(sensor="temp", value=25, unit="C", label="Temperature", controls=[])
 
-    CONTROLLER_REGISTRY["temp"] = mock_controller
+    CONTROLLER_REGISTRY["temp"] = lambda: mock_controller
 
-    with patch("asyncio.create_task") as create_task_mock:
+    with patch("katomato.core.dispatcher.scheduler.submit") as submit_mock:
         controller_dispatcher(sensor_data, command_queue)
 
-    create_task_mock.assert_called_once()
+    submit_mock.assert_called_once_with("temp", mock_controller, sensor_data, command_queue)
 
 
 def test_controller_dispatcher_controller_not_found(caplog):
@@ -120,3 +124,13 @@ def test_controller_dispatcher_controller_not_found(caplog):
     controller_dispatcher(sensor_data, command_queue)
 
     assert any("No controller found for: unknown_sensor" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_command_dispatcher_routes_by_board(command_queue, fake_arduino_protocol, fake_shutdown_handler):
+    await command_queue.put(build_arduino_command("digital", 4, 1, board="tent-2"))
+    await command_queue.put(json.dumps({"command": "exit"}))
+
+    await command_dispatcher(command_queue, fake_arduino_protocol, fake_shutdown_handler)
+
+    fake_arduino_protocol.send_command.assert_awaited_once_with(build_arduino_command("digital", 4, 1), "tent-2")
@@ -0,0 +1,106 @@
+import random
+import statistics
+
+import pytest
+
+from katomato.core.filters import FilterStage, Median, RollingStats, SensorFilter
+from katomato.core.sensor_data import SensorData
+
+
+def _reading(value, sensor="dh", board="main"):
+    return SensorData(sensor=sensor, label="Humidity", value=value, unit="%", controls=(), board=board)
+
+
+def test_rolling_stats_match_the_window():
+    rng = random.Random(1)
+    stats = RollingStats(8)
+    values = []
+    for _ in range(100):
+        value = rng.uniform(-50, 50)
+        values.append(value)
+        stats.update(value)
+        window = values[-8:]
+
+        assert len(stats) == len(window)
+        assert stats.min == min(window)
+        assert stats.max == max(window)
+        assert stats.mean == pytest.approx(statistics.fmean(window))
+        assert stats.stddev == pytest.approx(statistics.pstdev(window), abs=1e-9)
+
+
+def test_median_of_the_last_values():
+    median = Median(3)
+
+    assert [median.update(v) for v in (5, 1, 100, 2, 3)] == [5, 3, 5, 2, 3]
+
+
+def test_spike_is_rejected_and_a_level_shift_accepted():
+    sensor_filter = SensorFilter(window=8, reject=4.0, tolerance=1.0, max_rejects=3)
+    for i in range(8):
+        sensor_filter.update(70 + i % 2 * 0.2)
+
+    assert sensor_filter.update(99) is None
+    assert sensor_filter.update(70.1) == 70.1
+    assert sensor_filter.state.rejected == 1
+
+    # the 4th reading at the new level is taken
+    assert [sensor_filter.update(90) for _ in range(4)] == [None, None, None, 90]
+    assert sensor_filter.state.max == 90
+
+
+def test_small_change_of_a_steady_sensor_is_kept():
+    sensor_filter = SensorFilter(window=4, reject=4.0, tolerance=1.0)
+    for _ in range(4):
+        sensor_filter.update(21.0)
+
+    assert sensor_filter.update(21.5) == 21.5
+
+
+def test_median_then_ema():
+    sensor_filter = SensorFilter(median=3, ema=0.5)
+
+    assert [sensor_filter.update(v) for v in (10, 10, 40, 10)] == [10, 10, 10, 10]
+    assert sensor_filter.update(20) == 15  # median of 40, 10, 20 is 20, half way from 10 is 15
+    assert sensor_filter.state.raw == 20
+
+
+def test_stage_filters_each_board_and_sensor_on_its_own():
+    stage = FilterStage({"dh": {"median": 3}}, window=8)
+    for value in (60, 80, 70):
+        stage.apply(_reading(value, board="a"))
+    stage.apply(_reading(10, board="b"))
+
+    assert stage.apply(_reading(75, board="a")).value == 75
+    assert stage.apply(_reading(20, board="b")).value == 15
+    assert stage.state(_reading(0, board="a")).mean == pytest.approx(71.25)
+
+
+def test_stage_passes_unconfigured_sensors():
+    stage = FilterStage({"dh": {"median": 3}})
+    reading = _reading(1000, sensor="sm")
+
+    assert stage.apply(reading) is reading
+    assert stage.state(reading) is None
+
+
+def test_stage_drops_non_finite_readings():
+    stage = FilterStage({"dt": {"reject": 4.0, "tolerance": 1.0, "median": 3, "ema": 0.3}})
+    for _ in range(40):
+        stage.apply(_reading(24.0, sensor="dt"))
+
+    assert stage.apply(_reading(float("nan"), sensor="dt")) is None
+    assert stage.apply(_reading(float("inf"), sensor="dt")) is None
+    for _ in range(100):
+        reading = stage.apply(_reading(24.0, sensor="dt"))
+    assert reading.value == pytest.approx(24.0)
+    assert stage.state(reading).mean == pytest.approx(24.0)
+
+
+@pytest.mark.parametrize("sensor", ["dt", "ef"])
+def test_stage_drops_null_readings(sensor):
+    # "ef" has no filter settings, a failed read still never reaches its controller
+    stage = FilterStage({"dt": {"median": 3}})
+
+    assert stage.apply(_reading(None, sensor=sensor)) is None
+    assert stage.apply(_reading(float("nan"), sensor=sensor)) is None
+    assert stage.apply(_reading(24.0, sensor=sensor)).value == 24.0
@@ -0,0 +1,70 @@
+from katomato.core.framing import LineFramer
+
+
+def test_complete_lines():
+    framer = LineFramer()
+
+    assert framer.feed(b"a\nbb\n") == [b"a", b"bb"]
+    assert framer.pending == b""
+
+
+def test_partial_line_is_kept():
+    framer = LineFramer()
+
+    assert framer.feed(b"a\nb") == [b"a"]
+    assert framer.feed(b"b") == []
+    assert framer.feed(b"\nc") == [b"bb"]
+    assert framer.pending == b"c"
+
+
+def test_line_in_single_byte_chunks():
+    framer = LineFramer()
+
+    lines = []
+    for byte in b'{"sensor": "dt"}\n':
+        lines += framer.feed(bytes([byte]))
+
+    assert lines == [b'{"sensor": "dt"}']
+
+
+def test_carriage_return_is_left_to_the_caller():
+    framer = LineFramer()
+
+    assert framer.feed(b"a\r") == []
+    assert framer.feed(b"\nb\r\n") == [b"a\r", b"b\r"]
+
+
+def test_oversized_line_is_discarded_without_delimiter():
+    framer = LineFramer(max_line_length=4)
+
+    assert framer.feed(b"012345") == []
+    assert framer.pending == b""
+    # The rest of the oversized line is dropped up to the next delimiter
+    assert framer.feed(b"6789\nok\n") == [b"ok"]
+    assert framer.overflows == 1
+
+
+def test_oversized_line_is_discarded_with_delimiter():
+    framer = LineFramer(max_line_length=4)
+
+    assert framer.feed(b"0123456\nok\n") == [b"ok"]
+    assert framer.overflows == 1
+
+
+def test_oversized_line_ending_alone_in_a_later_chunk():
+    framer = LineFramer(max_line_length=4)
+
+    assert framer.feed(b"012345") == []
+    # Only the tail of the discarded line before the delimiter, no line is left
+    assert framer.feed(b"67890\n") == []
+    assert framer.feed(b"ok\n") == [b"ok"]
+    assert framer.overflows == 1
+
+
+def test_reset():
+    framer = LineFramer()
+    framer.feed(b"partial")
+
+    framer.reset()
+
+    assert framer.feed(b"a\n") == [b"a"]
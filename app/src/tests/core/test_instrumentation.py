@@ -0,0 +1,95 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.instrumentation import Histogram, Instrumentation
+from katomato.core.scheduler import ControllerScheduler
+from katomato.core.sensor_data import SensorData
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    probes = Instrumentation()
+    for module in ("katomato.core.instrumentation", "katomato.core.scheduler", "katomato.core.command_queue"):
+        monkeypatch.setattr(f"{module}.probes", probes)
+    return probes
+
+
+def test_histogram_percentiles_are_within_a_bucket():
+    rng = random.Random(0)
+    values = sorted(int(rng.lognormvariate(12, 2)) for _ in range(10_000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+
+    for p in (50, 90, 99, 99.9):
+        exact = values[round(len(values) * p / 100) - 1]
+        assert exact <= histogram.percentile(p) <= exact * 1.125 + 1
+    assert (histogram.min, histogram.max, histogram.count) == (values[0], values[-1], len(values))
+
+
+def test_histogram_small_values_are_exact_and_large_ones_clamped():
+    histogram = Histogram(max_ns=1000)
+    for value in (3, 5, 10 ** 12):
+        histogram.record(value)
+
+    assert histogram.percentile(30) == 3
+    assert histogram.percentile(60) == 5
+    assert histogram.percentile(100) == 10 ** 12
+
+
+def test_disabled_probes_record_nothing():
+    probes = Instrumentation(enabled=False)
+
+    probes.record("controller", "dt", 1000)
+
+    assert probes.histograms == {}
+
+
+@pytest.mark.asyncio
+async def test_reading_and_command_stages_are_recorded(probes):
+    scheduler = ControllerScheduler()
+    queue = PriorityCommandQueue()
+
+    async def controller(sensor_data, command_queue):
+        await command_queue.put('{"command": "digital", "pin": 4, "value": 0}', Lane.ACTUATION)
+
+    reading = SensorData("dt", "Temperature", 21.0, "C", (), "main", time.perf_counter_ns())
+    scheduler.submit("dt", controller, reading, queue)
+    await asyncio.sleep(0.01)
+    await queue.get()
+
+    assert {stage for stage, _ in probes.histograms} == {"mailbox", "controller", "reading", "queue"}
+    assert probes.histograms["queue", "actuation"].count == 1
+    assert probes.histograms["reading", "dt"].min >= probes.histograms["controller", "dt"].min
+
+
+@pytest.mark.asyncio
+async def test_run_samples_gauges():
+    probes = Instrumentation(sample_interval=0.001)
+    depth = [3]
+    probes.watch("commands", lambda: depth[0])
+    task = asyncio.create_task(probes.run())
+    await asyncio.sleep(0.01)
+    depth[0] = 1
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert (probes.gauges["commands"].value, probes.gauges["commands"].max) == (1, 3)
+    assert "commands" in probes.dump()
+
+
+def test_dump_lists_every_stage():
+    probes = Instrumentation()
+    probes.record("controller", "dt", 2_000_000)
+    probes.record("send", None, 500_000)
+
+    lines = probes.dump().splitlines()
+
+    assert lines[0].split() == ["stage", "key", "count", "p50", "ms", "p99", "ms", "max", "ms"]
+    assert lines[1].split()[:3] == ["controller", "dt", "1"]
+    assert lines[2].split()[:2] == ["send", "None"]
+
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from katomato.config import config
+from katomato.config.zucchini import Germination, Seedling, Vegetative
+from katomato.core.phase_schedule import DAY, PhaseSchedule, run_schedule
+from tests.test_utils import run_virtual
+
+
+@pytest.fixture
+def schedule():
+    return PhaseSchedule([(Germination, 4), (Seedling, 4), (Vegetative, 4)], transition=2, step=DAY / 4)
+
+
+@pytest.fixture
+def restore_phase():
+    phase, params = config.growth_phase, config.params
+    yield
+    config.growth_phase, config.params = phase, params
+
+
+def test_schedule_holds_phase_setpoints_outside_transitions(schedule):
+    phase_cls, params = schedule.at(DAY)
+
+    assert phase_cls is Germination
+    assert params.HUM_CEIL == Germination.HUM_CEIL
+    assert schedule.at(0)[1] is params  # steps of the same phase share one snapshot
+
+
+def test_schedule_ramps_setpoints_towards_next_phase(schedule):
+    _, halfway = schedule.at(3 * DAY - 1)  # the step ending halfway through the Germination -> Seedling ramp
+    _, boundary = schedule.at(4 * DAY - 1)
+
+    assert halfway.HUM_FLOOR == pytest.approx((Germination.HUM_FLOOR + Seedling.HUM_FLOOR) / 2)
+    assert halfway.hum_mid == pytest.approx((halfway.HUM_FLOOR + halfway.HUM_CEIL) / 2)
+    assert boundary.TEMP_CEIL == pytest.approx(Seedling.TEMP_CEIL)
+
+
+def test_schedule_clamps_age_to_timeline(schedule):
+    assert schedule.at(-DAY) is schedule.table[0]
+    assert schedule.at(100 * DAY)[0] is Vegetative
+    assert len(schedule.table) == 12 * 4
+
+
+@pytest.mark.asyncio
+async def test_run_schedule_applies_snapshot_for_plant_age(schedule, restore_phase):
+    planted_at = datetime.fromtimestamp(datetime.now().timestamp() - 100 * DAY).isoformat()
+
+    await run_schedule(schedule, planted_at)
+
+    assert isinstance(config.growth_phase, Vegetative)
+    assert config.params is schedule.table[-1][1]
+
+
+def test_run_schedule_follows_the_clock(schedule, restore_phase):
+    async def main():
+        planted_at = datetime.fromtimestamp(asyncio.get_running_loop().epoch).isoformat()
+        task = asyncio.create_task(run_schedule(schedule, planted_at))
+        phases = []
+        for days in (1, 4, 8):  # days 1, 5 and 13
+            await asyncio.sleep(days * DAY)
+            phases.append(config.params.phase)
+        return phases, task.done()
+
+    assert run_virtual(main()) == (["Germination", "Seedling", "Vegetative"], True)
+
+
+@pytest.mark.asyncio
+async def test_manual_phase_switch_stops_schedule(restore_phase):
+    schedule = PhaseSchedule([(Germination, 1 / DAY), (Seedling, 1 / DAY)], transition=1 / DAY, step=0.01)
+    task = asyncio.create_task(run_schedule(schedule, datetime.now().isoformat()))
+    await asyncio.sleep(0.02)
+
+    config.switch_growth_phase(Vegetative)
+    await asyncio.wait_for(task, 1)
+
+    assert config.params.phase == "Vegetative"
@@ -0,0 +1,46 @@
+import pytest
+
+from katomato.core.pid import PID
+
+
+def _track(pid: PID, setpoint: float, steps: int, temperature: float = 30.0, gain: float = 0.02) -> list[float]:
+    """A room that heats by `gain` C/s and is cooled in proportion to the output, one step per second."""
+    history = []
+    for now in range(steps):
+        output = pid.update(setpoint, temperature, now)
+        temperature += gain - 0.04 * output
+        history.append(temperature)
+    return history
+
+
+def test_proportional_only_at_start():
+    pid = PID(kp=0.5, ki=0.1)
+
+    assert pid.update(25.0, 26.0, 0) == 0.5
+    assert pid.update(25.0, 24.0, 1) == 0.0  # clamped, never below out_min
+
+
+def test_integral_removes_steady_state_error():
+    history = _track(PID(kp=0.5, ki=0.01), 25.0, 3000)
+
+    assert history[-1] == pytest.approx(25.0, abs=0.01)
+
+
+def test_anti_windup_after_saturation():
+    pid = PID(kp=0.5, ki=0.01)
+    for now in range(1000):
+        pid.update(25.0, 35.0, now)  # far too hot for a long time
+    assert pid.output == 1.0
+    assert pid.integral <= 1.0
+
+    # Cooled below the setpoint, the fan backs off right away instead of unwinding a huge integral
+    assert pid.update(25.0, 23.0, 1000) < 0.1
+
+
+def test_derivative_acts_on_measurement():
+    pid = PID(kp=0.0, ki=0.0, kd=0.2)
+    pid.update(25.0, 26.0, 0)
+
+    assert pid.update(22.0, 26.0, 1) == 0.0  # a setpoint step gives no kick
+    assert pid.update(22.0, 27.0, 2) == pytest.approx(0.2)  # warming up 1 C/s
+    assert pid.update(22.0, 26.0, 3) == 0.0  # cooling down, clamped
@@ -0,0 +1,42 @@
+import pytest
+
+from katomato.core.registry import CONTROLLER_REGISTRY, CONTROLLERS, DEVICE_REGISTRY, DEVICES, get_controller, get_device
+from katomato.core.sensor_data import Control, SensorData
+
+
+class _Thing:
+    pass
+
+
+@pytest.fixture
+def things(monkeypatch):
+    monkeypatch.setitem(CONTROLLER_REGISTRY, "dt", _Thing)
+    monkeypatch.setitem(DEVICE_REGISTRY, "fan", _Thing)
+
+
+def _reading(zone, board="main"):
+    return SensorData("dt", "Temperature", 21, "C", (Control(9, "analog", "fan", board),), board, zone=zone)
+
+
+def test_controller_per_zone(things):
+    north = get_controller(_reading("north"))
+
+    assert get_controller(_reading("north")) is north
+    assert get_controller(_reading("south")) is not north
+    assert get_controller(_reading("north", board="annex")) is not north
+    assert len(CONTROLLERS) == 3
+
+
+def test_device_per_board_and_pin(things):
+    fan = get_device(Control(9, "analog", "fan", "main"))
+
+    assert get_device(_reading("north").controls[0]) is fan
+    assert get_device(Control(10, "analog", "fan", "main")) is not fan
+    assert get_device(Control(9, "analog", "fan", "annex")) is not fan
+    assert len(DEVICES) == 3
+
+
+def test_unknown_name(things):
+    assert get_device(Control(9, "analog", "heater")) is None
+    assert get_controller(SensorData("co2", "CO2", 400, "ppm", ())) is None
+    assert len(DEVICES) == len(CONTROLLERS) == 0
@@ -0,0 +1,75 @@
+import dataclasses
+
+import pytest
+
+from katomato import controllers
+from katomato.config import config
+from katomato.core.registry import CONTROLLER_REGISTRY, Action
+from katomato.core.rules import RuleController, compile_rules, parse_rule
+from katomato.core.sensor_data import Control, SensorData
+
+CO2_RULES = [
+    {"sensor": "co2", "condition": ">", "setpoint": 1000, "hysteresis": 100, "action": "down"},
+    {"sensor": "co2", "condition": "<", "setpoint": 1000, "hysteresis": 100, "action": "up"},
+    {"sensor": "co2", "condition": ">=", "setpoint": 2000, "action": "down", "device": "alarm_light", "priority": 10},
+]
+
+
+def test_rule_expression():
+    rule = parse_rule({"sensor": "dh", "condition": ">", "setpoint": "HUM_CEIL - hum_tolerance + 2", "action": "down"})
+
+    assert rule.setpoint == ((1, "HUM_CEIL"), (-1, "hum_tolerance"), (1, 2.0))
+    assert rule.action is Action.DOWN
+
+
+@pytest.mark.parametrize("options", [
+    {"sensor": "dh", "condition": "!=", "setpoint": 1, "action": "down"},
+    {"sensor": "dh", "condition": ">", "action": "down"},
+    {"sensor": "dh", "condition": ">", "setpoint": "HUM_MAX", "action": "down"},
+    {"sensor": "dh", "condition": ">", "setpoint": "HUM_CEIL hum_tolerance", "action": "down"},
+    {"sensor": "dh", "condition": ">", "setpoint": "HUM_CEIL * 2", "action": "down"},
+])
+def test_invalid_rule(options):
+    with pytest.raises(ValueError):
+        parse_rule(options)
+
+
+def test_hysteresis_band():
+    rules = compile_rules(CO2_RULES)["co2"]
+
+    assert rules.decide(1100.5, "fan") is Action.DOWN
+    assert rules.decide(1100, "fan") is None
+    assert rules.decide(900, "fan") is None
+    assert rules.decide(899, "fan") is Action.UP
+
+
+def test_device_rule_takes_priority():
+    rules = compile_rules(CO2_RULES)["co2"]
+
+    assert rules.decide(2000, "alarm_light") is Action.DOWN
+    assert rules.decide(1999, "alarm_light") is Action.DOWN  # the general rule
+    assert rules.decide(500, "alarm_light") is Action.UP
+
+
+def test_phase_switch_rebinds_thresholds(monkeypatch):
+    rules = compile_rules(config.CONTROL_RULES)["dh"]
+    ceil = config.params.HUM_CEIL - config.params.hum_tolerance
+    assert rules.decide(ceil + 1, "humidifier") is Action.DOWN
+
+    monkeypatch.setattr(config, "params", dataclasses.replace(config.params, HUM_CEIL=ceil + 10))
+
+    assert rules.decide(ceil + 1, "humidifier") is None
+
+
+@pytest.mark.asyncio
+async def test_sensor_with_rules_only(ctx, monkeypatch):
+    monkeypatch.setattr(controllers, "rule_table", compile_rules(CO2_RULES))
+    monkeypatch.delitem(CONTROLLER_REGISTRY, "co2", raising=False)
+    controllers.load_all_processors()
+    controller = CONTROLLER_REGISTRY.pop("co2")()
+    sensor_data = SensorData("co2", "CO2", 1500, "ppm", (Control(3, "digital", "device"),))
+
+    assert isinstance(controller, RuleController)
+    await controller(sensor_data, ctx.command_queue)
+
+    ctx.mock_device.assert_awaited_once_with(Action.DOWN, sensor_data.controls[0], ctx.command_queue)
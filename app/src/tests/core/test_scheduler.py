@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from katomato.core.scheduler import ControllerScheduler
+from katomato.core.sensor_data import SensorData
+
+
+def _reading(value, sensor="dt", zone=None):
+    return SensorData(sensor=sensor, label="Temperature", value=value, unit="C", controls=(), zone=zone)
+
+
+class _RecordingController:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.values = []
+
+    async def __call__(self, sensor_data, command_queue):
+        self.values.append(sensor_data.value)
+        await asyncio.sleep(self.delay)
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_controller():
+    scheduler = ControllerScheduler()
+    controller = _RecordingController()
+    queue = asyncio.Queue()
+
+    scheduler.submit("dt", controller, _reading(21), queue)
+    await asyncio.sleep(0.01)
+
+    assert controller.values == [21]
+    assert scheduler.active_workers == 0
+    assert scheduler.stats["dt"].processed == 1
+
+
+@pytest.mark.asyncio
+async def test_newer_reading_supersedes_queued_one():
+    scheduler = ControllerScheduler()
+    controller = _RecordingController(delay=0.01)
+    queue = asyncio.Queue()
+
+    scheduler.submit("dt", controller, _reading(1), queue)
+    await asyncio.sleep(0)  # 1 is being processed
+    for value in (2, 3, 4):
+        scheduler.submit("dt", controller, _reading(value), queue)
+
+    assert scheduler.depth("dt") == 1
+    await asyncio.sleep(0.05)
+
+    assert controller.values == [1, 4]
+    assert scheduler.stats["dt"].coalesced == 2
+    assert scheduler.active_workers == 0
+
+
+@pytest.mark.asyncio
+async def test_mailbox_keeps_latest_reading_per_sensor():
+    scheduler = ControllerScheduler()
+    controller = _RecordingController(delay=0.01)
+    queue = asyncio.Queue()
+
+    scheduler.submit("multi", controller, _reading(0, "a"), queue)
+    await asyncio.sleep(0)
+    for value, sensor in ((1, "b"), (2, "c"), (3, "b")):
+        scheduler.submit("multi", controller, _reading(value, sensor), queue)
+    await asyncio.sleep(0.05)
+
+    assert controller.values == [0, 2, 3]
+    assert scheduler.stats["multi"].coalesced == 1
+    assert scheduler.stats["multi"].max_depth == 2
+
+
+@pytest.mark.asyncio
+async def test_controller_error_is_logged_and_worker_continues(caplog):
+    scheduler = ControllerScheduler()
+    calls = []
+
+    async def failing(sensor_data, command_queue):
+        calls.append(sensor_data.sensor)
+        if sensor_data.sensor == "a":
+            raise ValueError("boom")
+
+    scheduler.submit("multi", failing, _reading(1, "a"), asyncio.Queue())
+    scheduler.submit("multi", failing, _reading(1, "b"), asyncio.Queue())
+    await asyncio.sleep(0)
+
+    assert calls == ["a", "b"]
+    assert scheduler.stats["multi"].errors == 1
+    assert any("Controller multi failed" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_workers():
+    scheduler = ControllerScheduler()
+    controller = _RecordingController(delay=10)
+
+    scheduler.submit("dt", controller, _reading(1), asyncio.Queue())
+    await asyncio.sleep(0)
+    scheduler.submit("dt", controller, _reading(2), asyncio.Queue())
+    await scheduler.close()
+
+    assert scheduler.active_workers == 0
+    assert scheduler.depth("dt") == 0
+
+
+@pytest.mark.asyncio
+async def test_zones_run_side_by_side():
+    scheduler = ControllerScheduler()
+    north, south = _RecordingController(delay=0.05), _RecordingController(delay=0.05)
+    queue = asyncio.Queue()
+
+    scheduler.submit("dt", north, _reading(1, zone="north"), queue)
+    scheduler.submit("dt", south, _reading(2, zone="south"), queue)
+    await asyncio.sleep(0)
+
+    assert scheduler.active_workers == 2
+    assert (north.values, south.values) == ([1], [2])
+    await asyncio.sleep(0.1)
+    assert scheduler.active_workers == 0
+    assert scheduler.stats["dt"].processed == 2
+    assert scheduler.depth("dt") == 0
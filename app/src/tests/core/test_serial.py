@@ -1,10 +1,22 @@
 import asyncio
+import json
 import os
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from katomato.core.serial import ArduinoProtocol
+from katomato import controllers
+from katomato.core.sensor_data import Control, SensorData
+from katomato.core.serial import (
+    Ack,
+    ArduinoProtocol,
+    CommandWriter,
+    TelemetryDecoder,
+    encode_ack,
+    encode_meta,
+    encode_reading,
+)
+from katomato.core.utils.command_util import build_arduino_command, get_sensor_data
 
 
 @pytest.fixture
@@ -73,7 +85,7 @@ async def test_send_command_sends_data(command_queue):
     protocol.transport = mock_transport
 
     await protocol.send_command("123")
-    mock_transport.write.assert_called_once_with(b"123")
+    mock_transport.write.assert_called_once_with(b"123\n")
 
 
 @pytest.mark.asyncio
@@ -93,7 +105,7 @@ async def test_buffer_partial_and_multiple_lines(command_queue, mock_dispatcher,
     protocol = ArduinoProtocol(command_queue)
     # Simulate receiving partial + two full messages
     protocol.data_received(b"temp,23.5\nhum,45.3\nincompl")
-    assert protocol.buffer == "incompl"
+    assert protocol.framer.pending == b"incompl"
     assert mock_dispatcher.call_count == 2
 
 
@@ -105,3 +117,302 @@ async def test_debug_mode(command_queue, caplog):
         protocol.data_received(b"some_debug_line\n")
 
         assert any("Debug mode: some_debug_line" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_line_split_across_chunks(command_queue, mock_dispatcher, mock_get_sensor_data):
+    protocol = ArduinoProtocol(command_queue)
+
+    for byte in b"temp,23.5\r\n":
+        protocol.data_received(bytes([byte]))
+
+    mock_get_sensor_data.assert_called_once_with(b"temp,23.5")
+    assert mock_dispatcher.call_count == 1
+
+
+def _meta_and_reading(value=21.5, seq=1):
+    controls = (Control(9, "analog", "exhaust_fan"),)
+    return encode_meta(0, "dt", "Temperature", "C", controls) + encode_reading(0, seq, value)
+
+
+def test_telemetry_decoder_reading():
+    decoder = TelemetryDecoder()
+
+    items = decoder.feed(_meta_and_reading())
+
+    assert items == [SensorData("dt", "Temperature", 21.5, "C", (Control(9, "analog", "exhaust_fan"),))]
+
+
+def test_telemetry_decoder_frames_split_across_chunks():
+    decoder = TelemetryDecoder()
+    stream = _meta_and_reading() + b'{"sensor":"error","value":"x"}\r\n' + encode_reading(0, 2, 22.0)
+
+    items = []
+    for byte in stream:
+        items += decoder.feed(bytes([byte]))
+
+    assert [item.value if isinstance(item, SensorData) else item for item in items] == \
+           [21.5, b'{"sensor":"error","value":"x"}\r', 22.0]
+
+
+def test_telemetry_decoder_skips_corrupted_frame():
+    decoder = TelemetryDecoder()
+    decoder.feed(_meta_and_reading())
+    corrupted = bytearray(encode_reading(0, 2, 23.0))
+    corrupted[5] ^= 0xFF
+
+    items = decoder.feed(bytes(corrupted) + encode_reading(0, 3, 24.0))
+
+    assert [item.value for item in items] == [24.0]
+    assert decoder.crc_errors == 1
+    assert decoder.lost_frames == 1
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_telemetry_decoder_non_finite_reading_is_none(value):
+    decoder = TelemetryDecoder()
+
+    # A failed sensor read, the JSON protocol sends null for it
+    items = decoder.feed(_meta_and_reading(value))
+
+    assert [item.value for item in items] == [None]
+    assert items[0].value == get_sensor_data(b'{"sensor":"dt","value":null}').value
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sensor", ["dt", "ef", "smoke"])
+async def test_non_finite_binary_reading_reaches_no_controller(command_queue, sensor):
+    controllers.load_all_processors()
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+    meta = encode_meta(1, sensor, "Sensor", "", (Control(9, "pwm", "exhaust_fan"),))
+
+    with patch("katomato.core.dispatcher.scheduler.submit") as submit:
+        protocol.data_received(b'{"sensor":"dt","label":"Temperature","value":21.0,"unit":"C","controls":[]}\r\n')
+        protocol.data_received(meta + encode_reading(1, 1, float("nan")))
+        assert submit.call_count == 1  # the JSON reading only
+        protocol.data_received(encode_reading(1, 2, 21.0))
+
+    assert protocol.telemetry is not None
+    assert submit.call_args.args[2].value == 21.0
+    assert submit.call_count == 2
+
+
+def test_telemetry_decoder_unknown_sensor():
+    decoder = TelemetryDecoder()
+
+    assert decoder.feed(encode_reading(3, 1, 1.0)) == []
+
+
+@pytest.mark.asyncio
+async def test_binary_telemetry_negotiation(command_queue, mock_dispatcher):
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+
+    protocol.data_received(b'{"sensor":"dt","label":"Temperature","value":21.0,"unit":"C","controls":[]}\r\n')
+
+    handshake = protocol.transport.write.call_args.args[0]
+    assert json.loads(handshake) == {"command": "telemetry", "pin": 0, "value": 1}
+
+    protocol.data_received(_meta_and_reading(22.0))
+
+    assert protocol._negotiation_timer is None
+    assert mock_dispatcher.call_args.args[0].value == 22.0
+    assert mock_dispatcher.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_binary_telemetry_falls_back_on_error(command_queue, mock_dispatcher):
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+    protocol.data_received(b'{"sensor":"dt","label":"Temperature","value":21.0,"unit":"C","controls":[]}\r\n')
+
+    protocol.data_received(b'{"sensor":"error","value":"No control for pin"}\r\n')
+    protocol.data_received(b'{"sensor":"dt","label":"Temperature","value":21.0,"unit":"C","controls":[]}\r\n')
+
+    assert protocol.telemetry is None
+    assert protocol.transport.write.call_count == 1  # not renegotiated
+    assert mock_dispatcher.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_binary_telemetry_falls_back_on_timeout(command_queue, mock_dispatcher):
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+
+    with patch("katomato.core.serial.config.TELEMETRY_HANDSHAKE_TIMEOUT", 0.01):
+        protocol.data_received(b'{"sensor":"dt","label":"Temperature","value":21.0,"unit":"C","controls":[]}\r\n')
+        await asyncio.sleep(0.05)
+
+    assert protocol.telemetry is None
+
+
+@pytest.mark.asyncio
+async def test_command_writer_batches_pending_commands():
+    writes = []
+    writer = CommandWriter(writes.append, budget=128, interval=0.01)
+
+    await writer.send(build_arduino_command("digital", 4, 1))  # written right away
+    await writer.send(build_arduino_command("digital", 5, 1))
+    await writer.send(build_arduino_command("analog", 9, 25))
+    await writer.send(build_arduino_command("analog", 9, 51))  # replaces the pending 25
+    await asyncio.sleep(0.02)
+
+    assert len(writes) == 2
+    assert [json.loads(line)["value"] for line in writes[1].splitlines()] == [1, 51]
+
+
+@pytest.mark.asyncio
+async def test_command_writer_drops_redundant_command():
+    writes = []
+    writer = CommandWriter(writes.append, interval=0.01)
+
+    await writer.send(build_arduino_command("digital", 4, 1))
+    await asyncio.sleep(0.02)
+    await writer.send(build_arduino_command("digital", 4, 1))
+    await asyncio.sleep(0.02)
+
+    assert len(writes) == 1
+    assert writer.deduplicated == 1
+
+    writer.reset()  # the board forgot its state
+    await writer.send(build_arduino_command("digital", 4, 1))
+    assert len(writes) == 2
+
+
+@pytest.mark.asyncio
+async def test_command_writer_waits_for_resume_writing(command_queue):
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+    protocol.writer.interval = 0.01
+
+    protocol.pause_writing()
+    await protocol.send_command(build_arduino_command("digital", 4, 1))
+    await asyncio.sleep(0.02)
+    protocol.transport.write.assert_not_called()
+
+    protocol.resume_writing()
+    await asyncio.sleep(0)
+    protocol.transport.write.assert_called_once()
+    assert json.loads(protocol.transport.write.call_args.args[0]) == {"command": "digital", "pin": 4, "value": 1, "seq": 0}
+
+
+@pytest.mark.asyncio
+async def test_command_writer_respects_budget():
+    writes = []
+    command = build_arduino_command("digital", 4, 1)
+    writer = CommandWriter(writes.append, budget=2 * len(command) + 2, interval=0.01)
+
+    for pin in range(6):
+        await writer.send(build_arduino_command("digital", pin, 1))
+    await asyncio.sleep(0.05)
+
+    assert all(len(data) <= writer.budget for data in writes)
+    assert sum(len(data.splitlines()) for data in writes) == 6
+
+
+def _ack_protocol(command_queue, window=2, timeout=0.05, retries=1):
+    protocol = ArduinoProtocol(command_queue)
+    protocol.connection_made(MagicMock())
+    protocol.writer.interval = 0.001
+    protocol.inflight.window = window
+    protocol.inflight.timeout = timeout
+    protocol.inflight.retries = retries
+    return protocol
+
+
+def _written(protocol) -> list[dict]:
+    return [json.loads(line) for call in protocol.transport.write.call_args_list for line in call.args[0].splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_commands_are_pipelined_up_to_window(command_queue):
+    protocol = _ack_protocol(command_queue)
+
+    await protocol.send_command(build_arduino_command("digital", 4, 1))
+    await protocol.send_command(build_arduino_command("digital", 5, 1))
+    third = asyncio.create_task(protocol.send_command(build_arduino_command("digital", 6, 1)))
+    await asyncio.sleep(0.01)
+    assert not third.done()  # window full
+
+    protocol.data_received(b'{"sensor": "ack", "value": 0}\n')
+    await third
+    await asyncio.sleep(0.01)
+
+    assert [cmd["seq"] for cmd in _written(protocol)] == [0, 1, 2]
+    assert protocol.inflight.acked == 1
+    assert protocol.inflight.supported
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_command_is_retried(command_queue, caplog):
+    protocol = _ack_protocol(command_queue)
+    protocol.inflight.supported = True
+
+    await protocol.send_command(build_arduino_command("digital", 4, 1))
+    await asyncio.sleep(0.07)
+    assert [cmd["seq"] for cmd in _written(protocol)] == [0, 0]
+
+    await asyncio.sleep(0.05)
+    assert protocol.inflight.expired == 1
+    assert any("not acknowledged after 1 retries" in message for message in caplog.messages)
+
+    await protocol.send_command(build_arduino_command("digital", 4, 1))  # not deduplicated, may not be applied
+    assert len(_written(protocol)) == 3
+
+
+@pytest.mark.asyncio
+async def test_nack_is_logged_and_value_can_be_resent(command_queue, caplog):
+    protocol = _ack_protocol(command_queue)
+
+    await protocol.send_command(build_arduino_command("digital", 4, 1))
+    protocol.data_received(b'{"sensor": "nack", "value": 0, "label": "No control for pin"}\n')
+
+    assert protocol.inflight.nacked == 1
+    assert len(protocol.inflight) == 0
+    assert any("Arduino rejected" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_newer_command_supersedes_inflight_one(command_queue):
+    protocol = _ack_protocol(command_queue)
+
+    await protocol.send_command(build_arduino_command("analog", 9, 25))
+    await protocol.send_command(build_arduino_command("analog", 9, 51))
+
+    assert len(protocol.inflight) == 1
+    assert protocol.inflight.superseded == 1
+
+
+@pytest.mark.asyncio
+async def test_firmware_without_acks_falls_back(command_queue, caplog):
+    protocol = _ack_protocol(command_queue, window=1)
+
+    await protocol.send_command(build_arduino_command("digital", 4, 1))
+    await protocol.send_command(build_arduino_command("digital", 5, 1))  # waits for the first to expire
+
+    assert protocol.inflight.supported is False
+    assert "seq" not in _written(protocol)[-1]
+    assert any("does not acknowledge commands" in message for message in caplog.messages)
+
+
+def test_telemetry_decoder_ack_frames():
+    decoder = TelemetryDecoder()
+
+    assert decoder.feed(encode_ack(7) + encode_ack(8, "Missing fields")) == [Ack(7, True), Ack(8, False, "Missing fields")]
+
+
+@pytest.mark.asyncio
+async def test_readings_are_stamped_with_board(command_queue, mock_dispatcher):
+    protocol = ArduinoProtocol(command_queue, board="tent-2")
+
+    for _ in range(2):
+        protocol.data_received(
+            b'{"sensor":"dt","label":"Temperature","value":21.5,"unit":"C",'
+            b'"controls":[{"pin":9,"type":"analog","device":"exhaust_fan"}]}\n'
+        )
+
+    first, second = (call.args[0] for call in mock_dispatcher.call_args_list)
+    assert first.board == "tent-2"
+    assert first.controls == (Control(9, "analog", "exhaust_fan", "tent-2"),)
+    assert second.controls is first.controls
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from katomato.config import config
+from katomato.controllers.temperature import TemperatureController
+from katomato.core.calibration import calibrations
+from katomato.core.clock import get_clock
+from katomato.core.phase_schedule import load_schedule
+from katomato.core.registry import CONTROLLERS, DEVICES, Action
+from katomato.core.sensor_data import Control
+from katomato.core.state_journal import MANUAL_PHASE, SNAPSHOT_FILE, StateJournal, journal, reconcile, restore_state
+from katomato.devices.exhaust_fan import ExhaustFan
+from katomato.devices.humidifier import Humidifier
+from katomato.devices.water_pump import WaterPump
+
+HUMIDIFIER = ("device", "humidifier", None, 4)
+
+
+def _segments(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith(".jnl"))
+
+
+def test_journal_restores_latest_records_after_restart(tmp_path):
+    first = StateJournal(str(tmp_path))
+    first.record(HUMIDIFIER, {"type": "digital", "value": 1})
+    first.record(MANUAL_PHASE, {"name": "Seedling"})
+    first.record(HUMIDIFIER, {"type": "digital", "value": 0})
+    first.record(HUMIDIFIER, {"type": "digital", "value": 0})  # unchanged, not written
+    first.close()
+
+    restarted = StateJournal(str(tmp_path))
+
+    assert restarted.load() == {HUMIDIFIER: {"type": "digital", "value": 0}, MANUAL_PHASE: {"name": "Seedling"}}
+    assert restarted.written == 3
+
+
+def test_journal_skips_torn_record(tmp_path):
+    first = StateJournal(str(tmp_path))
+    first.record(HUMIDIFIER, {"type": "digital", "value": 1})
+    first.close()
+    with open(tmp_path / _segments(tmp_path)[0], "ab") as f:
+        f.write(b'[["device", "humidifier", null, 4], {"ty')  # the process died mid-write
+
+    restarted = StateJournal(str(tmp_path))
+    restarted.record(MANUAL_PHASE, {"name": "Seedling"})
+    restarted.close()
+
+    assert restarted.torn == 1
+    assert restarted.get(HUMIDIFIER) == {"type": "digital", "value": 1}
+    # New records never follow a torn one
+    assert len(_segments(tmp_path)) == 2
+    assert StateJournal(str(tmp_path)).load() == restarted.entries
+
+
+@pytest.mark.asyncio
+async def test_journal_compacts_segments_into_snapshot(tmp_path):
+    first = StateJournal(str(tmp_path))
+    for value in range(10):
+        first.record(HUMIDIFIER, {"type": "digital", "value": value})
+    await first.compact()
+    first.record(MANUAL_PHASE, {"name": "Seedling"})
+    first.close()
+
+    assert os.path.exists(tmp_path / SNAPSHOT_FILE)
+    assert _segments(tmp_path) == ["00000002.jnl"]
+    restarted = StateJournal(str(tmp_path))
+    assert restarted.load() == {HUMIDIFIER: {"type": "digital", "value": 9}, MANUAL_PHASE: {"name": "Seedling"}}
+    assert restarted.written == 1
+
+
+def test_journal_ignores_segments_before_snapshot(tmp_path):
+    first = StateJournal(str(tmp_path))
+    first.record(HUMIDIFIER, {"type": "digital", "value": 1})
+    asyncio.run(first.compact())
+    # A segment the snapshot already covers, left by a crash before it was deleted
+    with open(tmp_path / "00000001.jnl", "w") as f:
+        f.write(json.dumps([HUMIDIFIER, {"type": "digital", "value": 0}]) + "\n")
+
+    restarted = StateJournal(str(tmp_path))
+
+    assert restarted.get(HUMIDIFIER) == {"type": "digital", "value": 1}
+    assert _segments(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_restored_device_dedups_first_command(ctx):
+    journal.record(HUMIDIFIER, {"type": "digital", "value": Action.DOWN.value})
+
+    assert restore_state() == 1
+    device = DEVICES.get(HUMIDIFIER[1:])
+    await device(Action.DOWN, Control(4, "digital", "humidifier"), ctx.command_queue)
+
+    assert isinstance(device, Humidifier)
+    assert ctx.command_queue.empty()
+
+
+@pytest.mark.parametrize("journaled", [Action.UP.value, Action.DOWN.value])
+def test_restored_water_pump_is_stopped(journaled):
+    key = ("device", "water_pump", None, 5)
+    journal.record(key, {"type": "digital", "value": journaled})
+
+    restore_state()
+
+    assert isinstance(DEVICES.get(key[1:]), WaterPump)
+    assert DEVICES.get(key[1:]).state == Action.DOWN.value
+    assert journal.get(key)["value"] == Action.DOWN.value
+
+
+@pytest.mark.asyncio
+async def test_reconcile_stops_water_pump(ctx):
+    # Journaled while watering, the run's stop timer did not survive the restart
+    journal.record(("device", "water_pump", None, 5), {"type": "digital", "value": Action.UP.value})
+    restore_state()
+    board = SimpleNamespace(connected=asyncio.Event())
+    board.connected.set()
+
+    await reconcile(SimpleNamespace(connections={"main": board}, default_board="main"), ctx.command_queue)
+
+    assert json.loads(await ctx.command_queue.get()) == {"command": "digital", "pin": 5, "value": Action.DOWN.value}
+    assert ctx.command_queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_restored_exhaust_fan_keeps_its_speed(ctx):
+    ctrl = Control(9, "pwm", "exhaust_fan")
+    fan = ExhaustFan()
+    await calibrations.put(fan._key(ctrl), {"idx": 4, "pwm": 102, "floor": fan.fan_speed_floor, "at": time.time()})
+    journal.record(("device", "exhaust_fan", None, 9), {"type": "pwm", "value": 178, "idx": 7})
+
+    restore_state()
+    fan = DEVICES.get(("exhaust_fan", None, 9))
+    await fan(Action.UP, ctrl, ctx.command_queue)
+
+    # One step down from the speed before the restart, not from the RPM threshold
+    assert json.loads(await ctx.command_queue.get())["value"] == 153
+    assert ctx.command_queue.empty()
+
+
+def test_restored_controller_keeps_decision_interval():
+    key = ("controller", "dt", None, None)
+    journal.record(key, {"at": time.time() - 30})
+
+    restore_state()
+
+    controller = CONTROLLERS.get(key[1:])
+    assert isinstance(controller, TemperatureController)
+    assert get_clock().monotonic() - controller.last_decision_time == pytest.approx(30, abs=1)
+
+
+def test_restored_manual_phase_keeps_schedule_stopped(monkeypatch):
+    monkeypatch.setattr(config, "growth_phase", config.growth_phase)
+    monkeypatch.setattr(config, "params", config.params)
+    monkeypatch.setattr(config, "PLANTED_AT", "2025-04-01")
+    monkeypatch.setattr(config, "PHASE_SCHEDULE", {"Germination": 7, "Seedling": 14})
+    journal.record(MANUAL_PHASE, {"name": "Flowering"})
+
+    restore_state()
+
+    assert config.params.phase == "Flowering"
+    assert load_schedule() is None
+
+
+@pytest.mark.asyncio
+async def test_reconcile_sends_outputs_once_board_connected(ctx):
+    journal.record(HUMIDIFIER, {"type": "digital", "value": 1})
+    journal.record(("device", "humidifier", "other", 4), {"type": "digital", "value": 1})
+    main = SimpleNamespace(connected=asyncio.Event())
+    connections = SimpleNamespace(connections={"main": main}, default_board="main")
+
+    task = asyncio.create_task(reconcile(connections, ctx.command_queue))
+    await asyncio.sleep(0)
+    assert ctx.command_queue.empty()
+    main.connected.set()
+    await task
+
+    assert json.loads(await ctx.command_queue.get()) == {"command": "digital", "pin": 4, "value": 1}
+    assert ctx.command_queue.empty()
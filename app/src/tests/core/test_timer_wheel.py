@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from katomato.core.clock import get_clock
+from katomato.core.timer_wheel import TimerWheel
+from tests.test_utils import run_virtual
+
+
+def test_timers_fire_within_a_tick_of_their_deadline():
+    wheel = TimerWheel(tick=0.5, slots=8)
+    fired = []
+
+    async def main():
+        for delay in (1.0, 3.2, 30.0):  # 30 s wraps around the wheel several times
+            wheel.schedule(delay, lambda delay=delay: fired.append((delay, get_clock().monotonic())))
+        await asyncio.sleep(40)
+
+    run_virtual(main())
+
+    assert [delay for delay, _ in fired] == [1.0, 3.2, 30.0]
+    assert all(delay <= at <= delay + wheel.tick for delay, at in fired)
+    assert len(wheel) == 0
+
+
+def test_cancelled_timer_does_not_fire():
+    wheel = TimerWheel(tick=0.5, slots=8)
+    fired = []
+
+    async def main():
+        wheel.schedule(2, lambda: fired.append("kept"))
+        wheel.schedule(2, lambda: fired.append("cancelled")).cancel()
+        await asyncio.sleep(3)
+
+    run_virtual(main())
+
+    assert fired == ["kept"]
+    assert (wheel.fired, wheel.cancelled) == (1, 1)
+
+
+def test_coroutine_callbacks_run_as_tasks():
+    wheel = TimerWheel()
+    done = []
+
+    async def stop():
+        await asyncio.sleep(1)
+        done.append(get_clock().monotonic())
+
+    async def main():
+        wheel.schedule(5, stop)
+        await asyncio.sleep(10)
+
+    run_virtual(main())
+
+    assert done == [pytest.approx(6.0)]
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from katomato.core.command_queue import Lane, PriorityCommandQueue
+from katomato.core.registry import DEVICE_REGISTRY
+from katomato.core.watchdog import LoopWatchdog, Stall, trip_alarm
+from katomato.devices.alarm_light import AlarmLight
+
+
+def _block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+async def _watch(watchdog, blocked):
+    task = asyncio.create_task(watchdog.run())
+    await asyncio.sleep(0.05)
+    _block_the_loop(blocked)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_sampled_with_its_stack():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.1, alarm=10)
+
+    await _watch(watchdog, 0.3)
+
+    [stall] = watchdog.stalls
+    assert stall.lag >= 0.15
+    assert "_block_the_loop" in stall.stack
+    assert "test_stall_is_sampled_with_its_stack" in stall.task
+    assert watchdog.alarms == 0
+
+
+@pytest.mark.asyncio
+async def test_long_stall_raises_the_alarm_once():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05, alarm=0.15)
+    raised = []
+    watchdog.on_alarm(raised.append)
+
+    async def async_handler(stall):
+        raised.append("async")
+
+    watchdog.on_alarm(async_handler)
+
+    await _watch(watchdog, 0.4)
+
+    assert watchdog.alarms == 1
+    assert raised[0] is watchdog.stalls[0]
+    assert raised[1] == "async"
+
+
+@pytest.mark.asyncio
+async def test_failing_async_alarm_handler_is_logged(caplog):
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.05, alarm=0.15)
+    raised = []
+
+    async def failing(stall):
+        raise RuntimeError("relay board gone")
+
+    watchdog.on_alarm(failing)
+    watchdog.on_alarm(raised.append)
+
+    await _watch(watchdog, 0.4)
+
+    assert raised == [watchdog.stalls[0]]
+    assert not watchdog._alarm_tasks
+    assert any("alarm handler failed: relay board gone" in message for message in caplog.messages)
+
+
+@pytest.mark.asyncio
+async def test_short_hiccups_are_not_recorded():
+    watchdog = LoopWatchdog(interval=0.01, threshold=0.2, alarm=1)
+
+    await _watch(watchdog, 0.02)
+
+    assert not watchdog.stalls
+    assert watchdog.dump() == "No event loop stalls"
+
+
+@pytest.mark.asyncio
+async def test_trip_alarm_switches_the_alarm_devices_in_the_safety_lane(monkeypatch):
+    monkeypatch.setitem(DEVICE_REGISTRY, "alarm_light", AlarmLight)
+    monkeypatch.setattr(
+        "katomato.core.watchdog.config.WATCHDOG_ALARM_CONTROLS",
+        [{"pin": 4, "type": "digital", "device": "alarm_light", "board": "main"}],
+    )
+    queue = PriorityCommandQueue()
+
+    await trip_alarm(queue, Stall(0.0, 6.0, "task", ""))
+
+    assert queue.depth(Lane.SAFETY) == 1
+    assert '"pin": 4' in queue.get_nowait()
@@ -44,3 +44,86 @@ def test_get_sensor_data():
 def test_get_sensor_data_invalid_json():
     sensor_data = get_sensor_data('{invalid_json}')
     assert not sensor_data
+
+
+def test_get_sensor_data_accepts_bytes():
+    sensor_data = get_sensor_data(
+        b'{"sensor":"dt","label":"Temperature","value":21.5,"unit":"C",'
+        b'"controls":[{"pin":9,"type":"analog","device":"exhaust_fan"}]}'
+    )
+
+    assert sensor_data == SensorData("dt", "Temperature", 21.5, "C", (Control(9, "analog", "exhaust_fan"),))
+
+
+def test_get_sensor_data_zone():
+    sensor_data = get_sensor_data(
+        '{"sensor":"dt","label":"Temperature","value":21.5,"unit":"C","zone":"north",'
+        '"controls":[{"pin":9,"type":"analog","device":"exhaust_fan"}]}'
+    )
+
+    assert sensor_data.zone == "north"
+    assert get_sensor_data('{"sensor":"dt","value":21.5,"controls":[]}').zone is None
+
+
+def test_get_sensor_data_shares_cached_controls():
+    frame = ('{"sensor":"sm","label":"Soil Moisture","value":%d,"unit":"%%",'
+             '"controls":[{"pin":7,"type":"digital","device":"water_pump"}]}')
+
+    first = get_sensor_data(frame % 300)
+    second = get_sensor_data(frame % 310)
+
+    assert (first.value, second.value) == (300, 310)
+    assert first.controls is second.controls
+
+
+def test_get_sensor_data_controls_cached_per_sensor():
+    frame = '{"sensor":"%s","value":1,"controls":[{"pin":9,"type":"analog","device":"exhaust_fan"}]}'
+
+    first = get_sensor_data(frame % "dt")
+    second = get_sensor_data(frame % "ef")
+
+    assert (first.sensor, second.sensor) == ("dt", "ef")
+    assert first.controls == second.controls
+
+
+def test_get_sensor_data_controls_not_last():
+    sensor_data = get_sensor_data(
+        '{"controls": [{"pin": 4, "type": "digital", "device": "alarm_light"}], '
+        '"sensor": "dh", "label": "Humidity", "value": 78, "unit": "%"}'
+    )
+
+    assert sensor_data.sensor == "dh"
+    assert sensor_data.label == "Humidity"
+    assert sensor_data.controls == (Control(4, "digital", "alarm_light"),)
+
+
+def test_get_sensor_data_key_after_controls():
+    frame = '{"sensor":"dt","value":%d,"controls":[{"pin":9,"type":"analog","device":"exhaust_fan"}],"zone":"north"}'
+
+    first = get_sensor_data(frame % 21)
+    second = get_sensor_data(frame % 22)  # from the cache
+
+    assert (first.zone, second.zone) == ("north", "north")
+    assert (first.value, second.value) == (21, 22)
+    assert second.controls == (Control(9, "analog", "exhaust_fan"),)
+
+
+def test_get_sensor_data_controls_text_in_label():
+    sensor_data = get_sensor_data(
+        '{"sensor": "x", "label": "\\"controls\\"", "value": 1, "unit": "", "controls": []}'
+    )
+
+    assert sensor_data.label == '"controls"'
+    assert sensor_data.controls == ()
+
+
+def test_get_sensor_data_error_frame():
+    sensor_data = get_sensor_data('{"sensor":"error","value":"No control for pin"}')
+
+    assert sensor_data.sensor == "error"
+    assert sensor_data.value == "No control for pin"
+    assert sensor_data.controls == ()
+
+
+def test_get_sensor_data_not_a_sensor_frame():
+    assert get_sensor_data("[1, 2]") is None
@@ -1,11 +1,16 @@
+import asyncio
 import json
-from unittest.mock import MagicMock
+from dataclasses import replace
 
 import pytest
 
+from katomato.config import config
+from katomato.core.calibration import CalibrationStore, calibrations
+from katomato.core.clock import get_clock
 from katomato.core.registry import Action
-from katomato.core.sensor_data import Control, State
+from katomato.core.sensor_data import Control, Duty, State
 from katomato.devices.exhaust_fan import ExhaustFan
+from tests.test_utils import run_virtual
 
 
 @pytest.fixture
@@ -18,23 +23,106 @@ def control():
     return Control(pin=1, type="pwm", device="exhaust_fan")
 
 
+async def _readings(device, control, ctx, stall_pwm: int, count: int) -> int:
+    """Feeds speed readings of a fan that reaches the floor from `stall_pwm`, returns those until calibrated."""
+    for n in range(1, count + 1):
+        rpm = 1500 if (device.output or 0) >= stall_pwm else 0
+        await device(State(rpm), control, ctx.command_queue)
+        if device.rpm_threshold_determined and device._search is None:
+            return n
+    return count
+
+
 @pytest.mark.asyncio
-async def test_exhaust_fan_threshold_detection(ctx, device, control, monkeypatch):
-    monkeypatch.setattr(
-        "katomato.devices.exhaust_fan.get_hardware_config",
-        lambda: {"ExhaustFan": MagicMock(FAN_SPEED_FLOOR=100)}
-    )
-
-    # Simulate gradually increasing RPM values until threshold is reached
-    for idx, pwm in enumerate(device.pwm_values):
-        state = State(value=50 + idx * 10)
-        await device(state, control, ctx.command_queue)
-        if state.value >= 100:
-            assert device.rpm_threshold_determined
-            assert device.rpm_threshold_idx == idx
-            break
+@pytest.mark.parametrize("stall_pwm, idx", [(0, 0), (25, 1), (102, 4), (200, 8), (255, 10), (300, 10)])
+async def test_exhaust_fan_threshold_binary_search(ctx, device, control, stall_pwm, idx):
+    readings = await _readings(device, control, ctx, stall_pwm, 10)
 
-    assert not ctx.command_queue.empty()
+    assert device.rpm_threshold_idx == device.current_rpm_idx == idx
+    assert device.output == device.pwm_values[idx]
+    assert readings <= 5  # the linear scan took up to 11
+    assert calibrations.get("exhaust_fan:None:1")["idx"] == idx
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_calibration_reused_after_restart(ctx, device, control):
+    await _readings(device, control, ctx, 102, 10)
+    while not ctx.command_queue.empty():
+        await ctx.command_queue.get()
+
+    restarted = ExhaustFan()
+    await restarted(Action.DOWN, control, ctx.command_queue)
+
+    # Controllable right away: the threshold speed is set, then the step
+    assert restarted.rpm_threshold_determined
+    assert json.loads(await ctx.command_queue.get())["value"] == restarted.pwm_values[5]
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_calibration_written_to_file(ctx, device, control, monkeypatch, tmp_path):
+    monkeypatch.setattr(calibrations, "path", str(tmp_path / "calibrations.json"))
+
+    await _readings(device, control, ctx, 102, 10)
+
+    assert CalibrationStore(calibrations.path).get("exhaust_fan:None:1")["idx"] == 4
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_calibration_of_another_floor_ignored(ctx, device, control, monkeypatch):
+    await _readings(device, control, ctx, 102, 10)
+    monkeypatch.setattr(config, "params", replace(config.params, exhaust_fan_speed_floor=1500))
+
+    restarted = ExhaustFan()
+    await restarted(Action.DOWN, control, ctx.command_queue)
+
+    assert not restarted.rpm_threshold_determined
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_searches_up_when_below_floor(ctx, device, control):
+    await _readings(device, control, ctx, 102, 10)
+
+    # The fan got slower: two readings below the floor at the threshold start a search above it
+    await device(State(0), control, ctx.command_queue)
+    assert device._search is None
+    await device(State(0), control, ctx.command_queue)
+    assert device._search is not None
+
+    assert await _readings(device, control, ctx, 150, 10) <= 3
+    assert device.rpm_threshold_idx == 6
+
+
+def test_exhaust_fan_revalidation(ctx, device, control):
+    async def main():
+        await _readings(device, control, ctx, 102, 10)
+        await asyncio.sleep(config.CALIBRATION_REVALIDATE_INTERVAL)
+
+        # After cleaning the fan runs slower, the revalidation lowers the threshold
+        await device(State(1500), control, ctx.command_queue)
+        assert device._search is not None
+        await _readings(device, control, ctx, 51, 10)
+        return get_clock().time()
+
+    revalidated_at = run_virtual(main())
+
+    assert device.rpm_threshold_idx == 2
+    assert calibrations.get("exhaust_fan:None:1") == {
+        "idx": 2, "pwm": device.pwm_values[2], "floor": device.fan_speed_floor, "at": revalidated_at,
+    }
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_revalidation_yields_to_actions(ctx, device, control):
+    await _readings(device, control, ctx, 102, 10)
+    device.calibrated_at -= config.CALIBRATION_REVALIDATE_INTERVAL
+    await device(State(1500), control, ctx.command_queue)
+    assert device.output != device.pwm_values[4]  # probing
+
+    await device(Action.UP, control, ctx.command_queue)
+
+    assert device._search is None
+    assert device.output == device.pwm_values[4]
+    assert device.rpm_threshold_idx == 4
 
 
 @pytest.mark.asyncio
@@ -94,3 +182,41 @@ async def test_exhaust_fan_action_down_when_out_range(ctx, device, control):
 
     assert ctx.command_queue.empty()
     assert device.current_rpm_idx == 11
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_duty_spans_threshold_to_full_speed(ctx, device, control):
+    device.rpm_threshold_determined = True
+    device.current_rpm_idx = device.rpm_threshold_idx = 5
+
+    sent = []
+    for duty in (1.0, 0.5, 0.0):
+        await device(Duty(duty), control, ctx.command_queue)
+        sent.append(json.loads(await ctx.command_queue.get())["value"])
+
+    assert sent == [255, 191, 127]
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_duty_skips_small_changes(ctx, device, control):
+    device.rpm_threshold_determined = True
+    device.current_rpm_idx = device.rpm_threshold_idx = 5
+
+    await device(Duty(0.02), control, ctx.command_queue)  # 130, already running at 127
+    assert ctx.command_queue.empty()
+
+    sent = []
+    for duty in (0.5, 0.55, 0.98, 1.0):  # the end of the range is always reached
+        await device(Duty(duty), control, ctx.command_queue)
+        if not ctx.command_queue.empty():
+            sent.append(json.loads(await ctx.command_queue.get())["value"])
+
+    assert sent == [191, 252, 255]
+
+
+@pytest.mark.asyncio
+async def test_exhaust_fan_duty_waits_for_threshold(ctx, device, control):
+    await device(Duty(1.0), control, ctx.command_queue)
+
+    assert ctx.command_queue.empty()
+    assert device.output is None
@@ -2,9 +2,11 @@ import json
 
 import pytest
 
+from katomato.core.command_queue import Lane
 from katomato.core.registry import Action
 from katomato.core.sensor_data import Control
 from katomato.devices.linear_device import LinearDevice
+from katomato.devices.power_switch import PowerSwitch
 
 
 @pytest.fixture
@@ -55,3 +57,13 @@ async def test_linear_device_action_down(ctx, device, control):
     cmd = json.loads(cmd_str)
     # Command queue contains action
     assert cmd["value"] == Action.DOWN.value
+
+
+@pytest.mark.asyncio
+async def test_safety_devices_use_safety_lane(ctx, control):
+    ctx.command_queue.put_nowait('{"command": "analog", "pin": 9, "value": 25}')
+
+    await PowerSwitch()(Action.DOWN, control, ctx.command_queue)
+
+    assert ctx.command_queue.depth(Lane.SAFETY) == 1
+    assert json.loads(await ctx.command_queue.get()) == {"command": "digital", "pin": 1, "value": 1}
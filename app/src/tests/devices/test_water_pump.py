@@ -1,13 +1,14 @@
-from unittest.mock import patch, MagicMock
+from dataclasses import replace
 
 import pytest
 
+from katomato.config import config
 from katomato.devices.water_pump import WaterPump
 from tests.test_utils import get_test_sensor_data
 
 
 @pytest.mark.asyncio
-async def test_estimate_runtime_calculates_correctly(ctx):
+async def test_estimate_runtime_calculates_correctly(ctx, monkeypatch):
     sensor_value = 40.0
     target_moisture = 60.0
     flow_rate = 2.5 / 60  # liters/seconds
@@ -17,15 +18,9 @@ async def test_estimate_runtime_calculates_correctly(ctx):
 
     sensor_data = get_test_sensor_data(ctx.mock_ctrl, sensor_value)
 
-    with patch("katomato.devices.water_pump.get_hardware_config") as mock_hw_config:
-        mock_hw_config.return_value = {
-            "WaterPump": MagicMock(
-                FLOW_RATE=flow_rate,
-                POT_VOLUME=pot_volume,
-            )
-        }
+    monkeypatch.setattr(config, "params", replace(config.params, water_pump_flow_rate=flow_rate, pot_volume=pot_volume))
 
-        pump = WaterPump()
-        result = await pump.estimate_runtime(sensor_data)
+    pump = WaterPump()
+    result = await pump.estimate_runtime(sensor_data)
 
-        assert result == pytest.approx(expected_runtime, rel=9.6)
+    assert result == pytest.approx(expected_runtime, rel=9.6)
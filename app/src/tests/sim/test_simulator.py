@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from katomato.config import config
+from katomato.core.clock import VirtualClockLoop
+from katomato.sim.plant import HUMIDIFIER_PIN, WATER_PUMP_PIN, GreenhouseBoard, PlantModel
+from katomato.sim.runner import run_simulation
+
+
+def test_plant_model_pump_adds_moisture():
+    plant = PlantModel(soil_moisture=30.0)
+    plant.set_pin(WATER_PUMP_PIN, 1)  # relays are active low
+    plant.set_pin(HUMIDIFIER_PIN, 1)
+    plant.advance(60)
+    dry = plant.soil_moisture
+
+    plant.set_pin(WATER_PUMP_PIN, 0)
+    plant.advance(70)
+
+    assert dry < 30.0
+    assert plant.soil_moisture == pytest.approx(dry + 10 * plant.pump_rate, rel=0.01)
+
+
+def test_board_acknowledges_commands():
+    loop = VirtualClockLoop()
+    board = GreenhouseBoard(PlantModel(), loop)
+    sent = []
+    board.send = sent.append
+    try:
+        board.received(b'{"command": "digital", "pin": 12, "value": 1, "seq": 7}\n{"command": "digital", ')
+        board.received(b'"pin": 3, "value": 1, "seq": 8}\n')
+    finally:
+        loop.close()
+
+    assert board.plant.pins[WATER_PUMP_PIN] == 1
+    assert [json.loads(line) for line in sent] == [
+        {"sensor": "ack", "value": 7},
+        {"sensor": "nack", "label": "No control for pin", "value": 8},
+    ]
+
+
+def test_simulation_is_deterministic_and_keeps_humidity_in_band():
+    params = config.params
+    # the filters smooth over readings, keep them close to the firmware's cadence
+    first = run_simulation(days=1, seed=3, reading_interval=10, sample_interval=600)
+    second = run_simulation(days=1, seed=3, reading_interval=10, sample_interval=600)
+
+    assert first.samples == second.samples
+    assert first.commands == second.commands > 0
+    assert config.params is params
+
+    settled = [s.humidity for s in first.samples if s.day >= 0.25]
+    assert min(settled) >= params.HUM_FLOOR - 5
+    assert max(settled) <= params.HUM_CEIL + 5
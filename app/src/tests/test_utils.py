@@ -1,5 +1,17 @@
-from katomato.core.sensor_data import SensorData, Control
+from collections.abc import Coroutine
+
+from katomato.core.clock import VirtualClockLoop
+from katomato.core.sensor_data import Control, SensorData
 
 
 def get_test_sensor_data(ctrl: Control, val: float) -> SensorData:
     return SensorData(value=val, controls=[ctrl], sensor="dummy", unit="dummy", label="dummy")
+
+
+def run_virtual(main: Coroutine):
+    """Runs `main` on a VirtualClockLoop, sleeps and timers take no wall time."""
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        loop.close()
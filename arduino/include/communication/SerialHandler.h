@@ -2,11 +2,43 @@
 
 #include "config/HardwareRegistry.h"
 
+/*
+ * Binary telemetry frame, enabled by the "telemetry" command (value 1):
+ *
+ *   SYNC (0xA5) | LEN (u8) | PAYLOAD (LEN bytes) | CRC16 (u16 LE, CRC-16/CCITT-FALSE over LEN and PAYLOAD)
+ *
+ * PAYLOAD starts with the frame type:
+ *   META     0x01 | idx u8 | id str | label str | unit str | control count u8 | (pin u8 | type str | device str)...
+ *   READING  0x02 | idx u8 | seq u16 LE | value f32 LE
+ *   ACK      0x03 | seq u16 LE | status u8 | reason str, status 0 is success
+ *
+ * str is u8 length followed by the characters. META frames are sent once per sensor on the handshake.
+ *
+ * Commands with a "seq" field are acknowledged with an ACK frame, or in JSON mode with
+ * {"sensor":"ack","value":seq} and {"sensor":"nack","value":seq,"label":reason} lines.
+ */
 class SerialHandler {
 public:
     static void handleCommands();
     static void sendSensorData(const SensorEntry *sensorArray, size_t sensorCount);
 
 private:
+    static constexpr uint8_t FRAME_SYNC = 0xA5;
+    static constexpr uint8_t FRAME_META = 0x01;
+    static constexpr uint8_t FRAME_READING = 0x02;
+    static constexpr uint8_t FRAME_ACK = 0x03;
+    static constexpr size_t MAX_PAYLOAD = 255;
+
+    static bool binaryMode;
+    static uint16_t sequence;
+
+    static void handleCommand();
     static void sendError(const char *msg);
+    static void sendAck(long seq, const char *error);
+    static void sendMetadata(const SensorEntry *sensorArray, size_t sensorCount);
+    static void sendReadings(const SensorEntry *sensorArray, size_t sensorCount);
+    static void sendFrame(const uint8_t *payload, uint8_t length);
+    static bool putByte(uint8_t *payload, size_t &pos, uint8_t value);
+    static bool putString(uint8_t *payload, size_t &pos, const char *value);
+    static uint16_t crc16(const uint8_t *data, size_t length, uint16_t crc);
 };
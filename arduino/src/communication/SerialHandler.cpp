@@ -3,24 +3,66 @@
 #include "config/HardwareRegistry.h"
 #include "../../include/communication/SerialHandler.h"
 
+bool SerialHandler::binaryMode = false;
+uint16_t SerialHandler::sequence = 0;
+
 void SerialHandler::handleCommands() {
-    if (!Serial.available()) return;
+    // The host batches several commands into one write, all of them are handled before the receive buffer fills up
+    while (Serial.available()) handleCommand();
+}
+
+void SerialHandler::handleCommand() {
     String input = Serial.readStringUntil('\n');
     JsonDocument doc;
     const DeserializationError err = deserializeJson(doc, input);
     if (err) return sendError(err.c_str());
 
     const char *cmd = doc["command"];
+    if (cmd && strcmp(cmd, "telemetry") == 0) {
+        binaryMode = (doc["value"] | 0) == 1;
+        if (binaryMode) sendMetadata(HardwareRegistry::getAllSensors(), HardwareRegistry::getSensorCount());
+        return;
+    }
+
+    const long seq = doc["seq"] | -1L;
     const int pin = doc["pin"] | -1;
     const int value = doc["value"] | -1;
-    if (!cmd || pin < 0 || value < 0) return sendError("Missing fields");
+    if (!cmd || pin < 0 || value < 0) return sendAck(seq, "Missing fields");
 
     Control *ctrl = HardwareRegistry::getControlByPin(pin);
-    if (!ctrl) return sendError("No control for pin");
+    if (!ctrl) return sendAck(seq, "No control for pin");
     ctrl->setValue(value);
+    sendAck(seq, nullptr);
+}
+
+void SerialHandler::sendAck(const long seq, const char *error) {
+    if (seq < 0) {
+        // Commands without a sequence number are not acknowledged
+        if (error) sendError(error);
+        return;
+    }
+    if (binaryMode) {
+        uint8_t payload[MAX_PAYLOAD];
+        size_t pos = 0;
+        payload[pos++] = FRAME_ACK;
+        payload[pos++] = seq & 0xFF;
+        payload[pos++] = (seq >> 8) & 0xFF;
+        payload[pos++] = error ? 1 : 0;
+        if (error) putString(payload, pos, error); // a reason too long for the frame is left out
+        return sendFrame(payload, static_cast<uint8_t>(pos));
+    }
+
+    JsonDocument doc;
+    doc["sensor"] = error ? "nack" : "ack";
+    doc["value"] = seq;
+    if (error) doc["label"] = error;
+    serializeJson(doc, Serial);
+    Serial.println();
 }
 
 void SerialHandler::sendSensorData(const SensorEntry *sensorArray, const size_t sensorCount) {
+    if (binaryMode) return sendReadings(sensorArray, sensorCount);
+
     for (size_t i = 0; i < sensorCount; ++i) {
         JsonDocument doc;
         doc["sensor"] = sensorArray[i].sensor->id;
@@ -48,3 +90,78 @@ void SerialHandler::sendError(const char *msg) {
     serializeJson(doc, Serial);
     Serial.println();
 }
+
+void SerialHandler::sendMetadata(const SensorEntry *sensorArray, const size_t sensorCount) {
+    uint8_t payload[MAX_PAYLOAD];
+    for (size_t i = 0; i < sensorCount; ++i) {
+        const Sensor *sensor = sensorArray[i].sensor;
+        size_t pos = 0;
+        payload[pos++] = FRAME_META;
+        payload[pos++] = static_cast<uint8_t>(i);
+        bool fits = putString(payload, pos, sensor->id)
+                    && putString(payload, pos, sensor->label)
+                    && putString(payload, pos, sensor->unit)
+                    && putByte(payload, pos, static_cast<uint8_t>(sensor->controlCount));
+        for (size_t j = 0; fits && j < sensor->controlCount; ++j) {
+            fits = putByte(payload, pos, sensor->controls[j]->pin)
+                   && putString(payload, pos, sensor->controls[j]->type)
+                   && putString(payload, pos, sensor->controls[j]->device);
+        }
+        if (!fits) {
+            // A truncated id or control would be taken for another sensor, the host warns about its readings
+            sendError("Sensor metadata does not fit in a frame");
+            continue;
+        }
+        sendFrame(payload, static_cast<uint8_t>(pos));
+    }
+}
+
+void SerialHandler::sendReadings(const SensorEntry *sensorArray, const size_t sensorCount) {
+    uint8_t payload[8];
+    for (size_t i = 0; i < sensorCount; ++i) {
+        const float value = sensorArray[i].sensor->read();
+        const uint16_t seq = sequence++;
+        payload[0] = FRAME_READING;
+        payload[1] = static_cast<uint8_t>(i);
+        payload[2] = seq & 0xFF;
+        payload[3] = seq >> 8;
+        memcpy(payload + 4, &value, sizeof(value)); // AVR floats are IEEE 754, little endian
+        sendFrame(payload, sizeof(payload));
+    }
+}
+
+void SerialHandler::sendFrame(const uint8_t *payload, const uint8_t length) {
+    uint16_t crc = crc16(&length, 1, 0xFFFF);
+    crc = crc16(payload, length, crc);
+    Serial.write(FRAME_SYNC);
+    Serial.write(length);
+    Serial.write(payload, length);
+    Serial.write(static_cast<uint8_t>(crc & 0xFF));
+    Serial.write(static_cast<uint8_t>(crc >> 8));
+}
+
+bool SerialHandler::putByte(uint8_t *payload, size_t &pos, const uint8_t value) {
+    if (pos >= MAX_PAYLOAD) return false;
+    payload[pos++] = value;
+    return true;
+}
+
+bool SerialHandler::putString(uint8_t *payload, size_t &pos, const char *value) {
+    // Written whole or not at all, nothing is written past the end of the payload
+    const size_t length = strlen(value);
+    if (pos >= MAX_PAYLOAD || length > MAX_PAYLOAD - pos - 1) return false;
+    payload[pos++] = static_cast<uint8_t>(length);
+    memcpy(payload + pos, value, length);
+    pos += length;
+    return true;
+}
+
+uint16_t SerialHandler::crc16(const uint8_t *data, const size_t length, uint16_t crc) {
+    for (size_t i = 0; i < length; ++i) {
+        crc ^= static_cast<uint16_t>(data[i]) << 8;
+        for (uint8_t bit = 0; bit < 8; ++bit) {
+            crc = crc & 0x8000 ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}